@@ -1,17 +1,18 @@
 from __future__ import annotations
 from typing import List, Tuple, Dict, Any
 from ..algebra.field import FieldElement
-from ..stark.air import AIR
+from ..stark.air import SymbolicAIR
+from ..stark.expressions import Expr, col, next_col
 
 
-class CubicAIR(AIR):
+class CubicAIR(SymbolicAIR):
     """
     Proves computation of a repeated cubic function:
     x_{mnext} = x_{curr}^3 + x_{curr} + 5
 
     This computation is 'harder' because:
     1. Cubic growth is much faster than Fibonacci.
-    2. The constraint degree is 3, which requires the prover to interpolate
+    2. The constraint degree is 3 (derived from the x^3 term), which requires the prover to interpolate
        the composition polynomial on a larger subset of the LDE domain
        (degree ~ 2N instead of N).
     """
@@ -33,9 +34,6 @@ class CubicAIR(AIR):
             "start_value": self.start_value,
         }
 
-    def constraint_degree(self) -> int:
-        return 3  # Cubic constraints
-
     def generate_trace(self) -> List[List[FieldElement]]:
         trace: List[List[FieldElement]] = []
         current = FieldElement(self.start_value)
@@ -61,15 +59,10 @@ class CubicAIR(AIR):
             (self.length - 1, 0, self.result),
         ]
 
-    def evaluate_transition_constraints(
-        self, current_step: List[FieldElement], next_step: List[FieldElement]
-    ) -> List[FieldElement]:
+    def transition_constraints(self) -> List[Expr]:
         # Constraint: x_next - (x_curr^3 + x_curr + 5) = 0
+        x_curr = col(0)
+        x_next = next_col(0)
 
-        x_curr = current_step[0]
-        x_next = next_step[0]
-
-        computed_next = x_curr.pow(3) + x_curr + FieldElement(5)
-        constraint = x_next - computed_next
-
-        return [constraint]
+        computed_next = x_curr.pow(3) + x_curr + 5
+        return [x_next - computed_next]
@@ -1,9 +1,10 @@
 from __future__ import annotations
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Any
 from ..algebra.field import FieldElement
-from ..stark.air import AIR
+from ..stark.air import SymbolicAIR
+from ..stark.expressions import Expr, col, next_col
 
-class FibonacciAIR(AIR):
+class FibonacciAIR(SymbolicAIR):
     def __init__(self, trace_length: int, result_value: FieldElement) -> None:
         self.length: int = trace_length
         self.result: FieldElement = result_value # Public input: the expected result at the end
@@ -50,18 +51,14 @@ class FibonacciAIR(AIR):
             (self.length - 1, 1, self.result)
         ]
 
-    def evaluate_transition_constraints(
-        self, 
-        current_step: List[FieldElement], 
-        next_step: List[FieldElement]
-    ) -> List[FieldElement]:
-        # R0_cur, R1_cur = current_step
-        # R0_next, R1_next = next_step
+    def transition_constraints(self) -> List[Expr]:
+        # R0_cur, R1_cur = col(0), col(1)
+        # R0_next, R1_next = next_col(0), next_col(1)
         
         # 1. R0_next = R1_cur
-        c1 = next_step[0] - current_step[1]
+        c1 = next_col(0) - col(1)
         
         # 2. R1_next = R0_cur + R1_cur
-        c2 = next_step[1] - (current_step[0] + current_step[1])
+        c2 = next_col(1) - (col(0) + col(1))
         
         return [c1, c2]
@@ -1,9 +1,11 @@
 from __future__ import annotations
 from typing import List, Tuple, Dict, Any
 from ..algebra.field import FieldElement
-from ..stark.air import AIR
+from ..algebra.field_vector import batch_inverse
+from ..stark.air import SymbolicAIR
+from ..stark.expressions import Expr, col, const, next_col
 
-class RollupAIR(AIR):
+class RollupAIR(SymbolicAIR):
     """
     Proves the validity of a batch of transactions between N users.
     
@@ -62,10 +64,6 @@ class RollupAIR(AIR):
             'final_balances': [x.val for x in self.final_balances]
         }
         
-    def constraint_degree(self) -> int:
-        # P(x) involves Selector * Amount. Selector degree N-1. Total N.
-        return self.num_users
-        
     def generate_trace(self, transactions: List[Dict[str, int]]) -> List[List[FieldElement]]:
         """
         transactions: List of {'from': i, 'to': j, 'amount': k}
@@ -120,55 +118,47 @@ class RollupAIR(AIR):
             
         return constraints
 
-    def evaluate_transition_constraints(
-        self, 
-        current_step: List[FieldElement], 
-        next_step: List[FieldElement]
-    ) -> List[FieldElement]:
+    def _selectors(self, variable: Expr) -> List[Expr]:
+        """
+        All N Lagrange selectors L_k(variable), as expressions.
+        L_k(x) = prod_{j!=k} (x - j) / prod_{j!=k} (k - j), i.e. 1 if x=k, 0 if x!=k (for x in 0..N-1).
+        prod_{j!=k} (x - j) is prefix[k] * suffix[k] over the factors (x - j),
+        so the N selectors share O(N) products instead of O(N^2).
+        """
+        n = self.num_users
+        factors = [variable - j for j in range(n)]
+
+        prefix = [const(1)]
+        for j in range(n - 1):
+            prefix.append(prefix[-1] * factors[j])
+        suffix = [const(1)]
+        for j in range(n - 1, 0, -1):
+            suffix.append(suffix[-1] * factors[j])
+        suffix.reverse()
+
+        denominators = []
+        for k in range(n):
+            denominator = FieldElement(1)
+            for j in range(n):
+                if j != k:
+                    denominator = denominator * (k - j)
+            denominators.append(denominator)
+        denominator_invs = batch_inverse(denominators)
+
+        return [prefix[k] * suffix[k] * denominator_invs[k] for k in range(n)]
+
+    def transition_constraints(self) -> List[Expr]:
         # Columns: [0..N-1] Balances, [N] Sender, [N+1] Receiver, [N+2] Amount
-        
-        sender = current_step[self.num_users]
-        receiver = current_step[self.num_users + 1]
-        amount = current_step[self.num_users + 2]
-        
+        sender = col(self.num_users)
+        receiver = col(self.num_users + 1)
+        amount = col(self.num_users + 2)
+
+        is_sender = self._selectors(sender)
+        is_receiver = self._selectors(receiver)
+
         res_constraints = []
-        
-        # Pre-compute lagrange selectors?
-        # L_k(x) is 1 if x=k, 0 if x!=k (for x in 0..N-1)
-        # We can implement this naively:
-        # L_k(x) = prod_{j!=k} (x - j) / prod_{j!=k} (k - j)
-        
-        # Helper to compute product for selector
-        def selector(target_idx: int, variable: FieldElement) -> FieldElement:
-            # If N is small, naive is fine.
-            numerator = FieldElement(1)
-            denominator = FieldElement(1)
-            
-            # Loop 0 to N-1
-            for j in range(self.num_users):
-                if j == target_idx: continue
-                
-                j_fe = FieldElement(j)
-                numerator = numerator * (variable - j_fe)
-                denominator = denominator * (FieldElement(target_idx) - j_fe)
-                
-            return numerator / denominator
-            
-        # Optimization: We compute 'is_sender[k]' and 'is_receiver[k]'
-        # This is expensive inside the constraint loop (called N*blowup times).
-        # But this is Python demo.
-        
         for k in range(self.num_users):
-             # Next_Bal[k] = Curr_Bal[k] - Amount * (Sender==k) + Amount * (Receiver==k)
-             
-             is_sender = selector(k, sender)
-             is_receiver = selector(k, receiver)
-             
-             delta = amount * (is_receiver - is_sender)
-             
-             expected_next = current_step[k] + delta
-             constraint = next_step[k] - expected_next
-             
-             res_constraints.append(constraint)
-             
+            # Next_Bal[k] = Curr_Bal[k] - Amount * (Sender==k) + Amount * (Receiver==k)
+            delta = amount * (is_receiver[k] - is_sender[k])
+            res_constraints.append(next_col(k) - (col(k) + delta))
         return res_constraints
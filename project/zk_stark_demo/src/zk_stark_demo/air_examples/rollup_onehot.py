@@ -0,0 +1,93 @@
+from __future__ import annotations
+from typing import List, Dict
+from ..algebra.field import FieldElement
+from ..stark.expressions import Expr, col, next_col
+from .rollup import RollupAIR
+
+class OneHotRollupAIR(RollupAIR):
+    """
+    Same rollup statement as RollupAIR (N balances updated by a batch of
+    transfers), with the sender/receiver encoded as one-hot indicator columns
+    instead of indices.
+
+    Trace:
+    Columns 0..N-1:    Balances of User i
+    Columns N..2N-1:   is_send[i]  (1 iff User i is the sender)
+    Columns 2N..3N-1:  is_recv[i]  (1 iff User i is the receiver)
+    Column 3N:         Amount (Witness)
+
+    Transition Constraints:
+    - is_send[i]^2 - is_send[i] = 0, is_recv[i]^2 - is_recv[i] = 0 (booleans)
+    - sum_i is_send[i] = 1, sum_i is_recv[i] = 1 (exactly one of each)
+    - Next_Bal[k] = Curr_Bal[k] + Amount * (is_recv[k] - is_send[k])
+
+    RollupAIR needs a degree N-1 Lagrange selector to turn an index into
+    "Sender == k", so its constraint degree (and the number of composition
+    segments the prover commits to and recombines) grows with N.
+    Here every constraint has degree <= 2 whatever N is, at the price of a
+    wider trace (3N + 1 columns instead of N + 3).
+    """
+
+    def trace_width(self) -> int:
+        # width = 3N + 1 (Balances, is_send, is_recv, Amount)
+        return 3 * self.num_users + 1
+
+    def generate_trace(self, transactions: List[Dict[str, int]]) -> List[List[FieldElement]]:
+        """
+        transactions: List of {'from': i, 'to': j, 'amount': k}
+        """
+        n = self.num_users
+        trace = []
+
+        # Current balances
+        balances = [b for b in self.initial_balances]
+
+        # Pad transactions with no-ops (from=0, to=0, amount=0)
+        padded_txs = transactions + [{'from':0, 'to':0, 'amount':0}] * (self.length - 1 - len(transactions))
+
+        def indicator(index: int) -> List[FieldElement]:
+            return [FieldElement(1) if i == index else FieldElement(0) for i in range(n)]
+
+        for tx in padded_txs:
+            sender = tx['from']
+            receiver = tx['to']
+            amount = FieldElement(tx['amount'])
+
+            row = [b for b in balances] + indicator(sender) + indicator(receiver) + [amount]
+            trace.append(row)
+
+            # Update state
+            balances[sender] = balances[sender] - amount
+            balances[receiver] = balances[receiver] + amount
+
+        # Final row: state only, witnesses set to a valid no-op (0 -> 0, amount 0)
+        last_row = [b for b in balances] + indicator(0) + indicator(0) + [FieldElement(0)]
+        trace.append(last_row)
+
+        return trace
+
+    def transition_constraints(self) -> List[Expr]:
+        n = self.num_users
+        is_send = [col(n + i) for i in range(n)]
+        is_recv = [col(2 * n + i) for i in range(n)]
+        amount = col(3 * n)
+
+        res_constraints = []
+
+        # Indicators are booleans
+        for b in is_send + is_recv:
+            res_constraints.append(b * b - b)
+
+        # Exactly one sender and one receiver per transaction
+        for family in (is_send, is_recv):
+            total = family[0]
+            for b in family[1:]:
+                total = total + b
+            res_constraints.append(total - 1)
+
+        for k in range(n):
+            # Next_Bal[k] = Curr_Bal[k] + Amount * (is_recv[k] - is_send[k])
+            delta = amount * (is_recv[k] - is_send[k])
+            res_constraints.append(next_col(k) - (col(k) + delta))
+
+        return res_constraints
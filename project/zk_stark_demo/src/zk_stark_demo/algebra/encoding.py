@@ -0,0 +1,29 @@
+from __future__ import annotations
+from typing import Iterable, Sequence, Union
+import numpy as np
+from .field import FieldElement
+from .field_vector import FieldVector
+
+# Canonical encoding of GF(P) elements in every commitment:
+# P < 2^32, so each reduced element is exactly 4 bytes, little-endian.
+# A row (Merkle leaf) is the concatenation of its elements' encodings.
+ELEMENT_SIZE = 4
+ELEMENT_DTYPE = np.dtype("<u4")
+
+
+def encode_elements(values: Iterable[Union[FieldElement, int]]) -> bytes:
+    """Encodes one leaf (a single element or a row) for hashing or verification."""
+    return np.fromiter(
+        (v.val if isinstance(v, FieldElement) else v for v in values), dtype=ELEMENT_DTYPE
+    ).tobytes()
+
+
+def encode_columns(columns: Sequence[FieldVector]) -> np.ndarray:
+    """
+    Lays out equally long columns as one row-major C-contiguous buffer,
+    so leaf i (row i, all columns) is the byte range [i * row_size, (i + 1) * row_size).
+    """
+    table = np.empty((len(columns[0]), len(columns)), dtype=ELEMENT_DTYPE)
+    for c, column in enumerate(columns):
+        table[:, c] = column.data
+    return table
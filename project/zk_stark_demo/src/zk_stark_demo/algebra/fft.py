@@ -1,56 +1,219 @@
-from typing import List
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Sequence, Tuple, Union
+import numpy as np
 from .field import FieldElement
+from .field_vector import FieldVector, as_field_vector
 
-def fft(vals: List[FieldElement], root_of_unity: FieldElement) -> List[FieldElement]:
+P = np.uint64(FieldElement.P)
+
+# Bound on the number of (root, size) tables kept alive.
+# A prover touches a handful of sizes (trace, LDE, composition), so this is plenty.
+TWIDDLE_CACHE_SIZE = 32
+
+# Coset shifts whose power table is kept: one table per shift (the longest asked for),
+# enough for the LDE offset, its inverse and a few coset offsets.
+SHIFT_CACHE_SIZE = 8
+_shift_tables: "OrderedDict[int, np.ndarray]" = OrderedDict()
+
+
+@lru_cache(maxsize=TWIDDLE_CACHE_SIZE)
+def bit_reverse_permutation(log_size: int) -> np.ndarray:
+    """perm[i] = i with its log_size low bits reversed (cached, read-only)."""
+    perm = np.zeros(1, dtype=np.int64)
+    for _ in range(log_size):
+        perm = np.concatenate([perm * 2, perm * 2 + 1])
+    perm.setflags(write=False)
+    return perm
+
+
+@lru_cache(maxsize=TWIDDLE_CACHE_SIZE)
+def _twiddle_table(root_val: int, log_size: int) -> np.ndarray:
+    """
+    [w^0, w^1, ..., w^(n/2 - 1)] for w = root_val and n = 2^log_size.
+    The twiddles of every butterfly stage are a strided view of this table.
+    """
+    table = FieldVector.powers(root_val, max(1, (1 << log_size) // 2)).data
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=TWIDDLE_CACHE_SIZE)
+def _inverse_constants(root_val: int, log_size: int) -> Tuple[FieldElement, FieldElement]:
+    """(root^-1, n^-1) used by the inverse transform."""
+    return FieldElement(root_val).inv(), FieldElement(1 << log_size).inv()
+
+
+def reverse_bits(index: int, log_size: int) -> int:
+    """index with its log_size low bits reversed (scalar form of the permutation)."""
+    if log_size == 0:
+        return 0
+    return int(format(index, f"0{log_size}b")[::-1], 2)
+
+
+# Every byte with its 8 bits reversed
+_BYTE_REVERSE = np.array([int(f"{b:08b}"[::-1], 2) for b in range(256)], dtype=np.int64)
+
+
+def reverse_bits_array(indices: np.ndarray, log_size: int) -> np.ndarray:
+    """reverse_bits for a whole array of indices (log_size <= 32), one table lookup per byte."""
+    indices = np.asarray(indices, dtype=np.int64)
+    result = np.zeros_like(indices)
+    for byte in range(4):
+        result |= _BYTE_REVERSE[(indices >> (8 * byte)) & 0xFF] << (24 - 8 * byte)
+    return result >> (32 - log_size)
+
+
+def bit_reverse(values: Union[List[FieldElement], FieldVector]) -> FieldVector:
+    """
+    Returns the values reordered so that position p holds values[reverse_bits(p)].
+    The permutation is an involution, so applying it twice restores the order.
+    """
+    values = as_field_vector(values)
+    return FieldVector(values.data[bit_reverse_permutation(_log2(len(values)))])
+
+
+def _log2(n: int) -> int:
+    if n <= 0 or n & (n - 1) != 0:
+        raise ValueError(f"FFT length must be a power of two. Got {n}.")
+    return n.bit_length() - 1
+
+
+def _ntt_in_place(matrix: np.ndarray, root_of_unity: FieldElement) -> None:
+    """
+    Iterative radix-2 Cooley-Tukey NTT over the last axis of a 2D uint64 array.
+    Every row is transformed; all rows share the same butterfly passes.
+    """
+    batch, n = matrix.shape
+    log_n = _log2(n)
+    if n == 1:
+        return
+
+    # Bit-reversal permutation, then log(n) butterfly stages working in the same buffer
+    matrix[:] = matrix[:, bit_reverse_permutation(log_n)]
+    twiddles = _twiddle_table(root_of_unity.val, log_n)
+
+    half = 1
+    while half < n:
+        # Blocks of size 2*half; w = root^(n / (2*half)) is a primitive (2*half)-th root
+        w = twiddles[:: n // (2 * half)]
+        blocks = matrix.reshape(batch, n // (2 * half), 2, half)
+        u = blocks[:, :, 0, :]
+        v = (blocks[:, :, 1, :] * w) % P
+        # x_{j + half} = -x_j: write the "minus" half first, since u is a view
+        blocks[:, :, 1, :] = (u + (P - v)) % P
+        blocks[:, :, 0, :] = (u + v) % P
+        half *= 2
+
+
+def _as_matrix(columns: Sequence[Union[List[FieldElement], FieldVector]]) -> np.ndarray:
+    return np.stack([as_field_vector(c).data for c in columns]).astype(np.uint64, copy=False)
+
+
+def fft(vals: Union[List[FieldElement], FieldVector], root_of_unity: FieldElement) -> FieldVector:
     """
     Computes the FFT of vals using the given root_of_unity.
     vals length must be a power of 2.
-    root_of_unity must have order effectively covering the length.
+    root_of_unity must be a primitive root of unity of order len(vals).
     """
-    n = len(vals)
-    if n == 1:
-        return vals
-
-    # Splitting into evens and odds
-    # In standard FFT (Cooley-Tukey), we split coefficients.
-    # A(x) = A_even(x^2) + x * A_odd(x^2)
-    evens = vals[0::2]
-    odds = vals[1::2]
-    
-    root_squared = root_of_unity * root_of_unity
-    
-    left = fft(evens, root_squared)
-    right = fft(odds, root_squared)
-    
-    result = [FieldElement.zero()] * n
-    current_root = FieldElement.one()
-    
-    half_n = n // 2
-    for i in range(half_n):
-        # A(x_i) = A_even(x_i^2) + x_i * A_odd(x_i^2)
-        # x_{i + N/2} = -x_i
-        
-        # val = left[i] + current_root * right[i]
-        # val_plus_half = left[i] - current_root * right[i] (since x_{i+N/2} = -current_root)
-        
-        # In our field, is it guaranteed that root^(N/2) = -1?
-        # Yes if root is primitive N-th root of unity.
-        
-        term = current_root * right[i]
-        result[i] = left[i] + term
-        result[i + half_n] = left[i] - term
-        
-        current_root = current_root * root_of_unity
-        
-    return result
-
-def ifft(vals: List[FieldElement], root_of_unity: FieldElement) -> List[FieldElement]:
+    matrix = as_field_vector(vals).data.reshape(1, -1).copy()
+    _ntt_in_place(matrix, root_of_unity)
+    return FieldVector(matrix[0])
+
+
+def ifft(vals: Union[List[FieldElement], FieldVector], root_of_unity: FieldElement) -> FieldVector:
     """
     Inverse FFT.
     Interpolates values to coefficients.
     """
-    inverse_root = root_of_unity.inv()
-    result = fft(vals, inverse_root)
-    
-    n_inv = FieldElement(len(vals)).inv()
-    return [r * n_inv for r in result]
+    inverse_root, n_inv = _inverse_constants(root_of_unity.val, _log2(len(vals)))
+    return fft(vals, inverse_root).scale(n_inv)
+
+
+def fft_columns(
+    columns: Sequence[Union[List[FieldElement], FieldVector]], root_of_unity: FieldElement
+) -> List[FieldVector]:
+    """
+    FFT of several equally sized columns in one call (e.g. all trace registers).
+    The twiddle setup and each butterfly stage are shared by all columns.
+    """
+    if not columns:
+        return []
+    matrix = _as_matrix(columns)
+    _ntt_in_place(matrix, root_of_unity)
+    return [FieldVector(row) for row in matrix]
+
+
+def ifft_columns(
+    columns: Sequence[Union[List[FieldElement], FieldVector]], root_of_unity: FieldElement
+) -> List[FieldVector]:
+    """Inverse of fft_columns."""
+    if not columns:
+        return []
+    matrix = _as_matrix(columns)
+    inverse_root, n_inv = _inverse_constants(root_of_unity.val, _log2(matrix.shape[1]))
+    _ntt_in_place(matrix, inverse_root)
+    matrix = (matrix * np.uint64(n_inv.val)) % P
+    return [FieldVector(row) for row in matrix]
+
+
+def fft_blocks(values: FieldVector, block_size: int, root_of_unity: FieldElement) -> FieldVector:
+    """
+    FFT of every consecutive block of `block_size` values at once (e.g. every
+    coset of a FRI layer); root_of_unity has order block_size.
+    No 1/n scaling: with an inverse root, callers apply it where it is cheapest.
+    """
+    matrix = values.data.reshape(-1, block_size).copy()
+    _ntt_in_place(matrix, root_of_unity)
+    return FieldVector(matrix.reshape(-1))
+
+
+def _shift_powers(shift_val: int, length: int) -> np.ndarray:
+    """
+    [s^0, s^1, ..., s^(length-1)] for s = shift_val, as a prefix of the shift's
+    cached table (recomputed only when a longer one is needed).
+    """
+    table = _shift_tables.pop(shift_val, None)
+    if table is None or len(table) < length:
+        table = FieldVector.powers(shift_val, length).data
+        table.setflags(write=False)
+    _shift_tables[shift_val] = table
+    while len(_shift_tables) > SHIFT_CACHE_SIZE:
+        _shift_tables.popitem(last=False)
+    return table[:length]
+
+
+def _scaled_by_shift(coeffs: Union[List[FieldElement], FieldVector], shift: FieldElement, size: int) -> FieldVector:
+    coeffs = as_field_vector(coeffs)
+    if len(coeffs) > size:
+        raise ValueError(f"Cannot evaluate {len(coeffs)} coefficients on a coset of size {size}")
+    # P(s * z) = sum c_i s^i z^i, so scale by s^i and evaluate on the subgroup
+    scaled = FieldVector((coeffs.data * _shift_powers(shift.val, len(coeffs))) % P)
+    return scaled.resize(size)
+
+
+def coset_fft(coeffs: Union[List[FieldElement], FieldVector], shift: FieldElement, size: int) -> FieldVector:
+    """
+    Evaluates the polynomial with the given coefficients on the coset shift * <w>,
+    where w is the canonical generator of order `size`.
+    Result i is P(shift * w^i).
+    """
+    return fft(_scaled_by_shift(coeffs, shift, size), FieldElement.generator_of_order(size))
+
+
+def coset_ifft(evals: Union[List[FieldElement], FieldVector], shift: FieldElement) -> FieldVector:
+    """
+    Inverse of coset_fft: recovers coefficients from evaluations on shift * <w>.
+    If P(z) = Q(s * z) has coefficients a_i, then Q has coefficients a_i * s^-i.
+    """
+    n = len(evals)
+    coeffs = ifft(evals, FieldElement.generator_of_order(n))
+    return FieldVector((coeffs.data * _shift_powers(shift.inv().val, n)) % P)
+
+
+def coset_fft_columns(
+    columns: Sequence[Union[List[FieldElement], FieldVector]], shift: FieldElement, size: int
+) -> List[FieldVector]:
+    """coset_fft of several coefficient columns in one batched transform."""
+    scaled = [_scaled_by_shift(c, shift, size) for c in columns]
+    return fft_columns(scaled, FieldElement.generator_of_order(size))
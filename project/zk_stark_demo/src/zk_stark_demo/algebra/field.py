@@ -47,6 +47,8 @@ class FieldElement:
     def __add__(self, other: Union[int, FieldElement]) -> FieldElement:
         if isinstance(other, int):
             other = FieldElement(other)
+        elif not isinstance(other, FieldElement):
+            return NotImplemented
         return self.add(other)
 
     def __radd__(self, other: Union[int, FieldElement]) -> FieldElement:
@@ -55,16 +57,22 @@ class FieldElement:
     def __sub__(self, other: Union[int, FieldElement]) -> FieldElement:
         if isinstance(other, int):
             other = FieldElement(other)
+        elif not isinstance(other, FieldElement):
+            return NotImplemented
         return self.sub(other)
 
     def __rsub__(self, other: Union[int, FieldElement]) -> FieldElement:
         if isinstance(other, int):
             other = FieldElement(other)
+        elif not isinstance(other, FieldElement):
+            return NotImplemented
         return other.sub(self)
 
     def __mul__(self, other: Union[int, FieldElement]) -> FieldElement:
         if isinstance(other, int):
             other = FieldElement(other)
+        elif not isinstance(other, FieldElement):
+            return NotImplemented
         return self.mul(other)
 
     def __rmul__(self, other: Union[int, FieldElement]) -> FieldElement:
@@ -73,11 +81,15 @@ class FieldElement:
     def __truediv__(self, other: Union[int, FieldElement]) -> FieldElement:
         if isinstance(other, int):
             other = FieldElement(other)
+        elif not isinstance(other, FieldElement):
+            return NotImplemented
         return self.div(other)
 
     def __rtruediv__(self, other: Union[int, FieldElement]) -> FieldElement:
         if isinstance(other, int):
             other = FieldElement(other)
+        elif not isinstance(other, FieldElement):
+            return NotImplemented
         return other.div(self)
 
     def __neg__(self) -> FieldElement:
@@ -0,0 +1,310 @@
+from __future__ import annotations
+from typing import Iterable, Iterator, List, Sequence, Union, overload
+import numpy as np
+from .field import FieldElement
+
+
+Scalar = Union[int, FieldElement]
+Operand = Union["FieldVector", FieldElement, int]
+
+
+class FieldVector:
+    """
+    A contiguous vector of elements of GF(P), stored as a uint64 NumPy array.
+
+    Every value is kept reduced in [0, P). Since P = 3 * 2^30 + 1 < 2^32,
+    the product of two reduced values is below 2^64, so elementwise
+    multiplication followed by `% P` never overflows the uint64 lanes.
+
+    Arithmetic mirrors FieldElement (add/sub/mul/neg/pow plus the
+    operators), but works on the whole array at once. The other operand can
+    be another FieldVector of the same length, a FieldElement or an int.
+    """
+
+    P: int = FieldElement.P
+
+    def __init__(self, values: Union[np.ndarray, Iterable[Scalar]]) -> None:
+        if isinstance(values, np.ndarray):
+            if values.dtype != np.uint64:
+                values = np.mod(values.astype(np.int64, copy=False), self.P).astype(np.uint64)
+            self.data: np.ndarray = values
+        else:
+            self.data: np.ndarray = np.fromiter(
+                (v.val if isinstance(v, FieldElement) else v % self.P for v in values),
+                dtype=np.uint64,
+            )
+
+    # --- Constructors ---
+
+    @classmethod
+    def zeros(cls, length: int) -> FieldVector:
+        return cls(np.zeros(length, dtype=np.uint64))
+
+    @classmethod
+    def full(cls, length: int, value: Scalar) -> FieldVector:
+        return cls(np.full(length, FieldElement(value).val, dtype=np.uint64))
+
+    @classmethod
+    def powers(cls, base: Scalar, length: int, start: Scalar = 1) -> FieldVector:
+        """
+        Returns [start, start*base, start*base^2, ..., start*base^(length-1)].
+        Built by doubling: the second half of each block is the first half
+        scaled by base^block, so only O(log length) vector passes are needed.
+        """
+        base = FieldElement(base)
+        out = np.empty(length, dtype=np.uint64)
+        if length == 0:
+            return cls(out)
+        out[0] = FieldElement(start).val
+        filled = 1
+        step = base
+        while filled < length:
+            take = min(filled, length - filled)
+            out[filled:filled + take] = (out[:take] * np.uint64(step.val)) % np.uint64(cls.P)
+            filled += take
+            step = step * step
+        return cls(out)
+
+    @classmethod
+    def powers_at(cls, base: Scalar, exponents: np.ndarray) -> FieldVector:
+        """
+        Returns [base^e for e in exponents]. All exponents share one ladder of
+        squarings base^(2^j); each step multiplies it into the entries whose bit j is set.
+        """
+        remaining = np.asarray(exponents, dtype=np.uint64).copy()
+        p = np.uint64(cls.P)
+        out = np.ones(len(remaining), dtype=np.uint64)
+        square = FieldElement(base)
+        for _ in range(int(remaining.max(initial=0)).bit_length()):
+            factors = np.where(remaining & np.uint64(1), np.uint64(square.val), np.uint64(1))
+            out = (out * factors) % p
+            remaining >>= np.uint64(1)
+            square = square * square
+        return cls(out)
+
+    # --- Container protocol ---
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @overload
+    def __getitem__(self, key: int) -> FieldElement: ...
+
+    @overload
+    def __getitem__(self, key: slice) -> FieldVector: ...
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return FieldElement(int(self.data[key]))
+        return FieldVector(self.data[key])
+
+    def __setitem__(self, key, value: Operand) -> None:
+        if isinstance(value, FieldVector):
+            self.data[key] = value.data
+        else:
+            self.data[key] = FieldElement(value).val
+
+    def __iter__(self) -> Iterator[FieldElement]:
+        for v in self.data.tolist():
+            yield FieldElement(v)
+
+    def to_list(self) -> List[FieldElement]:
+        return [FieldElement(v) for v in self.data.tolist()]
+
+    def copy(self) -> FieldVector:
+        return FieldVector(self.data.copy())
+
+    def resize(self, length: int) -> FieldVector:
+        """Returns a copy truncated or zero-padded to `length`."""
+        out = np.zeros(length, dtype=np.uint64)
+        keep = min(length, len(self.data))
+        out[:keep] = self.data[:keep]
+        return FieldVector(out)
+
+    def roll(self, shift: int) -> FieldVector:
+        """Cyclic rotation, same semantics as numpy.roll."""
+        return FieldVector(np.roll(self.data, shift))
+
+    # --- Arithmetic ---
+
+    def _operand(self, other: Operand) -> Union[np.ndarray, np.uint64]:
+        if isinstance(other, FieldVector):
+            if len(other) != len(self):
+                raise ValueError(f"Length mismatch: {len(self)} != {len(other)}")
+            return other.data
+        if isinstance(other, FieldElement):
+            return np.uint64(other.val)
+        if isinstance(other, (int, np.integer)):
+            return np.uint64(int(other) % self.P)
+        raise TypeError(f"Unsupported operand type: {type(other).__name__}")
+
+    def add(self, other: Operand) -> FieldVector:
+        return FieldVector((self.data + self._operand(other)) % np.uint64(self.P))
+
+    def sub(self, other: Operand) -> FieldVector:
+        return FieldVector((self.data + (np.uint64(self.P) - self._operand(other))) % np.uint64(self.P))
+
+    def mul(self, other: Operand) -> FieldVector:
+        return FieldVector((self.data * self._operand(other)) % np.uint64(self.P))
+
+    def scale(self, factor: Scalar) -> FieldVector:
+        return self.mul(FieldElement(factor))
+
+    def neg(self) -> FieldVector:
+        return FieldVector((np.uint64(self.P) - self.data) % np.uint64(self.P))
+
+    def pow(self, exponent: int) -> FieldVector:
+        """Elementwise exponentiation by square-and-multiply."""
+        p = np.uint64(self.P)
+        result = np.ones_like(self.data)
+        base = self.data.copy()
+        while exponent > 0:
+            if exponent & 1:
+                result = (result * base) % p
+            base = (base * base) % p
+            exponent >>= 1
+        return FieldVector(result)
+
+    def inv(self) -> FieldVector:
+        # One field inversion for the whole vector (0 maps to 0, like FieldElement)
+        return batch_inverse(self)
+
+    def div(self, other: Operand) -> FieldVector:
+        if isinstance(other, FieldVector):
+            return self.mul(other.inv())
+        return self.mul(FieldElement(other).inv())
+
+    def sum(self) -> FieldElement:
+        # Each term is < 2^32, so the uint64 total cannot wrap for any realistic length
+        return FieldElement(int(self.data.sum(dtype=np.uint64)))
+
+    def __add__(self, other: Operand) -> FieldVector:
+        return self.add(other)
+
+    def __radd__(self, other: Operand) -> FieldVector:
+        return self.add(other)
+
+    def __sub__(self, other: Operand) -> FieldVector:
+        return self.sub(other)
+
+    def __rsub__(self, other: Operand) -> FieldVector:
+        return self.neg().add(other)
+
+    def __mul__(self, other: Operand) -> FieldVector:
+        return self.mul(other)
+
+    def __rmul__(self, other: Operand) -> FieldVector:
+        return self.mul(other)
+
+    def __truediv__(self, other: Operand) -> FieldVector:
+        return self.div(other)
+
+    def __rtruediv__(self, other: Operand) -> FieldVector:
+        return self.inv().mul(other)
+
+    def __neg__(self) -> FieldVector:
+        return self.neg()
+
+    def __pow__(self, exponent: int) -> FieldVector:
+        return self.pow(exponent)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, FieldVector):
+            return np.array_equal(self.data, other.data)
+        if isinstance(other, list):
+            return len(other) == len(self) and all(a == b for a, b in zip(self, other))
+        return False
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"FieldVector({self.data.tolist()})"
+
+
+def as_field_vector(values: Union[FieldVector, Iterable[Scalar]]) -> FieldVector:
+    """Wraps a list of FieldElements (or ints) as a FieldVector; FieldVectors pass through."""
+    if isinstance(values, FieldVector):
+        return values
+    return FieldVector(values)
+
+
+def rows_at(columns: Sequence[FieldVector], indices: Sequence[int]) -> List[List[FieldElement]]:
+    """Rows `indices` across equally long columns, converting only those entries to FieldElements."""
+    positions = np.asarray(indices, dtype=np.int64)
+    table = np.stack([col.data[positions] for col in columns], axis=1)
+    return [[FieldElement(v) for v in row] for row in table.tolist()]
+
+
+def _batch_inverse_array(values: np.ndarray) -> np.ndarray:
+    """
+    Montgomery's trick laid out as a product tree so every step is a vector pass:
+    multiply adjacent pairs up to the root, invert the root once, then push the
+    inverse back down (inv(a) = inv(ab) * b, inv(b) = inv(ab) * a).
+    About 3n multiplications and a single modular exponentiation.
+    """
+    p = np.uint64(FieldVector.P)
+    n = len(values)
+    if n == 0:
+        return values.copy()
+
+    zero_mask = values == 0
+    size = 1 << (n - 1).bit_length()
+    level = np.ones(size, dtype=np.uint64)
+    level[:n] = np.where(zero_mask, np.uint64(1), values)
+
+    levels: List[np.ndarray] = [level]
+    while len(level) > 1:
+        level = (level[0::2] * level[1::2]) % p
+        levels.append(level)
+
+    inverse = np.array([pow(int(level[0]), FieldVector.P - 2, FieldVector.P)], dtype=np.uint64)
+    for level in reversed(levels[:-1]):
+        children = np.empty(len(level), dtype=np.uint64)
+        children[0::2] = (inverse * level[1::2]) % p
+        children[1::2] = (inverse * level[0::2]) % p
+        inverse = children
+
+    result = inverse[:n]
+    result[zero_mask] = 0
+    return result
+
+
+def _batch_inverse_list(values: List[FieldElement]) -> List[FieldElement]:
+    """
+    Classic sequential Montgomery batch inversion on plain ints:
+    prefix products, one inversion, then a backward sweep.
+    """
+    p = FieldElement.P
+    prefix: List[int] = []
+    acc = 1
+    for v in values:
+        prefix.append(acc)
+        if v.val != 0:
+            acc = acc * v.val % p
+
+    inv_acc = pow(acc, p - 2, p)
+    result: List[FieldElement] = [FieldElement(0)] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        v = values[i].val
+        if v == 0:
+            continue
+        result[i] = FieldElement(inv_acc * prefix[i])
+        inv_acc = inv_acc * v % p
+    return result
+
+
+@overload
+def batch_inverse(values: FieldVector) -> FieldVector: ...
+
+@overload
+def batch_inverse(values: List[FieldElement]) -> List[FieldElement]: ...
+
+def batch_inverse(values):
+    """
+    Inverts every element using one field inversion plus ~3(n-1) multiplications.
+    Accepts a FieldVector (whole-array form) or a list of FieldElements
+    (scalar form) and returns the same kind. Zeros map to zero, like FieldElement.inv().
+    """
+    if isinstance(values, FieldVector):
+        return FieldVector(_batch_inverse_array(values.data))
+    return _batch_inverse_list(list(values))
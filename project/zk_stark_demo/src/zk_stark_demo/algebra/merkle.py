@@ -1,46 +1,143 @@
 from __future__ import annotations
 import hashlib
-from typing import List, Any, Iterable
+from itertools import islice
+from typing import Dict, List, Any, Iterable, Optional
+from .encoding import ELEMENT_SIZE, encode_columns
+from .field_vector import as_field_vector
 
 class MerkleTree:
     """
     A simple Merkle Tree implementation using SHA256.
+
+    Nodes are 32-byte digests stored in one flat buffer in heap order:
+    node 1 is the root, node i has children 2i and 2i+1, and the leaves
+    occupy [capacity, 2 * capacity) with capacity the next power of two.
+    The two children of a node are adjacent, so each internal node is the
+    hash of one 64-byte slice of the buffer.
     """
+
+    HASH_SIZE = 32
+    CHUNK = 4096
     
     def __init__(self, data: List[bytes]) -> None:
         """
         data: list of bytes to commit to.
+        The leaf data is only hashed, not retained.
         """
-        self.leaves: List[bytes] = data
-        self.tree: List[List[bytes]] = []
+        self._allocate(len(data))
+        self._hash_leaves(data)
         self._build_tree()
 
+    @classmethod
+    def from_buffer(cls, buffer: Any, leaf_size: int) -> MerkleTree:
+        """
+        Commits to a contiguous buffer (bytes, bytearray, NumPy array...) cut
+        into leaves of `leaf_size` bytes. Leaves are hashed straight from
+        memoryview slices of the buffer, without building per-leaf bytes objects;
+        slices are created lazily, one chunk at a time.
+        """
+        view = memoryview(buffer).cast("B")
+        if leaf_size <= 0 or len(view) % leaf_size != 0:
+            raise ValueError(f"Buffer of {len(view)} bytes is not a whole number of {leaf_size}-byte leaves")
+        tree = cls.__new__(cls)
+        tree._allocate(len(view) // leaf_size)
+        tree._hash_leaves(view[i:i + leaf_size] for i in range(0, len(view), leaf_size))
+        tree._build_tree()
+        view.release()
+        return tree
+
+    @classmethod
+    def from_cap(cls, cap: bytes, num_leaves: int, subtrees: Dict[int, MerkleTree]) -> MerkleTree:
+        """
+        A tree known only through its cap (see cap) and the subtrees under some
+        of the cap's nodes: subtrees[s] is the tree of the s-th run of
+        capacity / cap size leaves. It can open any leaf of those subtrees.
+        """
+        tree = cls.__new__(cls)
+        tree._allocate(num_leaves, len(cap))
+        tree.nodes[:] = cap
+        tree.subtrees = subtrees
+        return tree
+
+    def _allocate(self, num_leaves: int, buffer_size: Optional[int] = None) -> None:
+        self.num_leaves: int = num_leaves
+        self.capacity: int = 1 << max(0, (self.num_leaves - 1).bit_length())
+        if buffer_size is None:
+            buffer_size = 2 * self.capacity * self.HASH_SIZE
+        self.nodes: bytearray = bytearray(buffer_size)
+        self.subtrees: Dict[int, MerkleTree] = {}
+
     def _hash(self, data: bytes) -> bytes:
         return hashlib.sha256(data).digest()
 
+    def _hash_leaves(self, data: Iterable[Any]) -> None:
+        """
+        Hashes the leaves into [capacity, capacity + num_leaves).
+        Digests are written in chunks: one slice assignment per CHUNK nodes
+        keeps the per-node overhead low without materializing a whole layer.
+        """
+        size = self.HASH_SIZE
+        sha256 = hashlib.sha256
+        chunk = self.CHUNK
+        offset = self.capacity * size
+        leaves = iter(data)
+        for _ in range(0, self.num_leaves, chunk):
+            block = b"".join([sha256(d).digest() for d in islice(leaves, chunk)])
+            self.nodes[offset:offset + len(block)] = block
+            offset += len(block)
+
     def _build_tree(self) -> None:
         """
-        Layer 0 are the leaves
+        Hashes every layer above the leaves, up to the root.
         """
-        current_layer: List[bytes] = [self._hash(d) for d in self.leaves]
-        self.tree = [current_layer]
-        
-        while len(current_layer) > 1:
-            next_layer: List[bytes] = []
-            for i in range(0, len(current_layer), 2):
-                left = current_layer[i]
-                # If odd number of nodes, duplicate the last one
-                right = current_layer[i+1] if i+1 < len(current_layer) else left
-                combined = self._hash(left + right)
-                next_layer.append(combined)
-            self.tree.append(next_layer)
-            current_layer = next_layer
+        size = self.HASH_SIZE
+        chunk = self.CHUNK
+        nodes = self.nodes
+        view = memoryview(nodes)
+        sha256 = hashlib.sha256
+
+        start, count = self.capacity, self.num_leaves
+        while start > 1:
+            # If odd number of nodes, duplicate the last one into its sibling slot
+            if count % 2 == 1:
+                last = (start + count - 1) * size
+                nodes[last + size:last + 2 * size] = view[last:last + size]
+                count += 1
+            start //= 2
+            count //= 2
+            # Children of node i are the 64 bytes at 2i * 32: hash that slice directly, no concatenation
+            for first in range(start, start + count, chunk):
+                stop = min(first + chunk, start + count)
+                nodes[first * size:stop * size] = b"".join([
+                    sha256(view[2 * i * size:(2 * i + 2) * size]).digest() for i in range(first, stop)
+                ])
+        view.release()
 
     @property
     def root(self) -> bytes:
-        if not self.tree:
+        if self.num_leaves == 0:
             return b''
-        return self.tree[-1][0]
+        return bytes(self.nodes[self.HASH_SIZE:2 * self.HASH_SIZE])
+
+    def cap(self, size: int) -> bytes:
+        """
+        The top of the tree, down to its level of `size` nodes (a power of two
+        up to capacity): nodes [1, 2 * size), a prefix of the buffer.
+        """
+        if size & (size - 1) or not 0 < size <= self.capacity:
+            raise ValueError(f"Cap of {size} nodes does not fit a tree of capacity {self.capacity}")
+        return bytes(self.nodes[:2 * size * self.HASH_SIZE])
+
+    def _node(self, node: int) -> bytes:
+        """Digest of a node; below the cap of a tree built by from_cap, read from its subtree."""
+        size = self.HASH_SIZE
+        cap_size = len(self.nodes) // (2 * size)
+        if node >= 2 * cap_size:
+            # node descends `depth` levels from cap node node >> depth
+            depth = node.bit_length() - cap_size.bit_length()
+            top = node >> depth
+            return self.subtrees[top - cap_size]._node((1 << depth) + node - (top << depth))
+        return bytes(self.nodes[node * size:(node + 1) * size])
 
     def get_authentication_path(self, index: int) -> List[bytes]:
         """
@@ -48,19 +145,70 @@ class MerkleTree:
         The path is a list of sibling hashes needed to reconstruct the root.
         """
         path: List[bytes] = []
-        for layer in self.tree[:-1]: # Don't need root's sibling (it has none)
-            is_right_child = (index % 2 == 1)
-            sibling_index = index - 1 if is_right_child else index + 1
-            
-            # Handle case where last node duplicates itself
-            if sibling_index >= len(layer):
-                sibling_index = index
-                
-            path.append(layer[sibling_index])
-            index //= 2
+        node = self.capacity + index
+        while node > 1: # Don't need root's sibling (it has none)
+            # A duplicated last node was copied into its sibling slot when building
+            path.append(self._node(node ^ 1))
+            node //= 2
             
         return path
 
+    def open_many(self, indices: Iterable[int]) -> List[bytes]:
+        """
+        Multi-proof for several leaves: the sibling hashes needed to rebuild
+        the root from all of them at once. A node that is itself on the path
+        of another opened leaf is never sent, so paths share their upper part.
+        Nodes are listed layer by layer, bottom-up, in increasing node order
+        (the order verify_many consumes them in).
+        """
+        proof: List[bytes] = []
+        known = sorted({self.capacity + i for i in indices})
+        while known and known[0] > 1:
+            known_set = set(known)
+            for node in known:
+                sibling = node ^ 1
+                if sibling not in known_set:
+                    proof.append(self._node(sibling))
+            known = sorted({node // 2 for node in known})
+        return proof
+
+    @staticmethod
+    def verify_many(root: bytes, leaves: Dict[int, bytes], proof: List[bytes], num_leaves: int) -> bool:
+        """
+        Verifies that every leaves[index] is at `index` in the tree with `root`
+        and `num_leaves` leaves, given the multi-proof from open_many.
+        Each leaf and each internal node on the union of paths is hashed once.
+        """
+        if not leaves or any(not 0 <= i < num_leaves for i in leaves):
+            return False
+        capacity = 1 << max(0, (num_leaves - 1).bit_length())
+        sha256 = hashlib.sha256
+        layer: Dict[int, bytes] = {capacity + i: sha256(leaf).digest() for i, leaf in leaves.items()}
+        siblings = iter(proof)
+
+        try:
+            while capacity > 1:
+                parents: Dict[int, bytes] = {}
+                for node in sorted(layer):
+                    if node // 2 in parents:
+                        continue # Already combined with its left sibling
+                    sibling = node ^ 1
+                    sibling_hash = layer[sibling] if sibling in layer else next(siblings)
+                    # Siblings may be memoryviews (see utils.binary_proof)
+                    if node % 2 == 0:
+                        parents[node // 2] = sha256(b"".join((layer[node], sibling_hash))).digest()
+                    else:
+                        parents[node // 2] = sha256(b"".join((sibling_hash, layer[node]))).digest()
+                layer = parents
+                capacity //= 2
+        except StopIteration:
+            return False # Proof too short
+
+        # Every supplied node must have been used
+        if next(siblings, None) is not None:
+            return False
+        return layer.get(1) == root
+
     @staticmethod
     def verify_claim(root: bytes, leaf_data: bytes, path: List[bytes], index: int) -> bool:
         """
@@ -84,8 +232,7 @@ class MerkleTree:
     def commit(data_elements: Iterable[Any]) -> MerkleTree:
         """
         Helper to quickly get a root from data.
+        One leaf per field element, in the canonical 4-byte encoding.
         """
-        # data_elements can be field elements, strings, etc.
-        # we need to serialize them to bytes first.
-        bytes_data = [str(d).encode() for d in data_elements]
-        return MerkleTree(bytes_data)
+        values = as_field_vector(data_elements)
+        return MerkleTree.from_buffer(encode_columns([values]), ELEMENT_SIZE)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from typing import List, Union
 from .field import FieldElement
+from .field_vector import FieldVector
 
 class Polynomial:
     def __init__(self, coefficients: List[Union[int, FieldElement]]) -> None:
@@ -33,6 +34,15 @@ class Polynomial:
             result = result * x + coef
         return result
 
+    def eval_vector(self, xs: FieldVector) -> FieldVector:
+        """
+        Evaluate P at every point of xs at once (vectorized Horner).
+        """
+        result = FieldVector.zeros(len(xs))
+        for coef in reversed(self.coefficients):
+            result = result * xs + coef
+        return result
+
     def __add__(self, other: Polynomial) -> Polynomial:
         max_len = max(len(self.coefficients), len(other.coefficients))
         new_coeffs: List[FieldElement] = [FieldElement(0)] * max_len
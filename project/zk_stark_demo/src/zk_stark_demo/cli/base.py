@@ -13,10 +13,17 @@ from typing import Any, TypeVar, Generic
 # Add src to path if running directly
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
+from zk_stark_demo.stark.channel import TRANSCRIPTS
 from zk_stark_demo.stark.prover import StarkProver
 from zk_stark_demo.stark.verifier import StarkVerifier
 from zk_stark_demo.stark.air import AIR
-from zk_stark_demo.utils.serialization import save_proof, load_proof
+from zk_stark_demo.stark.parameters import (
+    OBJECTIVES,
+    StarkParameters,
+    choose_parameters,
+    estimate,
+)
+from zk_stark_demo.utils.serialization import PROOF_FORMATS, save_proof, load_proof
 
 
 # Type variable for AIR subclasses
@@ -81,17 +88,32 @@ class BaseProverCLI(ABC, Generic[AIR_T]):
         """
         pass
 
-    def run(self) -> None:
-        """Run the prover CLI application."""
-        parser = argparse.ArgumentParser(description=self.description)
+    def add_base_arguments(self, parser: argparse.ArgumentParser) -> None:
+        """
+        Add the arguments every prover CLI shares: the output file, its format and the protocol parameters.
 
-        # Add common output argument
+        Args:
+            parser: The argparse.ArgumentParser to add arguments to.
+        """
         parser.add_argument(
             "--output",
             type=str,
             default=self.default_output,
             help="Output file for the proof",
         )
+        parser.add_argument(
+            "--format",
+            choices=PROOF_FORMATS,
+            default=None,
+            help="Proof file format (default: json for .json files, binary otherwise)",
+        )
+        add_parameter_arguments(parser)
+
+    def run(self) -> None:
+        """Run the prover CLI application."""
+        parser = argparse.ArgumentParser(description=self.description)
+
+        self.add_base_arguments(parser)
 
         # Add custom arguments
         self.add_arguments(parser)
@@ -107,18 +129,20 @@ class BaseProverCLI(ABC, Generic[AIR_T]):
         trace_time = time.perf_counter() - start_time
         print(f"AIR and trace creation took {trace_time:.3f}s")
 
+        parameters = parameters_from_args(args, air)
+
         # Generate proof
         print("Generating Proof...")
         start_time = time.perf_counter()
-        prover = StarkProver(air, trace_data)
+        prover = StarkProver(air, trace_data, parameters)
         proof = prover.prove()
         proof_time = time.perf_counter() - start_time
         print(f"Proof generation took {proof_time:.3f}s")
         print(f"Total proving time: {trace_time + proof_time:.3f}s")
 
         # Save proof
-        save_proof(proof, args.output)
-        print(f"Proof saved to {args.output}")
+        save_proof(proof, args.output, args.format)
+        print(f"Proof saved to {args.output} ({os.path.getsize(args.output)} bytes)")
 
 
 class BaseVerifierCLI(ABC, Generic[AIR_T]):
@@ -187,25 +211,52 @@ class BaseVerifierCLI(ABC, Generic[AIR_T]):
         """
         return "Verifying proof..."
 
-    def run(self) -> None:
-        """Run the verifier CLI application."""
-        parser = argparse.ArgumentParser(description=self.description)
+    def add_base_arguments(self, parser: argparse.ArgumentParser) -> None:
+        """
+        Add the arguments every verifier CLI shares: the proof file and the parameter policy.
 
-        # Add common proof file argument
+        Args:
+            parser: The argparse.ArgumentParser to add arguments to.
+        """
         parser.add_argument(
             "--proof",
             type=str,
             default=self.default_proof_file,
-            help="Path to proof.json",
+            help="Path to the binary proof file",
+        )
+        add_parameter_arguments(parser)
+        parser.add_argument(
+            "--accept-proof-parameters",
+            action="store_true",
+            help="Accept the parameters stored in the proof instead of the ones above",
+        )
+        parser.add_argument(
+            "--min-security-bits",
+            type=float,
+            default=None,
+            help="Reject proofs whose parameters give less conjectured security "
+            "(default with --accept-proof-parameters: that of the default parameters)",
         )
 
+    def run(self) -> None:
+        """Run the verifier CLI application."""
+        parser = argparse.ArgumentParser(description=self.description)
+
+        self.add_base_arguments(parser)
+
         # Add custom arguments
         self.add_arguments(parser)
 
         args = parser.parse_args()
 
-        # Load proof
-        proof = load_proof(args.proof)
+        # Load proof (binary proofs are decoded lazily, as verification reads them)
+        start_time = time.perf_counter()
+        try:
+            proof = load_proof(args.proof)
+        except ValueError as e:
+            print(f"❌ Cannot load proof: {e}")
+            sys.exit(1)
+        print(f"Proof loading took {time.perf_counter() - start_time:.3f}s")
 
         # Print verification message
         print(self.get_verification_message(args, proof))
@@ -216,11 +267,20 @@ class BaseVerifierCLI(ABC, Generic[AIR_T]):
         air_time = time.perf_counter() - start_time
         print(f"AIR creation took {air_time:.3f}s")
 
+        # Proofs must use the expected parameters, unless the proof's own are accepted
+        parameters = None if args.accept_proof_parameters else parameters_from_args(args, air)
+
         # Verify
         print("Verifying...")
         start_time = time.perf_counter()
-        verifier = StarkVerifier(air)
-        result = verifier.verify(proof)
+        verifier = StarkVerifier(
+            air, parameters, args.min_security_bits, accept_proof_parameters=args.accept_proof_parameters
+        )
+        try:
+            result = verifier.verify(proof)
+        except ValueError as e:
+            print(f"❌ Malformed proof: {e}")
+            sys.exit(1)
         verify_time = time.perf_counter() - start_time
         print(f"Verification took {verify_time:.3f}s")
         print(f"Total verification time: {air_time + verify_time:.3f}s")
@@ -248,3 +308,91 @@ def validate_power_of_two(value: int, name: str = "Length") -> None:
             f"Error: {name} {value} is not a power of 2. STARK protocol requires power-of-two trace length."
         )
         sys.exit(1)
+
+
+def add_parameter_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the protocol parameter flags shared by every prover and verifier CLI.
+
+    Args:
+        parser: The argparse.ArgumentParser to add arguments to.
+    """
+    defaults = StarkParameters()
+    group = parser.add_argument_group("protocol parameters")
+    group.add_argument("--blowup", type=int, default=defaults.blowup_factor, help="LDE blowup factor")
+    group.add_argument("--queries", type=int, default=defaults.num_queries, help="Number of queries")
+    group.add_argument("--fri-arity", type=int, default=defaults.fri_arity, help="FRI folding factor (2, 4, 8 or 16)")
+    group.add_argument(
+        "--remainder-length",
+        type=int,
+        default=defaults.max_remainder_length,
+        help="Stop folding FRI once a layer is at most this long",
+    )
+    group.add_argument(
+        "--remainder-degree",
+        type=int,
+        default=defaults.max_remainder_degree,
+        help="Stop folding FRI once the degree is at most this",
+    )
+    group.add_argument(
+        "--grinding-bits", type=int, default=defaults.grinding_bits, help="Proof-of-work bits before the queries"
+    )
+    group.add_argument(
+        "--transcript",
+        choices=TRANSCRIPTS,
+        default=next(name for name, kind in TRANSCRIPTS.items() if kind == defaults.transcript),
+        help="Fiat-Shamir transcript (sha256 is the one-hash-per-challenge compatibility mode)",
+    )
+    group.add_argument(
+        "--security-bits",
+        type=float,
+        default=None,
+        help="Choose the cheapest parameters reaching this security instead (ignores the flags above)",
+    )
+    group.add_argument(
+        "--optimize",
+        choices=OBJECTIVES,
+        default="proof_size",
+        help="What --security-bits minimizes",
+    )
+
+
+def parameters_from_args(args: argparse.Namespace, air: AIR) -> StarkParameters:
+    """
+    Build the protocol parameters from the flags and print their estimated cost.
+
+    Args:
+        args: Parsed command line arguments (see add_parameter_arguments).
+        air: The AIR to be proven or verified, whose shape the estimate depends on.
+
+    Returns:
+        The parameters to prove with, or the only ones a verifier accepts.
+
+    Raises:
+        SystemExit: If the parameters are invalid or the security target is unreachable.
+    """
+    shape = (air.trace_width(), air.trace_length(), max(air.transition_constraint_degrees(), default=1))
+    try:
+        if args.security_bits is not None:
+            parameters, cost = choose_parameters(*shape, args.security_bits, args.optimize)
+        else:
+            parameters = StarkParameters(
+                blowup_factor=args.blowup,
+                num_queries=args.queries,
+                fri_arity=args.fri_arity,
+                max_remainder_length=args.remainder_length,
+                max_remainder_degree=args.remainder_degree,
+                grinding_bits=args.grinding_bits,
+                transcript=TRANSCRIPTS[args.transcript],
+            )
+            cost = estimate(parameters, *shape)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"Parameters: {parameters}")
+    print(
+        f"Estimated security: {cost.security_bits:.1f} bits, "
+        f"proof size: {cost.proof_size / 1024:.1f} KiB"
+    )
+    return parameters
@@ -20,7 +20,7 @@ class CubicProverCLI(BaseProverCLI[CubicAIR]):
 
     @property
     def default_output(self) -> str:
-        return "proof_cubic.json"
+        return "proof_cubic.bin"
 
     def add_arguments(self, parser: argparse.ArgumentParser) -> None:
         parser.add_argument(
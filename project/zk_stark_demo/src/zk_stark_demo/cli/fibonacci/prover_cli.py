@@ -20,7 +20,7 @@ class FibonacciProverCLI(BaseProverCLI[FibonacciAIR]):
 
     @property
     def default_output(self) -> str:
-        return "proof.json"
+        return "proof.bin"
 
     def add_arguments(self, parser: argparse.ArgumentParser) -> None:
         parser.add_argument(
@@ -20,7 +20,7 @@ class FibonacciVerifierCLI(BaseVerifierCLI[FibonacciAIR]):
 
     @property
     def default_proof_file(self) -> str:
-        return "proof.json"
+        return "proof.bin"
 
     def add_arguments(self, parser: argparse.ArgumentParser) -> None:
         parser.add_argument(
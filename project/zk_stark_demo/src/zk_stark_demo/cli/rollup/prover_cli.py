@@ -14,13 +14,16 @@ from zk_stark_demo.air_examples.rollup import RollupAIR
 class RollupProverCLI(BaseProverCLI[RollupAIR]):
     """Prover CLI for High-Volume L2 Rollup computation."""
 
+    # AIR used to execute and prove the batch (see cli/rollup_onehot for a variant)
+    air_class: type[RollupAIR] = RollupAIR
+
     @property
     def description(self) -> str:
         return "zk-STARK Prover for High-Volume L2 Rollup"
 
     @property
     def default_output(self) -> str:
-        return "proof_rollup_large.json"
+        return "proof_rollup_large.bin"
 
     def add_arguments(self, parser: argparse.ArgumentParser) -> None:
         parser.add_argument(
@@ -81,7 +84,7 @@ class RollupProverCLI(BaseProverCLI[RollupAIR]):
         print("Executing Transactions off-chain...")
 
         # Execute "Off-chain" to get final state
-        temp_air = RollupAIR(length, num_users, users, [0] * num_users)
+        temp_air = self.air_class(length, num_users, users, [0] * num_users)
         trace_data = temp_air.generate_trace(txs)
 
         final_balances = []
@@ -93,7 +96,7 @@ class RollupProverCLI(BaseProverCLI[RollupAIR]):
         print(final_balances)
 
         # Setup Real AIR
-        real_air = RollupAIR(length, num_users, users, final_balances)
+        real_air = self.air_class(length, num_users, users, final_balances)
         return real_air, trace_data
 
 
@@ -13,13 +13,16 @@ from zk_stark_demo.air_examples.rollup import RollupAIR
 class RollupVerifierCLI(BaseVerifierCLI[RollupAIR]):
     """Verifier CLI for High-Volume L2 Rollup computation."""
 
+    # AIR the proof is checked against (see cli/rollup_onehot for a variant)
+    air_class: type[RollupAIR] = RollupAIR
+
     @property
     def description(self) -> str:
         return "zk-STARK Verifier for High-Volume L2 Rollup"
 
     @property
     def default_proof_file(self) -> str:
-        return "proof_rollup_large.json"
+        return "proof_rollup_large.bin"
 
     def add_arguments(self, parser: argparse.ArgumentParser) -> None:
         parser.add_argument(
@@ -42,7 +45,7 @@ class RollupVerifierCLI(BaseVerifierCLI[RollupAIR]):
         init_bal = inputs["initial_balances"]
         final_bal = inputs["final_balances"]
 
-        return RollupAIR(length, num_users, init_bal, final_bal)
+        return self.air_class(length, num_users, init_bal, final_bal)
 
     def get_verification_message(
         self, args: argparse.Namespace, proof: dict[str, Any]
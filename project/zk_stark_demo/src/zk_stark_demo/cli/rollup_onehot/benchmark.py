@@ -0,0 +1,103 @@
+"""
+Compares the two rollup AIR designs as the number of users grows:
+- RollupAIR: index columns + degree N-1 Lagrange selectors (constraint degree N)
+- OneHotRollupAIR: one-hot indicator columns (constraint degree 2)
+"""
+
+import argparse
+import random
+import sys
+import os
+import time
+
+# Add src to path if running directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
+
+from zk_stark_demo.air_examples.rollup import RollupAIR
+from zk_stark_demo.air_examples.rollup_onehot import OneHotRollupAIR
+from zk_stark_demo.stark.prover import StarkProver
+from zk_stark_demo.stark.verifier import StarkVerifier
+from zk_stark_demo.utils.binary_proof import encode_proof
+
+
+def make_batch(num_users: int, num_txs: int, seed: int) -> tuple[list[int], list[dict[str, int]]]:
+    """Random balances and transfers that never overdraw an account."""
+    rng = random.Random(seed)
+    users = [rng.randrange(500, 1500) for _ in range(num_users)]
+    balances = list(users)
+    txs = []
+    for _ in range(num_txs):
+        sender = rng.randrange(num_users)
+        receiver = rng.randrange(num_users)
+        amount = rng.randrange(0, balances[sender] // 4 + 1)
+        balances[sender] -= amount
+        balances[receiver] += amount
+        txs.append({"from": sender, "to": receiver, "amount": amount})
+    return users, txs
+
+
+def run_design(
+    air_class: type[RollupAIR], length: int, users: list[int], txs: list[dict[str, int]]
+) -> dict[str, float]:
+    num_users = len(users)
+    temp_air = air_class(length, num_users, users, [0] * num_users)
+    trace_data = temp_air.generate_trace(txs)
+    final_balances = [v.val for v in trace_data[-1][:num_users]]
+    air = air_class(length, num_users, users, final_balances)
+
+    start_time = time.perf_counter()
+    proof = StarkProver(air, trace_data).prove()
+    prove_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    ok = StarkVerifier(air).verify(proof)
+    verify_time = time.perf_counter() - start_time
+    if not ok:
+        raise RuntimeError(f"{air_class.__name__} proof for N={num_users} did not verify")
+
+    return {
+        "degree": air.constraint_degree(),
+        "width": air.trace_width(),
+        "prove": prove_time,
+        "verify": verify_time,
+        "size": len(encode_proof(proof)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark RollupAIR vs OneHotRollupAIR")
+    parser.add_argument(
+        "--users",
+        type=int,
+        nargs="+",
+        default=[2, 4, 8, 16, 32],
+        help="Numbers of users to benchmark",
+    )
+    parser.add_argument(
+        "--transactions",
+        type=int,
+        default=31,
+        help="Transactions per batch (trace length is the next power of 2 above it)",
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the random batches")
+    args = parser.parse_args()
+
+    target = args.transactions + 1
+    length = 1 << (target - 1).bit_length()
+    print(f"Trace length: {length} ({args.transactions} transactions)")
+
+    header = f"{'N':>4} | {'design':<8} | {'width':>5} | {'degree':>6} | {'prove (s)':>9} | {'verify (s)':>10} | {'proof (KB)':>10}"
+    print(header)
+    print("-" * len(header))
+    for num_users in args.users:
+        users, txs = make_batch(num_users, args.transactions, args.seed)
+        for name, air_class in (("index", RollupAIR), ("one-hot", OneHotRollupAIR)):
+            r = run_design(air_class, length, users, txs)
+            print(
+                f"{num_users:>4} | {name:<8} | {r['width']:>5} | {r['degree']:>6} | "
+                f"{r['prove']:>9.3f} | {r['verify']:>10.3f} | {r['size'] / 1024:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
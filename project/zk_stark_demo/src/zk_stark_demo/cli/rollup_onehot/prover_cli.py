@@ -0,0 +1,31 @@
+import sys
+import os
+
+# Add src to path if running directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
+
+from zk_stark_demo.cli.rollup.prover_cli import RollupProverCLI
+from zk_stark_demo.air_examples.rollup_onehot import OneHotRollupAIR
+
+
+class OneHotRollupProverCLI(RollupProverCLI):
+    """Prover CLI for the L2 Rollup with one-hot sender/receiver columns (degree 2 constraints)."""
+
+    air_class = OneHotRollupAIR
+
+    @property
+    def description(self) -> str:
+        return "zk-STARK Prover for High-Volume L2 Rollup (one-hot selectors)"
+
+    @property
+    def default_output(self) -> str:
+        return "proof_rollup_onehot.bin"
+
+
+def main() -> None:
+    cli = OneHotRollupProverCLI()
+    cli.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+uv run prover_cli.py --db ../rollup/mock_db.json
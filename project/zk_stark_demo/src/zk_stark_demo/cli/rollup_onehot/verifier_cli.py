@@ -0,0 +1,31 @@
+import sys
+import os
+
+# Add src to path if running directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../")))
+
+from zk_stark_demo.cli.rollup.verifier_cli import RollupVerifierCLI
+from zk_stark_demo.air_examples.rollup_onehot import OneHotRollupAIR
+
+
+class OneHotRollupVerifierCLI(RollupVerifierCLI):
+    """Verifier CLI for the L2 Rollup with one-hot sender/receiver columns."""
+
+    air_class = OneHotRollupAIR
+
+    @property
+    def description(self) -> str:
+        return "zk-STARK Verifier for High-Volume L2 Rollup (one-hot selectors)"
+
+    @property
+    def default_proof_file(self) -> str:
+        return "proof_rollup_onehot.bin"
+
+
+def main() -> None:
+    cli = OneHotRollupVerifierCLI()
+    cli.run()
+
+
+if __name__ == "__main__":
+    main()
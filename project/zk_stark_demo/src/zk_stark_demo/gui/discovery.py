@@ -49,9 +49,17 @@ def _load_cli_class(implementation: str, cli_type: str) -> Optional[Type]:
         
         base_class = BaseProverCLI if cli_type == "prover" else BaseVerifierCLI
         
-        for name, obj in inspect.getmembers(module):
-            if inspect.isclass(obj) and issubclass(obj, base_class) and obj is not base_class:
+        # Prefer the class defined in the module itself: a CLI may import and
+        # extend another implementation's CLI (e.g. rollup_onehot from rollup)
+        candidates = [
+            obj for name, obj in inspect.getmembers(module)
+            if inspect.isclass(obj) and issubclass(obj, base_class) and obj is not base_class
+        ]
+        for obj in candidates:
+            if obj.__module__ == module.__name__:
                 return obj
+        if candidates:
+            return candidates[0]
     except ImportError:
         pass
     return None
@@ -76,14 +84,8 @@ def get_schema(implementation: str, cli_type: str) -> Dict[str, Any]:
 
     parser = argparse.ArgumentParser()
     
-    # Add base arguments manually to match run() method behavior if needed,
-    # or just trust add_arguments.
-    # Base run() adds --output or --proof. We should capture those too.
-    if cli_type == "prover":
-        parser.add_argument("--output", default=instance.default_output, help="Output file")
-    else:
-        parser.add_argument("--proof", default=instance.default_proof_file, help="Proof file")
-        
+    # Same arguments as run(): the shared base ones, then the implementation's own
+    instance.add_base_arguments(parser)
     instance.add_arguments(parser)
     
     args = []
@@ -97,6 +99,7 @@ def get_schema(implementation: str, cli_type: str) -> Dict[str, Any]:
             "help": action.help,
             "default": action.default,
             "type": None,
+            "choices": list(action.choices) if action.choices else None,
             "required": action.required
         }
         
@@ -104,7 +107,8 @@ def get_schema(implementation: str, cli_type: str) -> Dict[str, Any]:
         if action.type:
             if action.type == int:
                 arg_info["type"] = "number"
-            elif action.type == str:
+            elif action.type in (str, float):
+                # Floats stay text: the web app parses number inputs as integers
                 arg_info["type"] = "text"
             # Add more types if needed
         elif action.nargs == 0: # Boolean flag
@@ -87,14 +87,15 @@ def run_cli():
     module_name = f"zk_stark_demo.cli.{implementation}.{cli_type}_cli"
     command = [sys.executable, "-m", module_name]
     
-    # Add args
+    # Add args (keys are argparse dests: fri_arity is --fri-arity)
     for key, value in args.items():
+        flag = f"--{key.replace('_', '-')}"
         if value is True: # Flag
-             command.append(f"--{key}")
+             command.append(flag)
         elif value is False or value is None:
              continue
         else:
-             command.append(f"--{key}")
+             command.append(flag)
              command.append(str(value))
              
     log_prefix = f"[{implementation.capitalize()}-{cli_type.capitalize()}]"
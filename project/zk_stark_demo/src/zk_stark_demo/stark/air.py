@@ -1,7 +1,9 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Any, Optional
 from ..algebra.field import FieldElement
+from ..algebra.field_vector import FieldVector
+from .expressions import ConstraintSystem, Expr
 
 class AIR(ABC):
     """
@@ -21,6 +23,18 @@ class AIR(ABC):
         """
         return 1
 
+    def transition_constraint_degrees(self) -> List[int]:
+        """
+        Returns the algebraic degree of each transition constraint, in the order
+        of evaluate_transition_constraints. The prover and verifier lift every
+        constraint to the maximum degree with its own random multiplier, so a
+        few high-degree constraints do not dictate how the others are combined.
+        Default: constraint_degree() for every constraint.
+        """
+        dummy_step: List[FieldElement] = [FieldElement(0)] * self.trace_width()
+        num_constraints = len(self.evaluate_transition_constraints(dummy_step, dummy_step))
+        return [self.constraint_degree()] * num_constraints
+
         
     @abstractmethod
     def trace_length(self) -> int:
@@ -46,6 +60,20 @@ class AIR(ABC):
         """
         pass
 
+    def evaluate_transition_constraints_batch(
+        self,
+        current_cols: List[FieldVector],
+        next_cols: List[FieldVector]
+    ) -> Optional[List[FieldVector]]:
+        """
+        Optional vectorized form of evaluate_transition_constraints over whole coset columns.
+        current_cols[c][i] is register c at evaluation point i, next_cols[c][i] the same register
+        one trace step later (the column rotated by coset size / N).
+        Returns one FieldVector per constraint, or None if the AIR only implements
+        the row-wise method (the prover then falls back to it).
+        """
+        return None
+
     def get_public_inputs(self) -> Dict[str, Any]:
         """
         Returns a dictionary of public inputs defining the computation instance.
@@ -53,3 +81,50 @@ class AIR(ABC):
         """
         return {}
 
+
+class SymbolicAIR(AIR):
+    """
+    An AIR whose transition constraints are written once, as expressions
+    (see stark.expressions), instead of as hand-written evaluation code.
+
+    The expressions are compiled on first use into a scalar evaluator
+    (verifier queries) and a vectorized one (prover LDE pass), and the
+    constraint degrees are derived from them instead of being declared.
+    """
+
+    @abstractmethod
+    def transition_constraints(self) -> List[Expr]:
+        """
+        Returns the transition constraints as expressions over col(i) / next_col(i).
+        Each must evaluate to zero on every valid pair of consecutive rows.
+        """
+        pass
+
+    @property
+    def constraint_system(self) -> ConstraintSystem:
+        system = getattr(self, "_constraint_system", None)
+        if system is None:
+            system = ConstraintSystem(self.transition_constraints())
+            self._constraint_system = system
+        return system
+
+    def constraint_degree(self) -> int:
+        return self.constraint_system.max_degree
+
+    def transition_constraint_degrees(self) -> List[int]:
+        # Constant constraints (degree 0) are combined like linear ones
+        return [max(1, d) for d in self.constraint_system.degrees]
+
+    def evaluate_transition_constraints(
+        self,
+        current_step: List[FieldElement],
+        next_step: List[FieldElement]
+    ) -> List[FieldElement]:
+        return self.constraint_system.evaluate(current_step, next_step)
+
+    def evaluate_transition_constraints_batch(
+        self,
+        current_cols: List[FieldVector],
+        next_cols: List[FieldVector]
+    ) -> List[FieldVector]:
+        return self.constraint_system.evaluate_batch(current_cols, next_cols)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+from ..algebra.field import FieldElement
+from ..algebra.field_vector import FieldVector, as_field_vector, batch_inverse
+from ..algebra.polynomial import Polynomial
+
+
+class BoundaryGroup:
+    """
+    Registers that are pinned at exactly the same set of steps.
+    They share one zerofier Z(x) = prod_{s in steps} (x - g^s).
+    """
+
+    def __init__(self, steps: Tuple[int, ...], g: FieldElement, zerofier: Optional[Polynomial] = None) -> None:
+        self.steps: Tuple[int, ...] = steps
+        self.points: List[FieldElement] = [g.pow(step) for step in steps]
+        if zerofier is None:
+            zerofier = Polynomial([FieldElement(1)])
+            for point in self.points:
+                zerofier = zerofier * Polynomial([-point, FieldElement(1)])
+        self.zerofier: Polynomial = zerofier
+        self.registers: List[int] = []
+        # I_r(x): the lowest degree polynomial with I_r(g^s) = value of register r at step s
+        self.interpolants: List[Polynomial] = []
+
+    def add_register(self, register: int, values: Dict[int, FieldElement]) -> None:
+        self.registers.append(register)
+        self.interpolants.append(
+            Polynomial.lagrange_interpolate(self.points, [values[step] for step in self.steps])
+        )
+
+    def combined_interpolant(self, betas: List[FieldElement]) -> Polynomial:
+        """sum_r beta_r * I_r(x), one polynomial for the whole group."""
+        combined = Polynomial([FieldElement(0)])
+        for beta, interpolant in zip(betas, self.interpolants):
+            combined = combined + interpolant * beta
+        return combined
+
+
+class BoundaryConstraints:
+    """
+    AIR boundary constraints grouped by register and by step.
+
+    For each constrained register r the quotient is (T_r(x) - I_r(x)) / Z_r(x),
+    where I_r interpolates the pinned values and Z_r vanishes on the pinned steps.
+    Registers with the same step set share Z, so a random combination of them
+    costs a single division:
+        sum_r beta_r (T_r - I_r) / Z = (sum_r beta_r T_r - sum_r beta_r I_r) / Z
+    and the cost per point is O(distinct step sets) instead of O(constraints).
+    """
+
+    def __init__(
+        self,
+        constraints: List[Tuple[int, int, FieldElement]],
+        trace_length: int,
+        zerofiers: Optional[Dict[Tuple[int, ...], Polynomial]] = None,
+    ) -> None:
+        """zerofiers: Z of each step set, reused instead of recomputed if given (see keys.py)."""
+        g = FieldElement.generator_of_order(trace_length)
+        zerofiers = zerofiers or {}
+
+        pinned: Dict[int, Dict[int, FieldElement]] = {}
+        for step, reg, val in constraints:
+            values = pinned.setdefault(reg, {})
+            if step in values and values[step] != val:
+                raise ValueError(f"Conflicting boundary constraints for register {reg} at step {step}")
+            values[step] = FieldElement(val)
+
+        groups: Dict[Tuple[int, ...], BoundaryGroup] = {}
+        for reg in sorted(pinned):
+            steps = tuple(sorted(pinned[reg]))
+            if steps not in groups:
+                groups[steps] = BoundaryGroup(steps, g, zerofiers.get(steps))
+            groups[steps].add_register(reg, pinned[reg])
+
+        self.groups: List[BoundaryGroup] = list(groups.values())
+        # One random coefficient per constrained register, in this order
+        self.registers: List[int] = [reg for group in self.groups for reg in group.registers]
+
+    @property
+    def num_registers(self) -> int:
+        return len(self.registers)
+
+    @property
+    def layout(self) -> List[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+        """(steps, registers) of every group: what the constraints pin, without the values."""
+        return [(group.steps, tuple(group.registers)) for group in self.groups]
+
+    def zerofiers(self) -> Dict[Tuple[int, ...], Polynomial]:
+        return {group.steps: group.zerofier for group in self.groups}
+
+    def zerofier_inverses(self, domain: FieldVector) -> np.ndarray:
+        """1 / Z(x) of every group (rows) at every point of `domain` (columns), from one batch inversion."""
+        zerofiers = [group.zerofier.eval_vector(domain).data for group in self.groups]
+        if not zerofiers:
+            return np.empty((0, len(domain)), dtype=np.uint64)
+        return batch_inverse(FieldVector(np.concatenate(zerofiers))).data.reshape(len(self.groups), len(domain))
+
+    def _group_betas(self, betas: List[FieldElement]) -> List[List[FieldElement]]:
+        assert len(betas) == self.num_registers
+        split: List[List[FieldElement]] = []
+        offset = 0
+        for group in self.groups:
+            split.append(betas[offset:offset + len(group.registers)])
+            offset += len(group.registers)
+        return split
+
+    def evaluate_over_domain(
+        self,
+        columns: List[FieldVector],
+        domain: FieldVector,
+        betas: List[FieldElement],
+        inverses: Optional[np.ndarray] = None,
+    ) -> FieldVector:
+        """
+        sum_r beta_r * (T_r(x) - I_r(x)) / Z_r(x) at every point of `domain`.
+        columns[r] holds T_r evaluated on the same domain.
+        inverses: zerofier_inverses(domain), if already known.
+        """
+        result = FieldVector.zeros(len(domain))
+        if not self.groups:
+            return result
+
+        if inverses is None:
+            inverses = self.zerofier_inverses(domain)
+
+        for group, group_betas, z_inv in zip(self.groups, self._group_betas(betas), inverses):
+            numerator = FieldVector.zeros(len(domain))
+            for reg, beta in zip(group.registers, group_betas):
+                numerator = numerator + columns[reg] * beta
+            numerator = numerator - group.combined_interpolant(group_betas).eval_vector(domain)
+            result = result + numerator * FieldVector(z_inv)
+        return result
+
+    def evaluate_at(
+        self,
+        rows: List[List[FieldElement]],
+        xs: Union[List[FieldElement], FieldVector],
+        betas: List[FieldElement],
+    ) -> FieldVector:
+        """
+        Same combination at a few points (verifier queries): rows[i] is the
+        trace row opened at xs[i]. The rows are transposed into columns so the
+        queries share the vectorized path.
+        """
+        width = max(self.registers, default=-1) + 1
+        columns = [FieldVector([row[reg] for row in rows]) for reg in range(width)]
+        return self.evaluate_over_domain(columns, as_field_vector(xs), betas)
@@ -1,7 +1,14 @@
 from __future__ import annotations
 import hashlib
+from typing import List
+import numpy as np
 from ..algebra.field import FieldElement
 
+# Transcript kinds, stored in StarkParameters.transcript
+TRANSCRIPT_SHA256 = 0  # Channel: one SHA-256 per challenge (compatibility mode)
+TRANSCRIPT_SHAKE256 = 1  # Transcript: batched challenges squeezed from SHAKE-256
+TRANSCRIPTS = {"sha256": TRANSCRIPT_SHA256, "shake256": TRANSCRIPT_SHAKE256}
+
 
 class Channel:
     """
@@ -53,3 +60,82 @@ class Channel:
         # Uniformity might be slightly biased but fine for demo
         range_size = max_val - min_val
         return min_val + (rand_fe.val % range_size)
+
+    def receive_random_field_elements(self, count: int) -> List[FieldElement]:
+        """`count` challenges, drawn one after the other."""
+        return [self.receive_random_field_element() for _ in range(count)]
+
+    def receive_query_indices(self, count: int, domain_size: int) -> List[int]:
+        """`count` query indices in [0, domain_size), in draw order (an index may repeat)."""
+        return [self.receive_random_int(0, domain_size) for _ in range(count)]
+
+
+class Transcript(Channel):
+    """
+    Fiat-Shamir transcript on SHAKE-256.
+
+    Every message is absorbed with its length, so concatenations cannot
+    collide. Challenges are squeezed in batches: one XOF call yields all the
+    alphas, betas or query indices drawn at the same point of the protocol.
+    32-bit words of the stream are rejection sampled below the bound, which
+    makes field elements and indices uniform, and query indices are
+    returned as a sorted set of distinct positions.
+    """
+
+    ABSORB = b"\x00"
+    SQUEEZE = b"\x01"
+
+    def send(self, data: bytes) -> None:
+        """state = shake256(ABSORB || state || len(data) || data)"""
+        message = self.ABSORB + self.state + len(data).to_bytes(8, "little") + data
+        self.state = hashlib.shake_256(message).digest(32)
+
+    def _sample(self, count: int, bound: int, distinct: bool = False) -> np.ndarray:
+        """
+        `count` uniform integers in [0, bound < 2^32) from shake256(SQUEEZE || state):
+        its first 32 bytes become the next state, the rest is read as little-endian
+        words, masked to the bit length of bound - 1, and kept if below the bound
+        (and not seen before, if `distinct`). The stream is only lengthened if too
+        few words are kept, so the result does not depend on the first guess.
+        """
+        seed = hashlib.shake_256(self.SQUEEZE + self.state)
+        mask = (1 << (bound - 1).bit_length()) - 1
+        num_words = count + count // 2 + 8
+        while True:
+            words = np.frombuffer(seed.digest(32 + 4 * num_words)[32:], dtype="<u4") & mask
+            words = words[words < bound]
+            if distinct:
+                _, first = np.unique(words, return_index=True)
+                words = words[np.sort(first)]
+            if len(words) >= count:
+                break
+            num_words *= 2
+        self.state = seed.digest(32)
+        return words[:count]
+
+    def receive_random_field_element(self) -> FieldElement:
+        return self.receive_random_field_elements(1)[0]
+
+    def receive_random_field_elements(self, count: int) -> List[FieldElement]:
+        """`count` uniform challenges from a single squeeze."""
+        return [FieldElement(int(v)) for v in self._sample(count, FieldElement.P)]
+
+    def receive_random_int(self, min_val: int, max_val: int) -> int:
+        """Uniform integer in [min_val, max_val)."""
+        return min_val + int(self._sample(1, max_val - min_val)[0])
+
+    def receive_query_indices(self, count: int, domain_size: int) -> List[int]:
+        """
+        Sorted distinct query indices in [0, domain_size) from a single squeeze:
+        `count` of them, or the whole domain if it has no more points.
+        """
+        return sorted(int(i) for i in self._sample(min(count, domain_size), domain_size, distinct=True))
+
+
+def new_channel(transcript: int) -> Channel:
+    """The transcript of the given kind (one of TRANSCRIPTS), initially empty."""
+    if transcript == TRANSCRIPT_SHA256:
+        return Channel()
+    if transcript == TRANSCRIPT_SHAKE256:
+        return Transcript()
+    raise ValueError(f"Unknown transcript {transcript}, expected one of {sorted(TRANSCRIPTS.values())}")
@@ -0,0 +1,57 @@
+from __future__ import annotations
+from typing import List, TypeVar
+from ..algebra.field import FieldElement
+from ..algebra.field_vector import FieldVector
+
+# A single point, or many points at once
+Point = TypeVar("Point", FieldElement, FieldVector)
+
+
+class CompositionSegments:
+    """
+    Splits the composition polynomial Q(x) into segments of degree < N:
+
+        Q(x) = Q_0(x) + x^N * Q_1(x) + x^{2N} * Q_2(x) + ...
+
+    With constraints of degree d, the transition quotient C(T(x)) / Z(x) has
+    degree (d-1) * (N-1) and the boundary quotients have degree < N, so
+    max(1, d-1) segments are enough. Every segment is as cheap to extend,
+    commit and test with FRI as a trace column, so the LDE blowup stays fixed.
+    """
+
+    def __init__(self, trace_length: int, constraint_degree: int) -> None:
+        # constraint_degree: maximum over all transition constraints
+        self.trace_length: int = trace_length
+        self.count: int = max(1, constraint_degree - 1)
+
+    def evaluation_length(self, lde_length: int) -> int:
+        """
+        Size of the coset Q is evaluated (then interpolated) on: a power of two
+        holding all count * N coefficients, and at least the LDE itself.
+        """
+        length = self.trace_length
+        while length < self.count * self.trace_length:
+            length *= 2
+        return max(length, lde_length)
+
+    def degree_adjustments(self, degrees: List[int]) -> List[int]:
+        """
+        Exponent e_k lifting constraint k to the full degree bound of Q.
+        The quotient C_k(T(x)) / Z(x) of a degree d_k constraint has degree
+        (d_k - 1) * (N - 1), so x^{e_k} * C_k / Z has degree count * N - 1.
+        """
+        bound = self.count * self.trace_length - 1
+        return [bound - (d - 1) * (self.trace_length - 1) for d in degrees]
+
+    def split(self, coefficients: FieldVector) -> List[FieldVector]:
+        """Cuts the coefficients of Q into `count` consecutive blocks of N."""
+        n = self.trace_length
+        return [coefficients[j * n:(j + 1) * n].resize(n) for j in range(self.count)]
+
+    def combine(self, values: List[Point], x: Point) -> Point:
+        """Q(x) from the segment values Q_j(x), by Horner's rule in x^N."""
+        x_n = x.pow(self.trace_length)
+        result = values[-1]
+        for value in reversed(values[:-1]):
+            result = result * x_n + value
+        return result
@@ -0,0 +1,234 @@
+from __future__ import annotations
+import weakref
+from typing import Any, Callable, Dict, List, Tuple, Union
+import numpy as np
+from ..algebra.field import FieldElement
+from ..algebra.field_vector import FieldVector
+
+
+class Expr:
+    """
+    A node of a symbolic transition constraint over the trace.
+
+    Leaves are trace column references (current or next row) and constants;
+    inner nodes are +, -, *, unary minus and pow by a constant exponent.
+    Nodes are hash-consed: building the same subexpression twice returns the
+    same node, so a compiled ConstraintSystem evaluates it only once.
+    """
+
+    # Interning table: (op, args) -> node. Weak, so unused nodes can be collected.
+    _interned: "weakref.WeakValueDictionary[Tuple[Any, ...], Expr]" = weakref.WeakValueDictionary()
+
+    __slots__ = ("op", "args", "degree", "__weakref__")
+
+    def __new__(cls, op: str, args: Tuple[Any, ...], degree: int) -> Expr:
+        key = (op, args)
+        node = cls._interned.get(key)
+        if node is None:
+            node = super().__new__(cls)
+            node.op = op
+            node.args = args
+            node.degree = degree
+            cls._interned[key] = node
+        return node
+
+    def __init__(self, op: str, args: Tuple[Any, ...], degree: int) -> None:
+        # All fields are set once in __new__
+        pass
+
+    # --- Builders ---
+
+    @staticmethod
+    def lift(value: Union[Expr, FieldElement, int]) -> Expr:
+        if isinstance(value, Expr):
+            return value
+        return const(value)
+
+    def _binary(self, op: str, other: Union[Expr, FieldElement, int], swap: bool = False) -> Expr:
+        if not isinstance(other, (Expr, FieldElement, int)):
+            return NotImplemented
+        left, right = (Expr.lift(other), self) if swap else (self, Expr.lift(other))
+
+        # Constant folding keeps constant-only subtrees out of the compiled program
+        if left.op == "const" and right.op == "const":
+            a, b = FieldElement(left.args[0]), FieldElement(right.args[0])
+            return const({"add": a + b, "sub": a - b, "mul": a * b}[op])
+        if op == "mul":
+            for one, other_side in ((left, right), (right, left)):
+                if one.op == "const" and one.args[0] == 1:
+                    return other_side
+            return Expr(op, (left, right), left.degree + right.degree)
+        return Expr(op, (left, right), max(left.degree, right.degree))
+
+    def __add__(self, other: Union[Expr, FieldElement, int]) -> Expr:
+        return self._binary("add", other)
+
+    def __radd__(self, other: Union[Expr, FieldElement, int]) -> Expr:
+        return self._binary("add", other, swap=True)
+
+    def __sub__(self, other: Union[Expr, FieldElement, int]) -> Expr:
+        return self._binary("sub", other)
+
+    def __rsub__(self, other: Union[Expr, FieldElement, int]) -> Expr:
+        return self._binary("sub", other, swap=True)
+
+    def __mul__(self, other: Union[Expr, FieldElement, int]) -> Expr:
+        return self._binary("mul", other)
+
+    def __rmul__(self, other: Union[Expr, FieldElement, int]) -> Expr:
+        return self._binary("mul", other, swap=True)
+
+    def __neg__(self) -> Expr:
+        if self.op == "const":
+            return const(-FieldElement(self.args[0]))
+        return Expr("neg", (self,), self.degree)
+
+    def pow(self, exponent: int) -> Expr:
+        if exponent < 0:
+            raise ValueError("Constraint expressions only support non-negative exponents")
+        if exponent == 0:
+            return const(1)
+        if exponent == 1:
+            return self
+        if self.op == "const":
+            return const(FieldElement(self.args[0]).pow(exponent))
+        return Expr("pow", (self, exponent), self.degree * exponent)
+
+    def __pow__(self, exponent: int) -> Expr:
+        return self.pow(exponent)
+
+    def __repr__(self) -> str:
+        if self.op == "col":
+            index, offset = self.args
+            return f"col({index})" if offset == 0 else f"next_col({index})"
+        if self.op == "const":
+            return str(self.args[0])
+        if self.op == "neg":
+            return f"-({self.args[0]!r})"
+        if self.op == "pow":
+            return f"({self.args[0]!r})^{self.args[1]}"
+        symbol = {"add": "+", "sub": "-", "mul": "*"}[self.op]
+        return f"({self.args[0]!r} {symbol} {self.args[1]!r})"
+
+
+def col(index: int, offset: int = 0) -> Expr:
+    """Trace register `index` on the current row (offset 0) or the next row (offset 1)."""
+    if offset not in (0, 1):
+        raise ValueError("Only current (0) and next (1) row offsets are supported")
+    return Expr("col", (index, offset), 1)
+
+
+def next_col(index: int) -> Expr:
+    return col(index, 1)
+
+
+def const(value: Union[FieldElement, int]) -> Expr:
+    return Expr("const", (FieldElement(value).val,), 0)
+
+
+def _vector_pow(base: np.ndarray, exponent: int) -> np.ndarray:
+    return FieldVector(base).pow(exponent).data
+
+
+class ConstraintSystem:
+    """
+    A list of transition constraints compiled into two evaluators:
+    - a scalar one over plain ints, for the verifier's per-query checks;
+    - a vectorized one over whole LDE columns, for the prover.
+
+    Both run the same straight-line program: every distinct node of every
+    constraint becomes one statement, in dependency order, so shared terms
+    are computed once per row (common-subexpression elimination).
+    """
+
+    def __init__(self, constraints: List[Expr]) -> None:
+        self.constraints: List[Expr] = [Expr.lift(c) for c in constraints]
+        # Exact algebraic degree of each constraint in the trace variables
+        self.degrees: List[int] = [c.degree for c in self.constraints]
+        self.source: str = self._generate_source()
+
+        code = compile(self.source, "<constraint-system>", "exec")
+        scalar_ns: Dict[str, Any] = {"P": FieldElement.P, "_pow": lambda b, e: pow(b, e, FieldElement.P)}
+        vector_ns: Dict[str, Any] = {"P": np.uint64(FieldElement.P), "_pow": _vector_pow}
+        exec(code, scalar_ns)
+        exec(code, vector_ns)
+        self._scalar: Callable[[List[int], List[int]], List[int]] = scalar_ns["_evaluate"]
+        self._vector: Callable[[List[np.ndarray], List[np.ndarray]], List[Any]] = vector_ns["_evaluate"]
+
+    def __len__(self) -> int:
+        return len(self.constraints)
+
+    @property
+    def max_degree(self) -> int:
+        return max([1] + self.degrees)
+
+    def _generate_source(self) -> str:
+        # Topological order of the distinct nodes
+        order: List[Expr] = []
+        slots: Dict[int, int] = {}
+
+        def visit(node: Expr) -> None:
+            stack = [(node, False)]
+            while stack:
+                current, expanded = stack.pop()
+                if id(current) in slots:
+                    continue
+                children = [a for a in current.args if isinstance(a, Expr)]
+                if expanded or not children:
+                    slots[id(current)] = len(order)
+                    order.append(current)
+                else:
+                    stack.append((current, True))
+                    stack.extend((child, False) for child in reversed(children) if id(child) not in slots)
+
+        for constraint in self.constraints:
+            visit(constraint)
+
+        outputs = {slots[id(c)] for c in self.constraints}
+        last_use: Dict[int, int] = {}
+        for i, node in enumerate(order):
+            for arg in node.args:
+                if isinstance(arg, Expr):
+                    last_use[slots[id(arg)]] = i
+
+        lines = ["def _evaluate(cur, nxt):"]
+        for i, node in enumerate(order):
+            args = [f"t{slots[id(a)]}" if isinstance(a, Expr) else repr(a) for a in node.args]
+            if node.op == "col":
+                index, offset = node.args
+                expr = f"{'nxt' if offset else 'cur'}[{index}]"
+            elif node.op == "const":
+                expr = repr(node.args[0])
+            elif node.op == "add":
+                expr = f"({args[0]} + {args[1]}) % P"
+            elif node.op == "sub":
+                expr = f"({args[0]} + (P - {args[1]})) % P"
+            elif node.op == "mul":
+                expr = f"({args[0]} * {args[1]}) % P"
+            elif node.op == "neg":
+                expr = f"(P - {args[0]}) % P"
+            else:
+                expr = f"_pow({args[0]}, {args[1]})"
+            lines.append(f"    t{i} = {expr}")
+            # Drop temporaries after their last use to bound the prover's working set
+            dead = [j for j, last in last_use.items() if last == i and j not in outputs]
+            if dead:
+                lines.append("    del " + ", ".join(f"t{j}" for j in sorted(dead)))
+        lines.append("    return [" + ", ".join(f"t{slots[id(c)]}" for c in self.constraints) + "]")
+        return "\n".join(lines) + "\n"
+
+    def evaluate(self, current_step: List[FieldElement], next_step: List[FieldElement]) -> List[FieldElement]:
+        """Scalar evaluation on one pair of rows."""
+        results = self._scalar([v.val for v in current_step], [v.val for v in next_step])
+        return [FieldElement(r) for r in results]
+
+    def evaluate_batch(self, current_cols: List[FieldVector], next_cols: List[FieldVector]) -> List[FieldVector]:
+        """Vectorized evaluation on whole columns."""
+        length = len(current_cols[0])
+        results = self._vector([c.data for c in current_cols], [c.data for c in next_cols])
+        # Constant constraints come back as scalars; broadcast them to full columns
+        return [
+            FieldVector(r) if isinstance(r, np.ndarray) and r.shape == (length,)
+            else FieldVector.full(length, int(r))
+            for r in results
+        ]
@@ -1,16 +1,167 @@
 from __future__ import annotations
-from typing import List, Tuple, Dict, Any
+import math
+from functools import lru_cache
+from typing import List, Tuple, Dict, Any, Optional, Union
+import numpy as np
 from ..algebra.field import FieldElement
+from ..algebra.field_vector import FieldVector
 from ..algebra.polynomial import Polynomial
 from ..algebra.merkle import MerkleTree
+from ..algebra.encoding import ELEMENT_SIZE, encode_columns, encode_elements
+from ..algebra.fft import bit_reverse, bit_reverse_permutation, coset_ifft, fft_blocks, reverse_bits, reverse_bits_array
 from .channel import Channel
 
+# Values folded together per step (each group is one Merkle leaf)
+SUPPORTED_ARITIES = (2, 4, 8, 16)
+DEFAULT_ARITY = 8
+
+# Folding stops at the first layer this short, or whose polynomial has at most
+# this degree; its coefficients are then sent in the clear (the remainder).
+DEFAULT_MAX_REMAINDER_LENGTH = 32
+DEFAULT_MAX_REMAINDER_DEGREE = 7
+
+# Cosets folded per vector pass: bounds the NTT and Horner temporaries of a fold
+FOLD_CHUNK = 1 << 14
+
+# Low-memory mode keeps a layer with more leaves than this only as the top of its
+# Merkle tree, down to MERKLE_CAP_SIZE nodes (64 KiB of digests); opening one of
+# its leaves then refolds 1 / MERKLE_CAP_SIZE of layer 0
+MERKLE_CAP_SIZE = 1 << 10
+
+
+def layer_arities(
+    domain_length: int,
+    degree_bound: int,
+    arity: int,
+    max_remainder_length: int = DEFAULT_MAX_REMAINDER_LENGTH,
+    max_remainder_degree: int = DEFAULT_MAX_REMAINDER_DEGREE,
+) -> List[int]:
+    """
+    Folding factor of every committed layer. Every layer folds by `arity`
+    (or by its whole size if shorter) until the remainder is short enough or
+    of low enough degree. At least one layer is committed, since the STARK
+    verifier reads the composition values it checks from layer 0.
+    """
+    if arity not in SUPPORTED_ARITIES:
+        raise ValueError(f"Unsupported FRI arity {arity}, expected one of {SUPPORTED_ARITIES}")
+    if max_remainder_length < 1 or max_remainder_degree < 0:
+        raise ValueError("FRI remainder limits must be positive")
+    arities: List[int] = []
+    length = domain_length
+    bound = degree_bound
+    while not arities or (length > max_remainder_length and bound - 1 > max_remainder_degree):
+        arities.append(min(arity, length))
+        length //= arities[-1]
+        bound = remainder_degree_bound(bound, arities[-1:])
+    return arities
+
+
+def remainder_degree_bound(degree_bound: int, arities: List[int]) -> int:
+    """
+    Number of coefficients left after folding a polynomial of degree < degree_bound
+    by each of `arities`: folding by k takes degree < d to degree < ceil(d / k).
+    """
+    for arity in arities:
+        degree_bound = -(-degree_bound // arity)
+    return degree_bound
+
+
+class FriDomain:
+    """
+    The coset offset * <generator> of `size` points, kept implicit.
+    FRI layers are stored in bit-reversed order, so position p of a layer
+    is the point offset * generator^reverse_bits(p).
+    """
+
+    def __init__(self, offset: FieldElement, generator: FieldElement, size: int) -> None:
+        self.offset: FieldElement = offset
+        self.generator: FieldElement = generator
+        self.size: int = size
+        self.log_size: int = size.bit_length() - 1
+
+    @classmethod
+    def from_points(cls, points: Union[List[FieldElement], FieldVector]) -> FriDomain:
+        """Recovers the coset from its points listed in natural order."""
+        return cls(points[0], points[1] / points[0] if len(points) > 1 else FieldElement(1), len(points))
+
+    def points(self) -> FieldVector:
+        """All points, in natural order."""
+        return FieldVector.powers(self.generator, self.size, start=self.offset)
+
+    def point(self, position: int) -> FieldElement:
+        return self.offset * self.generator.pow(reverse_bits(position, self.log_size))
+
+    def points_at(self, positions: np.ndarray) -> FieldVector:
+        """point(p) for every position at once (verifier queries)."""
+        exponents = reverse_bits_array(positions, self.log_size)
+        return FieldVector.powers_at(self.generator, exponents).scale(self.offset)
+
+    def coset_offsets(self, arity: int) -> FieldVector:
+        """
+        First point x0 = point(q * arity) of every coset of `arity` points,
+        in coset order. These are the first size / arity natural points.
+        """
+        return bit_reverse(FieldVector.powers(self.generator, self.size // arity, start=self.offset))
+
+    def inverse(self) -> FriDomain:
+        """The domain of inverses: its point p is 1 / self.point(p)."""
+        return FriDomain(self.offset.inv(), self.generator.inv(), self.size)
+
+    def fold(self, arity: int) -> FriDomain:
+        """Domain of the next layer: {x^arity}, point q being point(q * arity)^arity."""
+        return FriDomain(self.offset.pow(arity), self.generator.pow(arity), self.size // arity)
+
+
+@lru_cache(maxsize=len(SUPPORTED_ARITIES))
+def _fold_constants(arity: int) -> Tuple[FieldElement, FieldElement]:
+    """(w^-1, 1 / arity) for w the primitive arity-th root of unity."""
+    return FieldElement.generator_of_order(arity).inv(), FieldElement(arity).inv()
+
+
+def fold_cosets(values: FieldVector, x0_inv: FieldVector, beta: FieldElement, arity: int) -> FieldVector:
+    """
+    Folds consecutive blocks of `arity` values, one block per coset.
+
+    Block q holds f at x0_q * w^reverse_bits(s) in slot s (bit-reversed
+    order), with w a primitive arity-th root of unity. Writing
+    f(x) = sum_t x^t f_t(x^arity), an inverse NTT of the block (back in
+    natural order) gives c_t = x0^t f_t(x0^arity), and the folded value is
+    sum_t beta^t f_t(x0^arity) = sum_t (beta / x0)^t c_t.
+    x0_inv holds 1 / x0_q, so no inversion happens here.
+    """
+    if len(x0_inv) > FOLD_CHUNK:
+        return FieldVector(np.concatenate([
+            fold_cosets(values[q * arity:(q + FOLD_CHUNK) * arity], x0_inv[q:q + FOLD_CHUNK], beta, arity).data
+            for q in range(0, len(x0_inv), FOLD_CHUNK)
+        ]))
+    log_arity = arity.bit_length() - 1
+    root_inv, arity_inv = _fold_constants(arity)
+    blocks = values.data.reshape(-1, arity)[:, bit_reverse_permutation(log_arity)]
+    # Unscaled inverse NTT: the 1/arity factor is applied once per coset at the end
+    coeffs = fft_blocks(FieldVector(blocks.reshape(-1)), arity, root_inv)
+    coeffs_matrix = coeffs.data.reshape(-1, arity)
+
+    # Horner's rule in r = beta / x0, all cosets at once
+    r = x0_inv * beta
+    folded = FieldVector(coeffs_matrix[:, arity - 1].copy())
+    for t in range(arity - 2, -1, -1):
+        folded = folded * r + FieldVector(coeffs_matrix[:, t].copy())
+    return folded * arity_inv
+
 
 class FriLayer:
-    def __init__(self, values: List[FieldElement], domain: List[FieldElement]) -> None:
-        self.values: List[FieldElement] = values
-        self.domain: List[FieldElement] = domain
-        self.merkle_tree: MerkleTree = MerkleTree.commit(values)
+    """
+    One FRI layer, stored in bit-reversed order: position p holds the
+    evaluation at natural domain index reverse_bits(p). The `arity` points
+    x0 * w^t of a folding coset then occupy one contiguous block, committed
+    as a single Merkle leaf.
+    """
+
+    def __init__(self, values: FieldVector, domain: FriDomain, arity: int) -> None:
+        self.values: FieldVector = values
+        self.domain: FriDomain = domain
+        self.arity: int = arity
+        self.merkle_tree: MerkleTree = MerkleTree.from_buffer(encode_columns([values]), ELEMENT_SIZE * arity)
 
     @property
     def root(self) -> bytes:
@@ -25,125 +176,187 @@ class FriProver:
 
     def __init__(
         self,
-        polynomial: Polynomial,
-        domain: List[FieldElement],
-        values: List[FieldElement] = None,
+        polynomial: Optional[Polynomial],
+        domain: Union[FriDomain, List[FieldElement], FieldVector],
+        values: Optional[Union[List[FieldElement], FieldVector]] = None,
+        arity: int = DEFAULT_ARITY,
+        degree_bound: Optional[int] = None,
+        max_remainder_length: int = DEFAULT_MAX_REMAINDER_LENGTH,
+        max_remainder_degree: int = DEFAULT_MAX_REMAINDER_DEGREE,
+        low_memory: bool = False,
+        x0_inv: Optional[FieldVector] = None,
     ) -> None:
         """
-        polynomial: The polynomial to prove (usually composition polynomial).
-        domain: The evaluation domain (must be power of 2 sized).
+        polynomial: The polynomial to prove (usually composition polynomial); only read if values is None.
+        domain: The evaluation domain (must be power of 2 sized), or its points in natural order.
         values: Optional pre-computed evaluations of polynomial on domain.
+        arity: Folding factor per layer (2, 4, 8 or 16).
+        degree_bound: The claim being proven, deg < degree_bound (default: domain size).
+        max_remainder_length, max_remainder_degree: When to stop folding (see layer_arities).
+        low_memory: After the commit phase, keep layer 0 and the layers of at most
+            MERKLE_CAP_SIZE leaves, but only a Merkle cap of the layers in between;
+            query_phase refolds just the subtrees under the opened leaves.
+        x0_inv: 1 / x0 of every coset of layer 0, if already known (see keys.ProverKey).
         """
-        self.polynomial: Polynomial = polynomial
-        self.domain: List[FieldElement] = domain
+        self.polynomial: Optional[Polynomial] = polynomial
+        self.domain: FriDomain = domain if isinstance(domain, FriDomain) else FriDomain.from_points(domain)
+        self.arity: int = arity
+        self.degree_bound: int = self.domain.size if degree_bound is None else degree_bound
+        self.arities: List[int] = layer_arities(
+            self.domain.size, self.degree_bound, arity, max_remainder_length, max_remainder_degree
+        )
+        self.low_memory: bool = low_memory
         self.layers: List[FriLayer] = []
+        # Caps of layers 1 to len(caps) in low-memory mode, whose FriLayer is dropped
+        self.caps: List[bytes] = []
+        self.betas: List[FieldElement] = []
+        self.log_length: int = self.domain.log_size
+        if x0_inv is None:
+            x0_inv = self.domain.inverse().coset_offsets(self.arities[0])
+        self.x0_inv: FieldVector = x0_inv
 
         # Initial evaluation
         if values is None:
-            values = [polynomial.eval(x) for x in domain]
+            values = [polynomial.eval(x) for x in self.domain.points()]
 
-        self.layers.append(FriLayer(values, domain))
+        # Layers are kept in bit-reversed order (see FriLayer)
+        self.layers.append(FriLayer(bit_reverse(values), self.domain, self.arities[0]))
 
     def generate_proof(
         self, interaction_channel: Channel
-    ) -> Tuple[List[bytes], FieldElement]:
+    ) -> Tuple[List[bytes], List[FieldElement]]:
         """
         Run the FRI commit phase.
         interaction_channel: Simulated channel to get random challenges from verifier.
-        Returns: list of layer roots, and final constant.
+        Returns: list of layer roots, and the remainder polynomial's coefficients.
         """
-        current_values: List[FieldElement] = self.layers[0].values
-        current_domain: List[FieldElement] = self.layers[0].domain
+        current_values: FieldVector = self.layers[0].values
+        current_domain: FriDomain = self.layers[0].domain
+        # 1 / x0 of every coset of the first layer
+        x0_inv: Optional[FieldVector] = self.x0_inv
 
         # Send initial root
         interaction_channel.send(self.layers[0].root)
         commitments: List[bytes] = [self.layers[0].root]
 
         # Folding
-        while len(current_values) > 1:  # Until we have a constant (degree 0)
+        for i in range(len(self.arities)):  # Until the remainder is small enough
             # 1. Get random beta from Verifier
             beta: FieldElement = interaction_channel.receive_random_field_element()
+            self.betas.append(beta)
 
-            # 2. Fold
-            next_values: List[FieldElement] = []
-            next_domain: List[FieldElement] = []
-
-            length: int = len(current_values)
-            assert length % 2 == 0
-            half_len: int = length // 2
-
-            inv_2: FieldElement = FieldElement(2).inv()
-
-            for i in range(half_len):
-                x: FieldElement = current_domain[i]
-                x_inv: FieldElement = x.inv()
-
-                v_x: FieldElement = current_values[i]
-                v_minus_x: FieldElement = current_values[i + half_len]
+            # 2. Fold every coset at once
+            current_values, current_domain, x0_inv = self._fold(i, current_values, current_domain, x0_inv, beta)
+            if i + 1 == len(self.arities):
+                break
 
-                even: FieldElement = (v_x + v_minus_x) * inv_2
-                odd: FieldElement = (v_x - v_minus_x) * inv_2 * x_inv
-
-                next_val: FieldElement = even + beta * odd
-                next_values.append(next_val)
-                next_domain.append(x * x)
-
-            # 3. Commit to new layer
-            layer = FriLayer(next_values, next_domain)
-            self.layers.append(layer)
+            # 3. Commit to new layer (in low-memory mode only the cap of a large one
+            # outlives this step; layers shrink, so the capped ones come first)
+            layer = FriLayer(current_values, current_domain, self.arities[i + 1])
+            if self.low_memory and layer.merkle_tree.num_leaves > MERKLE_CAP_SIZE:
+                self.caps.append(layer.merkle_tree.cap(MERKLE_CAP_SIZE))
+            else:
+                self.layers.append(layer)
 
             # Send new root
             interaction_channel.send(layer.root)
             commitments.append(layer.root)
 
-            current_values: List[FieldElement] = next_values
-            current_domain: List[FieldElement] = next_domain
+        # 4. Send the remainder in the clear instead of committing to more layers.
+        # Its natural-order domain is offset * <generator>; an honest prover's
+        # coefficients beyond the degree bound are zero, so they are dropped.
+        coefficients = coset_ifft(bit_reverse(current_values), current_domain.offset)
+        remainder: List[FieldElement] = coefficients[:remainder_degree_bound(self.degree_bound, self.arities)].to_list()
+        interaction_channel.send(encode_elements(remainder))
+        return commitments, remainder
 
-        final_constant: FieldElement = current_values[0]
-        return commitments, final_constant
+    def _fold(
+        self, i: int, values: FieldVector, domain: FriDomain, x0_inv: FieldVector, beta: FieldElement
+    ) -> Tuple[FieldVector, FriDomain, Optional[FieldVector]]:
+        """
+        Folds layer i with challenge beta. Returns the next layer's values, its
+        domain and the 1 / x0 table of its cosets (None past the last layer).
+        """
+        arity = self.arities[i]
+        # Coset q is the contiguous block [q * arity, (q + 1) * arity), its first
+        # point x0 = domain.point(q * arity), and its folded value lands at
+        # position q of the next (bit-reversed) layer, whose domain is x0^arity.
+        next_values: FieldVector = fold_cosets(values, x0_inv, beta, arity)
+        next_domain: FriDomain = domain.fold(arity)
+        if i + 1 == len(self.arities):
+            return next_values, next_domain, None
+        # Point q of the next layer is x0_q^arity, so its coset offsets' inverses
+        # are every next_arity-th entry of the table, raised to the arity
+        return next_values, next_domain, x0_inv[0::self.arities[i + 1]].pow(arity)
+
+    def _refold(self, i: int, start: int, stop: int) -> FieldVector:
+        """
+        Positions [start, stop) of layer i, folded again from the block of layer 0
+        they come from. start and stop must be multiples of layer i's arity.
+        """
+        span = math.prod(self.arities[:i])
+        layer = self.layers[0]
+        values = layer.values[start * span:stop * span]
+        x0_inv = self.x0_inv[start * span // self.arities[0]:stop * span // self.arities[0]]
+        domain = layer.domain
+        for j in range(i):
+            values, domain, x0_inv = self._fold(j, values, domain, x0_inv, self.betas[j])
+        return values
 
-    def query_phase(self, indices: List[int]) -> List[List[Dict[str, Any]]]:
+    def _open_layer(self, i: int, leaves: List[int]) -> Tuple[List[FieldVector], MerkleTree]:
+        """
+        Values of the given leaves of committed layer i, and a tree able to open them.
+        A layer kept only as its cap is rebuilt here: just the subtrees holding
+        these leaves are refolded and hashed again.
+        """
+        arity = self.arities[i]
+        if not 0 < i <= len(self.caps):
+            layer = self.layers[max(0, i - len(self.caps))]
+            return [layer.values[leaf * arity:(leaf + 1) * arity] for leaf in leaves], layer.merkle_tree
+
+        cap = self.caps[i - 1]
+        num_leaves = self.domain.size // math.prod(self.arities[:i + 1])
+        # Layer lengths are powers of two, so every subtree is full
+        span = num_leaves // MERKLE_CAP_SIZE
+        values: List[FieldVector] = []
+        subtrees: Dict[int, MerkleTree] = {}
+        for leaf in leaves:  # Sorted: the leaves of a subtree are consecutive
+            subtree, offset = divmod(leaf, span)
+            if subtree not in subtrees:
+                block = self._refold(i, subtree * span * arity, (subtree + 1) * span * arity)
+                subtrees[subtree] = MerkleTree.from_buffer(encode_columns([block]), ELEMENT_SIZE * arity)
+            # Copied, so that the block is freed with the next one
+            values.append(block[offset * arity:(offset + 1) * arity].copy())
+        return values, MerkleTree.from_cap(cap, num_leaves, subtrees)
+
+    def query_phase(self, indices: List[int]) -> Tuple[List[List[Dict[str, Any]]], List[List[bytes]]]:
         """
         Reveal values for specific indices to allow verification of folding.
-        indices: indices in Layer 0 to query.
+        indices: natural domain indices in Layer 0 to query.
         Returns:
-           list of (value, path) for each layer corresponding to the indices.
+           for each layer, the opened leaves ({idx: leaf, values: its coset}),
+           and one Merkle multi-proof per layer covering all of them.
         """
         all_layer_proofs: List[List[Dict[str, Any]]] = []
+        all_multiproofs: List[List[bytes]] = []
 
-        current_indices: List[int] = indices
-        for layer in self.layers[:-1]:  # Don't need path for the constant (last layer)
-            layer_proofs: List[Dict[str, Any]] = []
-            for idx in current_indices:
-                length: int = len(layer.values)
-                half_len: int = length // 2
-
-                partner_idx: int = (idx + half_len) % length
-
-                val_idx: FieldElement = layer.values[idx]
-                path_idx: List[bytes] = layer.merkle_tree.get_authentication_path(idx)
-
-                val_partner: FieldElement = layer.values[partner_idx]
-                path_partner: List[bytes] = layer.merkle_tree.get_authentication_path(
-                    partner_idx
-                )
-
-                layer_proofs.append(
-                    {
-                        "idx": idx,
-                        "val": val_idx,
-                        "path": path_idx,
-                        "partner_idx": partner_idx,
-                        "partner_val": val_partner,
-                        "partner_path": path_partner,
-                    }
-                )
+        # Position of each query in the current layer; it shrinks by the arity at every fold
+        positions: List[int] = [reverse_bits(idx, self.log_length) for idx in indices]
+        for i, arity in enumerate(self.arities):  # The remainder is sent whole, it needs no path
+            leaves: List[int] = sorted({pos // arity for pos in positions})
+            values, tree = self._open_layer(i, leaves)
+            layer_proofs: List[Dict[str, Any]] = [
+                {
+                    "idx": leaf,
+                    "values": leaf_values.to_list(),
+                }
+                for leaf, leaf_values in zip(leaves, values)
+            ]
 
             all_layer_proofs.append(layer_proofs)
+            all_multiproofs.append(tree.open_many(leaves))
 
-            # Next layer indices
-            current_indices: List[int] = [
-                idx % (len(layer.values) // 2) for idx in current_indices
-            ]
+            # Next layer positions
+            positions = [pos // arity for pos in positions]
 
-        return all_layer_proofs
+        return all_layer_proofs, all_multiproofs
@@ -1,120 +1,174 @@
 from __future__ import annotations
 from typing import List, Dict, Any, Optional, TypedDict
+import numpy as np
 from ..algebra.field import FieldElement
+from ..algebra.field_vector import FieldVector
 from ..algebra.merkle import MerkleTree
+from ..algebra.encoding import ELEMENT_DTYPE, encode_elements
 from .channel import Channel
+from .fri import (
+    DEFAULT_MAX_REMAINDER_DEGREE,
+    DEFAULT_MAX_REMAINDER_LENGTH,
+    FriDomain,
+    fold_cosets,
+    layer_arities,
+    remainder_degree_bound,
+)
 
 class FriProof(TypedDict):
+    arity: int
     commitments: List[bytes]
-    final_constant: FieldElement
+    remainder: List[FieldElement]
     layer_proofs: List[List[Dict[str, Any]]]
+    multiproofs: List[List[bytes]]
+
+
+class OpenedLayer:
+    """
+    The cosets opened in one layer, as a table: row r holds the `arity` values
+    of leaf indices[r], and `rows` maps a leaf index back to its row, so every
+    lookup from the previous layer is a dictionary hit instead of a scan.
+    """
+
+    def __init__(self, indices: np.ndarray, values: np.ndarray, rows: Dict[int, int]) -> None:
+        self.indices: np.ndarray = indices
+        self.values: np.ndarray = values
+        self.rows: Dict[int, int] = rows
+
+    @classmethod
+    def parse(cls, layer_data: List[Dict[str, Any]], arity: int) -> Optional[OpenedLayer]:
+        """None if a leaf has the wrong number of values or is opened twice."""
+        rows: Dict[int, int] = {}
+        for r, query in enumerate(layer_data):
+            if len(query['values']) != arity or query['idx'] in rows:
+                return None
+            rows[query['idx']] = r
+        indices = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        values = FieldVector([v for query in layer_data for v in query['values']]).data
+        return cls(indices, values.reshape(len(rows), arity), rows)
+
+    def leaves(self) -> Dict[int, bytes]:
+        """Leaf index -> encoded coset, for the layer's multi-proof."""
+        encoded = self.values.astype(ELEMENT_DTYPE)
+        return {int(idx): row.tobytes() for idx, row in zip(self.indices, encoded)}
+
+    def lookup(self, positions: np.ndarray) -> Optional[np.ndarray]:
+        """Opened values at positions of this layer (leaf p // arity, slot p % arity), None if one is missing."""
+        arity = self.values.shape[1]
+        leaves = (self.rows.get(int(leaf), -1) for leaf in positions // arity)
+        rows = np.fromiter(leaves, dtype=np.int64, count=len(positions))
+        if (rows < 0).any():
+            return None
+        return self.values[rows, positions % arity]
+
 
 class FriVerifier:
-    def __init__(self, proof: FriProof, interaction_channel: Channel) -> None:
+    def __init__(
+        self,
+        proof: FriProof,
+        interaction_channel: Channel,
+        max_remainder_length: int = DEFAULT_MAX_REMAINDER_LENGTH,
+        max_remainder_degree: int = DEFAULT_MAX_REMAINDER_DEGREE,
+    ) -> None:
         """
         proof: {
+            'arity': folding factor the prover used,
             'commitments': [root0, root1, ...],
-            'final_constant': FieldElement,
-            'layer_proofs': [ [ {idx, val, path...} ], ... ]
+            'remainder': [coefficients of the last folded polynomial],
+            'layer_proofs': [ [ {idx: leaf, values: [v on the coset of the leaf]} ], ... ],
+            'multiproofs': [ [sibling hashes of layer 0], ... ]
         }
         """
+        self.arity: int = proof['arity']
         self.commitments: List[bytes] = proof['commitments']
-        self.final_constant: FieldElement = proof['final_constant']
+        self.remainder: List[FieldElement] = proof['remainder']
         self.layer_proofs: List[List[Dict[str, Any]]] = proof['layer_proofs']
+        self.multiproofs: List[List[bytes]] = proof['multiproofs']
         self.channel: Channel = interaction_channel
+        self.max_remainder_length: int = max_remainder_length
+        self.max_remainder_degree: int = max_remainder_degree
 
-    def verify(self, domain_length: int, domain_offset: Optional[FieldElement] = None) -> bool:
+    def verify(
+        self, domain_length: int, domain_offset: Optional[FieldElement] = None, degree_bound: Optional[int] = None
+    ) -> bool:
         """
         1. Reconstruct the random betas using the channel (Fiat-Shamir).
         2. Verify paths and folding for each layer.
+        3. Check the folded values against the remainder, whose size bounds its degree.
+        degree_bound: the claim being checked, deg < degree_bound (default: domain size).
         """
         if domain_offset is None:
             domain_offset = FieldElement(1)
+        if degree_bound is None:
+            degree_bound = domain_length
             
         # 1. Replay Commit Phase to get Betas
         betas: List[FieldElement] = []
-        for root in self.commitments[:-1]:
+        for root in self.commitments:
             self.channel.send(root)
             beta = self.channel.receive_random_field_element()
             betas.append(beta)
             
-        # Send the last root (final constant commitment) to update state, 
-        # but don't draw a beta for it (nothing to fold)
-        self.channel.send(self.commitments[-1])
+        # The remainder comes last, before the queries are drawn
+        self.channel.send(encode_elements(self.remainder))
             
         # 2. Verify Query Phase
-        g = FieldElement.generator_of_order(domain_length)
-        current_domain_gen: FieldElement = g
-        current_offset: FieldElement = domain_offset
-        current_length: int = domain_length
+        domain = FriDomain(domain_offset, FieldElement.generator_of_order(domain_length), domain_length)
+        # Point p of inverse_domain is 1 / domain.point(p); both fold alike
+        inverse_domain = domain.inverse()
         
-        for i in range(len(self.layer_proofs)):
-            layer_data = self.layer_proofs[i] # List of queries for this layer
-            root = self.commitments[i]
-            beta = betas[i]
-            
-            next_layer_queries: Dict[int, FieldElement] = {} # Map index -> value for consistency check with next layer
+        # One committed (and opened) layer per fold, then the remainder
+        try:
+            arities = layer_arities(
+                domain_length, degree_bound, self.arity, self.max_remainder_length, self.max_remainder_degree
+            )
+        except ValueError:
+            return False
+        num_layers = len(arities)
+        if len(self.commitments) != num_layers:
+            return False
+        # Degree check: the remainder has no room for higher coefficients
+        if len(self.remainder) != remainder_degree_bound(degree_bound, arities):
+            return False
+        if len(self.layer_proofs) != num_layers or len(self.multiproofs) != num_layers:
+            return False
             
-            for query in layer_data:
-                idx: int = query['idx']
-                val: FieldElement = query['val']
-                path: List[bytes] = query['path']
-                partner_idx: int = query['partner_idx']
-                partner_val: FieldElement = query['partner_val']
-                partner_path: List[bytes] = query['partner_path']
-                
-                # 1. Verify Paths
-                if not MerkleTree.verify_claim(root, str(val).encode(), path, idx):
-                    return False
-                if not MerkleTree.verify_claim(root, str(partner_val).encode(), partner_path, partner_idx):
-                    return False
-                    
-                # 2. Verify Folding Relation
-                x = current_offset * current_domain_gen.pow(idx)
-                x_inv = x.inv()
-                
-                inv_2 = FieldElement(2).inv()
-                even = (val + partner_val) * inv_2
-                odd  = (val - partner_val) * inv_2 * x_inv
-                next_val = even + beta * odd
-                
-                # The index in the next layer is idx % (current_length // 2)
-                next_idx = idx % (current_length // 2)
+        # Opened cosets of every layer, indexed by leaf
+        layers: List[OpenedLayer] = []
+        for layer_data, arity in zip(self.layer_proofs, arities):
+            layer = OpenedLayer.parse(layer_data, arity)
+            if layer is None:
+                return False
+            layers.append(layer)
+
+        for i, (layer, arity) in enumerate(zip(layers, arities)):
+            # 1. Verify Paths: every opened coset against the layer's multi-proof
+            num_leaves = domain.size // arity
+            if not MerkleTree.verify_many(self.commitments[i], layer.leaves(), self.multiproofs[i], num_leaves):
+                return False
                 
-                # Store expectation for next layer check
-                if next_idx in next_layer_queries:
-                    if next_layer_queries[next_idx] != next_val:
-                        return False # Consistency error
-                else:
-                    next_layer_queries[next_idx] = next_val
+            # 2. Verify Folding Relation, for all queries of the layer at once
+            # Leaf q holds v on the coset x0 * <w> with x0 = domain.point(q * arity)
+            # (slots in bit-reversed order); the folded value is position q of the next layer.
+            x0_inv = inverse_domain.points_at(layer.indices * arity)
+            folded = fold_cosets(FieldVector(layer.values.reshape(-1)), x0_inv, betas[i], arity)
 
             # Prepare for next layer
-            current_domain_gen = current_domain_gen.pow(2)
-            current_offset = current_offset * current_offset
-            current_length //= 2
+            domain = domain.fold(arity)
+            inverse_domain = inverse_domain.fold(arity)
             
             # Check consistency with NEXT layer actual values
-            if i < len(self.layer_proofs) - 1:
-                next_proof_layer = self.layer_proofs[i+1]
-                for n_idx, n_val in next_layer_queries.items():
-                    found = False
-                    for q in next_proof_layer:
-                        if q['idx'] == n_idx:
-                            if q['val'] != n_val:
-                                return False
-                            found = True
-                            break
-                        if q['partner_idx'] == n_idx:
-                            if q['partner_val'] != n_val:
-                                return False
-                            found = True
-                            break
-                    if not found:
-                         return False
+            if i < num_layers - 1:
+                opened = layers[i + 1].lookup(layer.indices)
+                if opened is None or not np.array_equal(opened, folded.data):
+                    return False
             else:
-                # This was the last Merkle layer. 
-                for n_val in next_layer_queries.values():
-                    if n_val != self.final_constant:
-                        return False
+                # This was the last Merkle layer: evaluate the remainder at the folded points
+                points = domain.points_at(layer.indices)
+                expected = FieldVector.zeros(len(points))
+                for coefficient in reversed(self.remainder):
+                    expected = expected * points + coefficient
+                if expected != folded:
+                    return False
 
         return True
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# Proof-of-work grinding: before the query indices are drawn, the prover must find
+# a nonce such that sha256(transcript state || nonce) starts with `bits` zero bits.
+# Every attempt at steering the queries then costs 2^bits hashes, which buys
+# `bits` bits of soundness that would otherwise take extra queries.
+NONCE_SIZE = 8
+MAX_GRINDING_BITS = 64
+
+# Nonces per work item handed to a worker process
+NONCE_RANGE = 1 << 16
+
+
+def nonce_bytes(nonce: int) -> bytes:
+    """Encoding of the nonce, both hashed and absorbed into the transcript."""
+    return nonce.to_bytes(NONCE_SIZE, "little")
+
+
+def _check_bits(bits: int) -> None:
+    if not 0 <= bits <= MAX_GRINDING_BITS:
+        raise ValueError(f"Grinding bits must be in [0, {MAX_GRINDING_BITS}], got {bits}")
+
+
+def verify_nonce(seed: bytes, nonce: int, bits: int) -> bool:
+    """A single hash: does sha256(seed || nonce) have `bits` leading zero bits?"""
+    if not 0 <= bits <= MAX_GRINDING_BITS or not 0 <= nonce < 1 << (8 * NONCE_SIZE):
+        return False
+    digest = hashlib.sha256(seed + nonce_bytes(nonce)).digest()
+    return int.from_bytes(digest[:8], "big") >> (64 - bits) == 0
+
+
+def _search(seed: bytes, bits: int, start: int, stop: int) -> Optional[int]:
+    """Smallest valid nonce in [start, stop), if any (runs in a worker process)."""
+    prefix = hashlib.sha256(seed)
+    shift = 64 - bits
+    for nonce in range(start, stop):
+        h = prefix.copy()
+        h.update(nonce.to_bytes(NONCE_SIZE, "little"))
+        if int.from_bytes(h.digest()[:8], "big") >> shift == 0:
+            return nonce
+    return None
+
+
+def find_nonce(seed: bytes, bits: int, workers: Optional[int] = None) -> int:
+    """
+    Returns the smallest nonce passing verify_nonce(seed, nonce, bits).
+
+    Nonces are split into ranges of NONCE_RANGE, searched by a process pool
+    `workers` ranges at a time (default: one per CPU). Results are read in range
+    order, so the nonce found does not depend on the number of workers.
+    Small searches (expected work within one range) run in this process.
+    """
+    _check_bits(bits)
+    if bits == 0:
+        return 0
+    workers = workers or os.cpu_count() or 1
+    start = 0
+
+    if workers == 1 or (1 << bits) <= NONCE_RANGE:
+        while True:
+            found = _search(seed, bits, start, start + NONCE_RANGE)
+            if found is not None:
+                return found
+            start += NONCE_RANGE
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            futures = [
+                pool.submit(_search, seed, bits, start + i * NONCE_RANGE, start + (i + 1) * NONCE_RANGE)
+                for i in range(workers)
+            ]
+            for future in futures:
+                found = future.result()
+                if found is not None:
+                    for pending in futures:
+                        pending.cancel()
+                    return found
+            start += workers * NONCE_RANGE
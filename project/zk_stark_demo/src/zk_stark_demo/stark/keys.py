@@ -0,0 +1,115 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple, Type
+import numpy as np
+from ..algebra.field import FieldElement
+from ..algebra.field_vector import FieldVector
+from ..algebra.polynomial import Polynomial
+from .air import AIR
+from .boundary import BoundaryConstraints
+from .composition import CompositionSegments
+from .fri import FriDomain, layer_arities
+from .parameters import StarkParameters, estimate
+from .protocol import COSET_SHIFT
+from .vanishing import TransitionVanishingPolynomial
+
+
+class AirKey:
+    """
+    Everything proving or verifying needs that depends only on the shape of an
+    AIR (its class, trace width and length, constraint degrees and boundary
+    steps) and on the protocol parameters, but not on a trace or on the public
+    inputs. Built once, it serves every proof of AIRs of that shape.
+    """
+
+    def __init__(self, air: AIR, parameters: Optional[StarkParameters] = None) -> None:
+        """Raises ValueError if the parameters do not suit the AIR."""
+        self.parameters: StarkParameters = parameters or StarkParameters()
+        self.air_type: Type[AIR] = type(air)
+        self.trace_width: int = air.trace_width()
+        self.trace_length: int = air.trace_length()
+        self.parameters.validate(self.trace_length)
+
+        # Transition constraints: degrees, count and the exponents lifting them to a common bound
+        self.degrees: List[int] = air.transition_constraint_degrees()
+        self.num_constraints: int = len(self.degrees)
+        self.segments: CompositionSegments = CompositionSegments(self.trace_length, max(self.degrees))
+        self.adjustments: List[int] = self.segments.degree_adjustments(self.degrees)
+
+        # Trace and LDE domains
+        self.lde_length: int = self.trace_length * self.parameters.blowup_factor
+        self.shift: FieldElement = FieldElement(COSET_SHIFT)
+        self.h: FieldElement = FieldElement.generator_of_order(self.lde_length)
+        self.vanishing: TransitionVanishingPolynomial = TransitionVanishingPolynomial(self.trace_length)
+
+        # Boundary constraints: which registers are pinned at which steps, and their zerofiers
+        boundary = BoundaryConstraints(air.get_boundary_constraints(), self.trace_length)
+        self.boundary_layout: List[Tuple[Tuple[int, ...], Tuple[int, ...]]] = boundary.layout
+        self.boundary_zerofiers: Dict[Tuple[int, ...], Polynomial] = boundary.zerofiers()
+
+    def boundary_constraints(self, air: AIR) -> BoundaryConstraints:
+        """
+        The boundary constraints of `air`, reusing the key's zerofiers.
+        Raises ValueError if `air` does not have the key's shape.
+        """
+        if (
+            type(air) is not self.air_type
+            or air.trace_width() != self.trace_width
+            or air.trace_length() != self.trace_length
+        ):
+            raise ValueError(
+                f"{type(air).__name__} of width {air.trace_width()} and length {air.trace_length()} does not match "
+                f"the key ({self.air_type.__name__} of width {self.trace_width} and length {self.trace_length})"
+            )
+        boundary = BoundaryConstraints(air.get_boundary_constraints(), self.trace_length, self.boundary_zerofiers)
+        if boundary.layout != self.boundary_layout:
+            raise ValueError("Boundary constraints pin other registers or steps than the key's")
+        return boundary
+
+
+class ProverKey(AirKey):
+    """
+    AirKey with the prover's tables over the composition evaluation coset:
+    its points, 1 / Z(x) of the transition and boundary constraints, the
+    degree-adjustment powers x^e, and the FRI coset offsets of layer 0.
+    They cost a few vectors of the coset's size in memory.
+    """
+
+    def __init__(self, air: AIR, parameters: Optional[StarkParameters] = None) -> None:
+        super().__init__(air, parameters)
+        self.domain_lde: FieldVector = FieldVector.powers(self.h, self.lde_length, start=self.shift)
+
+        # Q may need a larger coset than the LDE (see CompositionSegments.evaluation_length)
+        self.eval_length: int = self.segments.evaluation_length(self.lde_length)
+        if self.eval_length == self.lde_length:
+            self.eval_domain: FieldVector = self.domain_lde
+        else:
+            generator = FieldElement.generator_of_order(self.eval_length)
+            self.eval_domain = FieldVector.powers(generator, self.eval_length, start=self.shift)
+
+        self.transition_inverses: FieldVector = self.vanishing.inverse_over_coset(
+            self.shift, self.eval_length, self.eval_domain
+        )
+        self.adjustment_powers: Dict[int, FieldVector] = {e: self.eval_domain.pow(e) for e in set(self.adjustments)}
+        self.boundary_inverses: np.ndarray = self.boundary_constraints(air).zerofier_inverses(self.eval_domain)
+
+        # FRI runs on the LDE domain, for degree < N
+        self.fri_domain: FriDomain = FriDomain(self.shift, self.h, self.lde_length)
+        first_arity = layer_arities(
+            self.lde_length,
+            self.trace_length,
+            self.parameters.fri_arity,
+            self.parameters.max_remainder_length,
+            self.parameters.max_remainder_degree,
+        )[0]
+        self.fri_x0_inv: FieldVector = self.fri_domain.inverse().coset_offsets(first_arity)
+
+
+class VerifierKey(AirKey):
+    """AirKey with the conjectured security of its parameters, checked against each verifier's minimum."""
+
+    def __init__(self, air: AIR, parameters: Optional[StarkParameters] = None) -> None:
+        super().__init__(air, parameters)
+        self.log_lde_length: int = self.lde_length.bit_length() - 1
+        self.security_bits: float = estimate(
+            self.parameters, self.trace_width, self.trace_length, max(self.degrees)
+        ).security_bits
@@ -1,9 +1,11 @@
 from __future__ import annotations
-from typing import List
+from typing import List, Optional
+import numpy as np
 from ..algebra.field import FieldElement
-from ..algebra.polynomial import Polynomial
+from ..algebra.field_vector import FieldVector, rows_at
 from .trace import Trace
-from ..algebra.fft import fft, ifft
+from .protocol import COSET_SHIFT
+from ..algebra.fft import coset_fft_columns, ifft_columns
 
 class LowDegreeExtension:
     """
@@ -11,7 +13,8 @@ class LowDegreeExtension:
     1. Interpolates the trace columns on a domain D (size N).
     2. Evaluates the polynomials on a larger domain D_LDE (size k * N).
     """
-    def __init__(self, trace: Trace, blowup_factor: int = 8) -> None:
+    def __init__(self, trace: Trace, blowup_factor: int = 8, domain_lde: Optional[FieldVector] = None) -> None:
+        """domain_lde: the points of D_LDE, if already known (see keys.ProverKey)."""
         self.trace: Trace = trace
         self.blowup_factor: int = blowup_factor
         self.lde_length: int = trace.length * blowup_factor
@@ -19,57 +22,74 @@ class LowDegreeExtension:
         # 1. Define Domain D (Trace Domain)
         # Generator g such that g^trace_length = 1
         self.g: FieldElement = FieldElement.generator_of_order(self.trace.length)
-        self.domain_d: List[FieldElement] = [self.g.pow(i) for i in range(self.trace.length)]
+        self.domain_d: FieldVector = FieldVector.powers(self.g, self.trace.length)
         
         # 2. Define Domain D_LDE (Evaluation Domain)
         # To avoid division by zero issues in constraints (x - x_i), we usually shift D_LDE by an offset.
-        self.shift: FieldElement = FieldElement(3) # Just a random generator or number
+        self.shift: FieldElement = FieldElement(COSET_SHIFT)
         self.h: FieldElement = FieldElement.generator_of_order(self.lde_length)
-        self.domain_lde: List[FieldElement] = [self.shift * self.h.pow(i) for i in range(self.lde_length)]
+        if domain_lde is None:
+            domain_lde = FieldVector.powers(self.h, self.lde_length, start=self.shift)
+        self.domain_lde: FieldVector = domain_lde
     
-        # 3. Interpolate Trace Columns to get Polynomials P_0(x), P_1(x)...
-        self.trace_polynomials: List[Polynomial] = []
+        # 3. Interpolate Trace Columns to get the coefficients of P_0(x), P_1(x)...
+        self.trace_coefficients: List[FieldVector] = []
         self.compute_trace_polynomials()
         
         # 4. Evaluate on D_LDE
-        self.lde_evaluations: List[List[FieldElement]] = [] # List of columns
+        self.lde_evaluations: List[FieldVector] = [] # List of columns
         self.compute_lde_evaluations()
 
     def compute_trace_polynomials(self) -> None:
-        self.trace_polynomials = []
-        for col_idx in range(self.trace.width):
-            col_values = self.trace.get_column(col_idx)
-            # Interpolate: P(domain_d[i]) = col_values[i]
-            # Use Inverse FFT to go from Values -> Coefficients
-            # domain_d is generated by self.g
-            coeffs = ifft(col_values, self.g)
-            poly = Polynomial(coeffs)
-            self.trace_polynomials.append(poly)
+        # Interpolate: P(domain_d[i]) = col_values[i]
+        # Use Inverse FFT to go from Values -> Coefficients, all columns in one batched call
+        # domain_d is generated by self.g
+        columns = [FieldVector(self.trace.get_column(col_idx)) for col_idx in range(self.trace.width)]
+        self.trace_coefficients = ifft_columns(columns, self.g)
             
+    def coset_shift(self, coset_idx: int) -> FieldElement:
+        """Offset of the coset holding LDE points i with i % blowup == coset_idx"""
+        return self.shift * self.h.pow(coset_idx)
+
+    def compute_coset_evaluations(self, coset_idx: int) -> List[FieldVector]:
+        """
+        Evaluates every trace polynomial on one size-N coset of D_LDE.
+        shift * h^(r + blowup*j) = (shift * h^r) * g^j, so LDE points with
+        index r (mod blowup) form the coset (shift * h^r) * <g>.
+        """
+        return coset_fft_columns(self.trace_coefficients, self.coset_shift(coset_idx), self.trace.length)
+
     def compute_lde_evaluations(self) -> None:
-        self.lde_evaluations = []
-        for poly in self.trace_polynomials:
-            # Evaluate poly on every point in domain_lde (Coset FFT)
-            # domain_lde = shift * <h>
-            # 1. Scale coefficients by shift^i
-            coeffs = poly.coefficients
-            # Pad or truncate to trace.length (Polynomial might strip zeros)
-            coeffs = coeffs + [FieldElement.zero()] * (self.trace.length - len(coeffs))
-            
-            scaled_coeffs = []
-            current_shift = FieldElement(1)
-            for c in coeffs:
-                scaled_coeffs.append(c * current_shift)
-                current_shift = current_shift * self.shift
-                
-            # 2. Pad to LDE length
-            padding = [FieldElement.zero()] * (self.lde_length - len(scaled_coeffs))
-            padded_coeffs = scaled_coeffs + padding
-            
-            # 3. FFT on larger domain
-            evals = fft(padded_coeffs, self.h)
-            self.lde_evaluations.append(evals)
+        # Evaluate each poly on every point in domain_lde = shift * <h>
+        # as `blowup` independent size-N coset transforms, interleaved into place.
+        # Only one coset (width x N) is being transformed at any time.
+        table = np.empty((self.trace.width, self.lde_length), dtype=np.uint64)
+        for coset_idx in range(self.blowup_factor):
+            for col_idx, evals in enumerate(self.compute_coset_evaluations(coset_idx)):
+                table[col_idx, coset_idx::self.blowup_factor] = evals.data
+        self.lde_evaluations = [FieldVector(row) for row in table]
+
+    @staticmethod
+    def commitment_position(idx: int, trace_length: int, blowup_factor: int) -> int:
+        """
+        Leaf holding LDE point idx in the committed (coset-major) order.
+        Points are grouped by coset r = idx % blowup and, inside a coset, by trace
+        step idx // blowup, so a row and its next step (idx + blowup) are adjacent
+        leaves and their authentication paths share all but the lowest node.
+        """
+        return (idx % blowup_factor) * trace_length + idx // blowup_factor
+
+    def to_commitment_order(self, columns: List[FieldVector]) -> List[FieldVector]:
+        """Reorders LDE columns (natural domain order) into the coset-major commitment order."""
+        return [
+            FieldVector(col.data.reshape(self.trace.length, self.blowup_factor).T.reshape(-1))
+            for col in columns
+        ]
 
     def get_evaluation(self, step_idx: int) -> List[FieldElement]:
         """Returns the row at step_idx in the LDE domain"""
         return [col[step_idx] for col in self.lde_evaluations]
+
+    def get_rows_at(self, indices: List[int]) -> List[List[FieldElement]]:
+        """Returns the LDE rows at indices (only those are converted to FieldElements)"""
+        return rows_at(self.lde_evaluations, indices)
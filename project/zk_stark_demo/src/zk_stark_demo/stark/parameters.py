@@ -0,0 +1,332 @@
+from __future__ import annotations
+import math
+from typing import Any, Dict, List, Optional, Tuple
+from ..algebra.field import FieldElement
+from ..algebra.encoding import ELEMENT_SIZE, encode_elements
+from ..algebra.merkle import MerkleTree
+from .channel import TRANSCRIPT_SHAKE256, TRANSCRIPTS
+from .composition import CompositionSegments
+from .fri import (
+    DEFAULT_ARITY,
+    DEFAULT_MAX_REMAINDER_DEGREE,
+    DEFAULT_MAX_REMAINDER_LENGTH,
+    SUPPORTED_ARITIES,
+    layer_arities,
+    remainder_degree_bound,
+)
+from .grinding import MAX_GRINDING_BITS, NONCE_SIZE
+
+# The LDE blowup does not depend on the constraint degree: a high-degree
+# composition polynomial is split into segments of degree < N instead.
+DEFAULT_BLOWUP_FACTOR = 4
+DEFAULT_NUM_QUERIES = 10
+
+# Largest power-of-two subgroup of GF(P)^*, P - 1 = 3 * 2^30
+MAX_LOG_DOMAIN = 30
+
+# Every parameter is absorbed as one 4-byte word (see StarkParameters.to_bytes)
+MAX_PARAMETER = (1 << 32) - 1
+
+# Estimator costs, in SHA-256 calls: one field operation inside a vectorized (NumPy)
+# pass costs about 1/80 of a hash here, one scalar FieldElement operation about one.
+VECTOR_OP_COST = 1 / 80
+SCALAR_OP_COST = 1.0
+
+# Search space of choose_parameters
+CANDIDATE_BLOWUPS = (2, 4, 8, 16)
+CANDIDATE_GRINDING_BITS = (0, 8, 12, 16, 20)
+OBJECTIVES = ("proof_size", "prover", "verifier")
+
+
+class StarkParameters:
+    """
+    Protocol parameters shared by prover and verifier. They are stored in
+    every proof and absorbed into the transcript, so a proof is only
+    checked against the parameters it was made with.
+
+    blowup_factor: LDE size / trace length (power of two, at least 2).
+    num_queries: Query indices drawn after the commitments.
+    fri_arity: FRI folding factor (2, 4, 8 or 16).
+    max_remainder_length, max_remainder_degree: When FRI stops folding and
+        sends the remainder polynomial (see fri.layer_arities).
+    grinding_bits: Proof of work before the queries (see grinding.py).
+    transcript: Fiat-Shamir transcript, one of channel.TRANSCRIPTS (SHAKE-256
+        with batched challenges and distinct queries, or the SHA-256 Channel).
+    """
+
+    FIELDS = (
+        "blowup_factor",
+        "num_queries",
+        "fri_arity",
+        "max_remainder_length",
+        "max_remainder_degree",
+        "grinding_bits",
+        "transcript",
+    )
+
+    def __init__(
+        self,
+        blowup_factor: int = DEFAULT_BLOWUP_FACTOR,
+        num_queries: int = DEFAULT_NUM_QUERIES,
+        fri_arity: int = DEFAULT_ARITY,
+        max_remainder_length: int = DEFAULT_MAX_REMAINDER_LENGTH,
+        max_remainder_degree: int = DEFAULT_MAX_REMAINDER_DEGREE,
+        grinding_bits: int = 0,
+        transcript: int = TRANSCRIPT_SHAKE256,
+    ) -> None:
+        self.blowup_factor: int = blowup_factor
+        self.num_queries: int = num_queries
+        self.fri_arity: int = fri_arity
+        self.max_remainder_length: int = max_remainder_length
+        self.max_remainder_degree: int = max_remainder_degree
+        self.grinding_bits: int = grinding_bits
+        self.transcript: int = transcript
+
+    def validate(self, trace_length: Optional[int] = None) -> None:
+        """
+        Raises ValueError if these parameters cannot be used for a trace of this length
+        (without one, only the checks that do not depend on the trace are made).
+        """
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if type(value) is not int:
+                raise ValueError(f"Parameter {name} must be an integer")
+            if not 0 <= value <= MAX_PARAMETER:
+                raise ValueError(f"Parameter {name} must be in [0, {MAX_PARAMETER}], got {value}")
+        b = self.blowup_factor
+        if b < 2 or b & (b - 1) != 0:
+            raise ValueError(f"Blowup factor must be a power of two >= 2, got {b}")
+        lde_length = (trace_length or 1) * b
+        if lde_length.bit_length() - 1 > MAX_LOG_DOMAIN:
+            raise ValueError(f"LDE of {trace_length or 1} * {b} points does not fit in the field")
+        if self.num_queries < 1:
+            raise ValueError(f"At least one query is needed, got {self.num_queries}")
+        if self.num_queries > (lde_length if trace_length is not None else 1 << MAX_LOG_DOMAIN):
+            raise ValueError(f"More queries ({self.num_queries}) than LDE points")
+        if self.fri_arity not in SUPPORTED_ARITIES:
+            raise ValueError(f"Unsupported FRI arity {self.fri_arity}, expected one of {SUPPORTED_ARITIES}")
+        if self.max_remainder_length < 1 or self.max_remainder_degree < 0:
+            raise ValueError("FRI remainder limits must be positive")
+        if not 0 <= self.grinding_bits <= MAX_GRINDING_BITS:
+            raise ValueError(f"Grinding bits must be in [0, {MAX_GRINDING_BITS}], got {self.grinding_bits}")
+        if self.transcript not in TRANSCRIPTS.values():
+            raise ValueError(f"Unknown transcript {self.transcript}, expected one of {sorted(TRANSCRIPTS.values())}")
+
+    def to_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> StarkParameters:
+        """Inverse of to_dict; every field must be present, and nothing else."""
+        if not isinstance(data, dict) or set(data) != set(cls.FIELDS):
+            raise ValueError(f"Proof parameters must have exactly the fields {cls.FIELDS}")
+        parameters = cls(**data)
+        parameters.validate()
+        return parameters
+
+    def to_bytes(self) -> bytes:
+        """Encoding absorbed into the Fiat-Shamir transcript."""
+        return encode_elements(getattr(self, name) for name in self.FIELDS)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, StarkParameters) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value}" for name, value in self.to_dict().items())
+        return f"StarkParameters({fields})"
+
+
+class CostEstimate:
+    """
+    Predicted soundness and costs of proving one AIR with some parameters.
+
+    security_bits: Conjectured soundness, min(query_bits, field_bits).
+    query_bits: num_queries * log2(blowup) + grinding_bits.
+    field_bits: log2(P / LDE size), the limit set by drawing challenges from GF(P).
+    proof_size: Expected bytes of hashes, field elements and nonce in the proof. Shared
+        Merkle nodes depend on the query indices, so one proof may differ from it by
+        about 15% with few queries (the mean over many proofs is within a few percent).
+    prover_cost, verifier_cost: Relative work, in SHA-256 call equivalents.
+    """
+
+    def __init__(
+        self,
+        security_bits: float,
+        query_bits: float,
+        field_bits: float,
+        proof_size: int,
+        prover_cost: float,
+        verifier_cost: float,
+    ) -> None:
+        self.security_bits: float = security_bits
+        self.query_bits: float = query_bits
+        self.field_bits: float = field_bits
+        self.proof_size: int = proof_size
+        self.prover_cost: float = prover_cost
+        self.verifier_cost: float = verifier_cost
+
+    def __repr__(self) -> str:
+        return (
+            f"CostEstimate(security_bits={self.security_bits:.1f}, proof_size={self.proof_size}, "
+            f"prover_cost={self.prover_cost:.0f}, verifier_cost={self.verifier_cost:.0f})"
+        )
+
+
+def _missed(positions: int, covered: int, queries: int, distinct: bool) -> float:
+    """
+    Probability that none of `queries` uniform draws among `positions` lands in a
+    given set of `covered` positions; draws are without replacement if `distinct`.
+    """
+    if not distinct:
+        return (1 - covered / positions) ** queries
+    missed = 1.0
+    for i in range(min(queries, positions)):
+        missed *= max(0.0, 1 - covered / (positions - i))
+    return missed
+
+
+def _touched(width: int, positions: int, queries: int, span: int, distinct: bool) -> float:
+    """
+    Expected number of nodes hit among `width` nodes splitting `positions` query
+    positions evenly, when every query opens `span` consecutive positions.
+    """
+    covered = min(positions, positions // width + span - 1)
+    return width * (1 - _missed(positions, covered, queries, distinct))
+
+
+def _multiproof_hashes(num_leaves: int, positions: int, queries: int, span: int, distinct: bool) -> float:
+    """
+    Expected siblings in a multi-proof of the leaves hit by `queries` (see _touched):
+    on every level, each touched pair of nodes contributes the member that was
+    not touched itself.
+    """
+    total = 0.0
+    width = num_leaves
+    while width > 1:
+        total += 2 * _touched(width // 2, positions, queries, span, distinct)
+        total -= _touched(width, positions, queries, span, distinct)
+        width //= 2
+    return total
+
+
+def _leaf_hashes(leaf_bytes: int) -> int:
+    """SHA-256 calls (64-byte blocks) to hash one leaf."""
+    return max(1, math.ceil(leaf_bytes / 64))
+
+
+def estimate(
+    parameters: StarkParameters, trace_width: int, trace_length: int, constraint_degree: int
+) -> CostEstimate:
+    """
+    Predicts soundness, proof size and relative costs without running anything.
+    The trace width also stands in for the number of constraints.
+    """
+    parameters.validate(trace_length)
+    n, w, q = trace_length, trace_width, parameters.num_queries
+    b = parameters.blowup_factor
+    lde_length = n * b
+    log_lde = math.log2(lde_length)
+    segments = CompositionSegments(n, constraint_degree)
+    eval_length = segments.evaluation_length(lde_length)
+    arities = layer_arities(
+        lde_length, n, parameters.fri_arity, parameters.max_remainder_length, parameters.max_remainder_degree
+    )
+    remainder = remainder_degree_bound(n, arities)
+
+    query_bits = q * math.log2(b) + parameters.grinding_bits
+    field_bits = math.log2(FieldElement.P) - log_lde
+
+    # FRI layers: (length, arity); at most one opened leaf per query
+    layers: List[Tuple[int, int]] = []
+    length = lde_length
+    for arity in arities:
+        layers.append((length, arity))
+        length //= arity
+
+    # Proof: two trace rows and one composition row per query, one coset per FRI leaf hit.
+    # The SHAKE-256 transcript draws distinct queries; a row and its successor are
+    # consecutive leaves of the trace tree, and FRI leaves split the LDE positions evenly.
+    distinct = parameters.transcript == TRANSCRIPT_SHAKE256
+    elements = q * (2 * w + segments.count) + remainder
+    elements += sum(_touched(m // k, lde_length, q, 1, distinct) * k for m, k in layers)
+    hashes = 2 + len(layers)  # roots
+    hashes += _multiproof_hashes(lde_length, lde_length, q, 2, distinct)
+    hashes += _multiproof_hashes(lde_length, lde_length, q, 1, distinct)
+    hashes += sum(_multiproof_hashes(m // k, lde_length, q, 1, distinct) for m, k in layers)
+    proof_size = round(elements * ELEMENT_SIZE + hashes * MerkleTree.HASH_SIZE + NONCE_SIZE)
+
+    # Prover: NTTs, constraint evaluation and FRI folding (vectorized), then all Merkle trees
+    field_ops = w * (n * math.log2(n) + lde_length * log_lde)
+    if eval_length > lde_length:
+        field_ops += w * eval_length * math.log2(eval_length)
+    field_ops += eval_length * w * constraint_degree
+    field_ops += eval_length * math.log2(eval_length) + segments.count * lde_length * log_lde
+    field_ops += sum(m * math.log2(k) for m, k in layers)
+    tree_hashes = lde_length * (_leaf_hashes(w * ELEMENT_SIZE) + _leaf_hashes(segments.count * ELEMENT_SIZE) + 2)
+    tree_hashes += sum(m // k * (_leaf_hashes(k * ELEMENT_SIZE) + 1) for m, k in layers)
+    prover_cost = field_ops * VECTOR_OP_COST + tree_hashes + 2 ** parameters.grinding_bits
+
+    # Verifier: every opened path, per-query constraints, coset points and remainder (scalar),
+    # the folds (vectorized over the queries of a layer), and the nonce
+    path_hashes = 3 * q * log_lde + sum(q * math.log2(m // k) for m, k in layers)
+    scalar_ops = q * (w * constraint_degree + segments.count + sum(math.log2(m) for m, _ in layers) + remainder)
+    fold_ops = q * sum(k * math.log2(k) for _, k in layers)
+    verifier_cost = path_hashes + scalar_ops * SCALAR_OP_COST + fold_ops * VECTOR_OP_COST + 1
+
+    return CostEstimate(
+        security_bits=min(query_bits, field_bits),
+        query_bits=query_bits,
+        field_bits=field_bits,
+        proof_size=proof_size,
+        prover_cost=prover_cost,
+        verifier_cost=verifier_cost,
+    )
+
+
+def choose_parameters(
+    trace_width: int,
+    trace_length: int,
+    constraint_degree: int,
+    security_bits: float,
+    objective: str = "proof_size",
+) -> Tuple[StarkParameters, CostEstimate]:
+    """
+    Cheapest parameters reaching `security_bits` of conjectured soundness.
+    objective: what "cheapest" minimizes, one of OBJECTIVES (proof_size,
+    prover or verifier cost); ties go to the lower prover cost.
+    For each blowup, arity and grinding level, the query count is the
+    smallest one reaching the target. Grinding is limited to half of the
+    target, so that most of the soundness still comes from the queries.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective}, expected one of {OBJECTIVES}")
+    key = {
+        "proof_size": lambda e: (e.proof_size, e.prover_cost),
+        "prover": lambda e: (e.prover_cost, e.proof_size),
+        "verifier": lambda e: (e.verifier_cost, e.prover_cost),
+    }[objective]
+
+    best: List[Tuple[StarkParameters, CostEstimate]] = []
+    for blowup in CANDIDATE_BLOWUPS:
+        if (trace_length * blowup).bit_length() - 1 > MAX_LOG_DOMAIN:
+            continue
+        for grinding_bits in CANDIDATE_GRINDING_BITS:
+            if grinding_bits > security_bits / 2:
+                continue
+            num_queries = max(1, math.ceil((security_bits - grinding_bits) / math.log2(blowup)))
+            if num_queries > trace_length * blowup:
+                continue
+            for arity in SUPPORTED_ARITIES:
+                parameters = StarkParameters(
+                    blowup_factor=blowup, num_queries=num_queries, fri_arity=arity, grinding_bits=grinding_bits
+                )
+                result = estimate(parameters, trace_width, trace_length, constraint_degree)
+                if result.security_bits >= security_bits:
+                    best.append((parameters, result))
+
+    if not best:
+        top = math.log2(FieldElement.P) - math.log2(trace_length * CANDIDATE_BLOWUPS[0])
+        raise ValueError(
+            f"No parameters reach {security_bits} bits: GF(P) allows at most {top:.1f} bits for {trace_length} steps"
+        )
+    return min(best, key=lambda candidate: key(candidate[1]))
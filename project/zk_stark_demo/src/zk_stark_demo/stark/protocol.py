@@ -0,0 +1,20 @@
+# Version of the proof layout and commitment encoding.
+# Bumped whenever prover and verifier stop being compatible with older proofs:
+#   1: decimal str(...) leaves (unversioned proofs)
+#   2: canonical 4-byte little-endian leaves, composition segments
+#   3: Merkle multi-proofs instead of one path per opened leaf
+#   4: bit-reversed FRI layers with (x, -x) pair leaves, coset-major trace rows
+#   5: configurable FRI arity (one coset of 2, 4, 8 or 16 values per leaf)
+#   6: FRI stops early and sends the remainder polynomial's coefficients
+#   7: proof-of-work nonce absorbed before the query indices
+#   8: StarkParameters stored in the proof and absorbed after the version
+#   9: transcript parameter, SHAKE-256 transcript with batched challenges by default
+PROTOCOL_VERSION = 9
+
+# Offset of the LDE coset shift * <h>; keeps it disjoint from the trace domain
+COSET_SHIFT = 3
+
+
+def version_bytes(version: int = PROTOCOL_VERSION) -> bytes:
+    """Encoding of the version absorbed first into the Fiat-Shamir transcript."""
+    return b"zk-stark-demo/v" + str(version).encode()
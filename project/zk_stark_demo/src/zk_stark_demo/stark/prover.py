@@ -1,219 +1,218 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import numpy as np
 from ..algebra.field import FieldElement
-from ..algebra.polynomial import Polynomial
+from ..algebra.field_vector import FieldVector, rows_at
 from ..algebra.merkle import MerkleTree
+from ..algebra.encoding import ELEMENT_SIZE, encode_columns
 from .trace import Trace
 from .lde import LowDegreeExtension
 from .air import AIR
 from .fri import FriProver
-from .channel import Channel
-from ..algebra.fft import ifft
+from .channel import Channel, new_channel
+from .boundary import BoundaryConstraints
+from .grinding import find_nonce, nonce_bytes
+from .keys import ProverKey
+from .parameters import StarkParameters
+from .protocol import PROTOCOL_VERSION, version_bytes
+from ..algebra.fft import coset_fft_columns, coset_ifft
 
 class StarkProver:
-    def __init__(self, air: AIR, trace_data: List[List[FieldElement]]) -> None:
+    def __init__(
+        self,
+        air: AIR,
+        trace_data: List[List[FieldElement]],
+        parameters: Optional[StarkParameters] = None,
+        low_memory_fri: bool = False,
+        grinding_workers: Optional[int] = None,
+        key: Optional[ProverKey] = None,
+    ) -> None:
+        """
+        parameters: Protocol parameters (default: the key's, or StarkParameters()).
+        key: Precomputed tables for the AIR's shape, shared by every proof of that
+            shape; built here if not given. Raises ValueError if it does not match.
+        """
+        if key is None:
+            key = ProverKey(air, parameters)
+        elif parameters is not None and parameters != key.parameters:
+            raise ValueError(f"Parameters {parameters} differ from the key's {key.parameters}")
         self.air: AIR = air
+        self.key: ProverKey = key
+        self.boundary: BoundaryConstraints = key.boundary_constraints(air)
         self.trace: Trace = Trace(trace_data, air.trace_width())
-        self.channel: Channel = Channel()
+        if self.trace.length != key.trace_length:
+            raise ValueError(f"Trace has {self.trace.length} steps, the AIR {key.trace_length}")
+        self.parameters: StarkParameters = key.parameters
+        # Refold FRI layers at query time instead of keeping them (same proof, lower peak memory)
+        self.low_memory_fri: bool = low_memory_fri
+        # Processes searching the proof-of-work nonce (default: one per CPU)
+        self.grinding_workers: Optional[int] = grinding_workers
+        self.channel: Channel = new_channel(self.parameters.transcript)
+        # Bind the protocol version and parameters to every challenge
+        self.channel.send(version_bytes())
+        self.channel.send(self.parameters.to_bytes())
         
     def prove(self) -> Dict[str, Any]:
         # 1. Low Degree Extension
-        # Calculate required blowup
-        # Degree of constraints C(x) is roughly trace_length * constraint_degree
-        # We need LDE > Degree.
-        # So blowup * trace_length > trace_length * constraint_degree
-        # blowup > constraint_degree
-        
-        c_degree = self.air.constraint_degree()
-        min_blowup = c_degree + 1
-        
-        # Power of 2
-        blowup_factor = 4
-        while blowup_factor < min_blowup:
-            blowup_factor *= 2
+        # The blowup does not depend on the constraints: high-degree ones are handled
+        # by splitting the composition polynomial into segments of degree < N (see step 5).
+        key = self.key
+        blowup_factor = self.parameters.blowup_factor
+        # Q's size follows the highest constraint degree actually declared
+        segments = key.segments
             
-        lde = LowDegreeExtension(self.trace, blowup_factor)
+        lde = LowDegreeExtension(self.trace, blowup_factor, key.domain_lde)
         
         # 2. Commit to Trace
-        lde_rows: List[List[FieldElement]] = []
-        for i in range(lde.lde_length):
-            row = [lde.lde_evaluations[c][i] for c in range(self.trace.width)]
-            lde_rows.append(row)
-            
-        trace_tree = self.generate_merkle_tree(lde_rows)
+        # Rows are committed in coset-major order (see LowDegreeExtension.commitment_position)
+        trace_tree = self.generate_merkle_tree(lde.to_commitment_order(lde.lde_evaluations))
         self.channel.send(trace_tree.root)
         
         # 3. Get Constraint Coefficients (Alpha)
-        dummy_step: List[FieldElement] = [FieldElement(0)] * self.air.trace_width()
-        constraints = self.air.evaluate_transition_constraints(dummy_step, dummy_step)
-        num_constraints = len(constraints)
-        
-        alphas: List[FieldElement] = [self.channel.receive_random_field_element() for _ in range(num_constraints)]
-        
-        # Boundary coefficients
-        boundary_constraints = self.air.get_boundary_constraints()
-        betas: List[FieldElement] = [self.channel.receive_random_field_element() for _ in boundary_constraints]
-        
-        # 4. Compute Composition Polynomial Evaluations on LDE Domain
-        composition_evals: List[FieldElement] = []
-        domain_lde = lde.domain_lde
-        
-        g_trace = FieldElement.generator_of_order(self.trace.length)
-        g_inv = g_trace.inv() # g^{N-1}
-        
+        # Constraint k enters Q as (alpha_k + alpha_adj_k * x^{e_k}) * C_k(x) / Z(x),
+        # where x^{e_k} lifts its degree d_k to the common bound.
+        # All of them and the boundary coefficients (one per constrained register)
+        # are drawn in one batch: alpha_0, alpha_adj_0, alpha_1, ..., then the betas.
+        num_constraints = key.num_constraints
+        boundary = self.boundary
+        challenges = self.channel.receive_random_field_elements(2 * num_constraints + boundary.num_registers)
+        alphas: List[FieldElement] = challenges[0:2 * num_constraints:2]
+        alphas_adj: List[FieldElement] = challenges[1:2 * num_constraints:2]
+        betas: List[FieldElement] = challenges[2 * num_constraints:]
+        adjustments: List[int] = key.adjustments
+        
+        # 4. Compute Composition Polynomial Evaluations
+        # Q(x) has degree < segments.count * N, which may exceed the LDE, so it is
+        # evaluated on a coset big enough to interpolate it (the LDE itself when possible).
         lde_length = lde.lde_length
-        for i in range(lde_length):
-            x = domain_lde[i]
-            current_state = lde_rows[i]
-            
-            next_idx = (i + blowup_factor) % lde_length
-            next_state = lde_rows[next_idx]
-            
-            # --- Transition Constraints ---
-            constraints_val = self.air.evaluate_transition_constraints(current_state, next_state)
-            
-            # Z_trans(x) = (x^N - 1) / (x - g^{N-1})
-            numerator_z = x.pow(self.trace.length) - FieldElement(1)
-            denominator_z = x - g_inv
-            z_trans_x = numerator_z / denominator_z
+        eval_length = key.eval_length
+        eval_domain: FieldVector = key.eval_domain
+        
+        if eval_length == lde_length:
+            current_cols: List[FieldVector] = lde.lde_evaluations
+        else:
+            # Transient evaluations of the trace on the larger coset (not committed)
+            current_cols = coset_fft_columns(lde.trace_coefficients, lde.shift, eval_length)
+        
+        # --- Transition Constraints ---
+        # The next trace step of evaluation point i is point i + eval_length / N
+        step = eval_length // self.trace.length
+        next_cols: List[FieldVector] = [col.roll(-step) for col in current_cols]
+        constraint_cols = self.air.evaluate_transition_constraints_batch(current_cols, next_cols)
+        
+        if constraint_cols is None:
+            # Row-wise fallback; the results are gathered into one column per constraint.
+            table = np.stack([col.data for col in current_cols], axis=1).tolist()
+            constraint_rows: List[List[int]] = []
+            for i in range(eval_length):
+                row = [FieldElement(v) for v in table[i]]
+                next_row = [FieldElement(v) for v in table[(i + step) % eval_length]]
+                constraints_val = self.air.evaluate_transition_constraints(row, next_row)
+                constraint_rows.append([c.val for c in constraints_val])
+            table = np.array(constraint_rows, dtype=np.uint64).reshape(eval_length, num_constraints)
+            constraint_cols = [FieldVector(table[:, k].copy()) for k in range(num_constraints)]
+        
+        # x^e over the coset, once per distinct adjustment exponent
+        adjustment_powers: Dict[int, FieldVector] = key.adjustment_powers
+        term_transition = FieldVector.zeros(eval_length)
+        for k in range(num_constraints):
+            multiplier = adjustment_powers[adjustments[k]] * alphas_adj[k] + alphas[k]
+            term_transition = term_transition + constraint_cols[k] * multiplier
+        
+        # 1 / Z_trans(x) over the whole evaluation coset
+        term_transition = term_transition * key.transition_inverses
+        
+        # --- Boundary Constraints ---
+        term_boundary = boundary.evaluate_over_domain(current_cols, eval_domain, betas, key.boundary_inverses)
             
-            if z_trans_x == FieldElement(0):
-                 z_trans_x = FieldElement(1) 
+        composition_evals: FieldVector = term_transition + term_boundary
+        
+        # 5. Interpolate Q(x) and split it into segments Q_j of degree < N
+        # Coset IFFT: evaluations on shift * <w> -> coefficients of Q
+        coeffs_q = coset_ifft(composition_evals, lde.shift)
+        segment_coeffs: List[FieldVector] = segments.split(coeffs_q)
+        
+        # Extend every segment to the LDE and commit them together, one leaf per LDE point
+        segment_evals: List[FieldVector] = coset_fft_columns(segment_coeffs, lde.shift, lde_length)
+        
+        composition_tree = self.generate_merkle_tree(lde.to_commitment_order(segment_evals))
+        self.channel.send(composition_tree.root)
+        
+        # 6. FRI on a random combination of the segments, sum_j gamma_j * Q_j (degree < N)
+        gammas: List[FieldElement] = self.channel.receive_random_field_elements(segments.count)
+        
+        fri_evals = FieldVector.zeros(lde_length)
+        for j in range(segments.count):
+            fri_evals = fri_evals + segment_evals[j] * gammas[j]
+        
+        # FRI on the full domain, for degree < N like every segment
+        fri_prover = FriProver(
+            polynomial=None,
+            domain=key.fri_domain,
+            values=fri_evals,
+            arity=self.parameters.fri_arity,
+            degree_bound=self.trace.length,
+            max_remainder_length=self.parameters.max_remainder_length,
+            max_remainder_degree=self.parameters.max_remainder_degree,
+            low_memory=self.low_memory_fri,
+            x0_inv=key.fri_x0_inv,
+        )
+        fri_commitments, fri_remainder = fri_prover.generate_proof(self.channel)
+        
+        # 7. Proof of work on the transcript so far, then the queries
+        pow_nonce = find_nonce(self.channel.state, self.parameters.grinding_bits, self.grinding_workers)
+        self.channel.send(nonce_bytes(pow_nonce))
+        
+        # 8. Construct Proof (distinct indices with the SHAKE-256 transcript)
+        indices: List[int] = self.channel.receive_query_indices(self.parameters.num_queries, lde.lde_length)
             
-            term_transition = FieldElement(0)
-            for k in range(num_constraints):
-                term_transition = term_transition + alphas[k] * constraints_val[k]
-            
-            term_transition = term_transition / z_trans_x
-            
-            # --- Boundary Constraints ---
-            term_boundary = FieldElement(0)
-            for k, (step, reg, val) in enumerate(boundary_constraints):
-                t_val = current_state[reg]
-                x_k = g_trace.pow(step)
-                
-                num_b = t_val - val
-                den_b = x - x_k
-                
-                term_boundary = term_boundary + betas[k] * (num_b / den_b)
-                
-            q_x = term_transition + term_boundary
-            composition_evals.append(q_x)
-            
-        # 5. Run FRI on this Composition Polynomial
-        # 5. Interpolate Q(x)
-        # The degree of Q(x) is approximately (constraint_degree - 1) * trace_length.
-        # For linear constraints (deg=1), Q(x) is roughly trace_length (due to Z(x) division).
-        # For deg=2, Q(x) is ~ 2N - N = N.
-        # Generally we need enough points to uniquely determine Q(x).
-        
-        c_degree = self.air.constraint_degree()
-        # Q(x) = C(T) / Z(x). Deg(C) = deg_c * (N-1). Deg(Z) = N-1.
-        # Deg(Q) = (deg_c - 1) * (N-1).
-        # We need at least Deg(Q) + 1 points.
-        # If deg_c = 1, we need 0+1 = 1 point? (Constant). 
-        # But effectively we use trace_length to be safe and cover Z(x) quirks.
-        
-        target_degree = max(self.trace.length, (c_degree - 1) * self.trace.length)
-        # Ensure we don't exceed LDE domain
-        if target_degree > lde_length:
-            raise ValueError(f"Constraint degree {c_degree} too high for blowup factor")
-            
-
-        # 5. Interpolate Q(x)
-        # We need to recover the coefficients of Q(x) from its evaluations.
-        # domain_lde is a coset: shift * <h>, size = blowup * N
-        # We want to pick a subset of points that forms a coset of a smaller subgroup to use IFFT.
-        
-        # Determine strict degree bound
-        expected_degree = (c_degree - 1) * self.trace.length + (self.trace.length - 1)
-        # Actually Q * Z = C. Deg(Q) = Deg(C) - Deg(Z) = c_deg * (N-1) - (N-1) = (c_deg-1)*(N-1).
-        # For c_deg=1, Deg(Q) = 0 (Constant??). 
-        # Wait, strictly speaking for AIR constraints:
-        # C(x) has degree roughly deg * N.
-        # Z(x) has degree N.
-        # Q(x) has degree (deg-1) * N.
-        
-        # We need a domain size usually >= degree + 1.
-        # We'll use the smallest power of 2 that covers the degree, derived from our available blowup.
-        
-        # For this demo, let's assume we can use N evaluations if degree <= N-1 (deg=1 or 2 constraints typically fine).
-        # If we need more, we decrease stride.
-        
-        needed_len = self.trace.length
-        while needed_len <= expected_degree:
-             needed_len *= 2
-             
-        stride = lde_length // needed_len
-        
-        subset_vals = composition_evals[::stride]
-        
-        # These evaluations are on the domain: shift * h^{0}, shift * h^{stride}, ...
-        # Let H = h^stride. This is a generator of order `needed_len`.
-        # Points are s, sH, sH^2... (Coset)
-        
-        subgroup_generator = lde.h.pow(stride)
-        
-        # 1. Coset IFFT:
-        # P(z) = Q(s * z). We have evaluations of P at 1, H, H^2...
-        # coeffs_P = ifft(vals, H)
-        coeffs_p = ifft(subset_vals, subgroup_generator)
-        
-        # 2. Recover Q(x)
-        # Q(x) = P(x/s). If P(z) = sum a_i z^i, Q(x) = sum a_i s^{-i} x^i
-        # Scale coefficients by s^{-i}
-        s_inv = lde.shift.inv()
-        current_s_inv = FieldElement(1)
-        coeffs_q = []
-        for c in coeffs_p:
-            coeffs_q.append(c * current_s_inv)
-            current_s_inv = current_s_inv * s_inv
-            
-        q_poly = Polynomial(coeffs_q)
-        
-        # 6. FRI
-        fri_prover = FriProver(q_poly, domain_lde, composition_evals) # Use full domain for FRI
-        fri_commitments, final_const = fri_prover.generate_proof(self.channel)
-        
-        # 7. Construct Proof
-        num_queries = 10
-        indices: List[int] = []
-        for _ in range(num_queries):
-            idx = self.channel.receive_random_int(0, lde.lde_length)
-            indices.append(idx)
-            
-        fri_layer_proofs = fri_prover.query_phase(indices)
+        fri_layer_proofs, fri_multiproofs = fri_prover.query_phase(indices)
+        
+        # Only the queried rows leave the NumPy columns
+        next_indices: List[int] = [(idx + blowup_factor) % lde.lde_length for idx in indices]
+        rows = lde.get_rows_at(indices)
+        next_rows = lde.get_rows_at(next_indices)
+        segment_rows = rows_at(segment_evals, indices)
         
         trace_queries: List[Dict[str, Any]] = []
-        for idx in indices:
-             row_val = lde_rows[idx]
-             path = trace_tree.get_authentication_path(idx)
-             
-             next_idx = (idx + blowup_factor) % lde.lde_length
-             next_row_val = lde_rows[next_idx]
-             next_path = trace_tree.get_authentication_path(next_idx)
-             
+        trace_opened: List[int] = []
+        composition_opened: List[int] = []
+        for idx, next_idx, row, next_row, segment_row in zip(indices, next_indices, rows, next_rows, segment_rows):
              trace_queries.append({
                  'idx': idx,
-                 'val': row_val,
-                 'path': path,
+                 'val': row,
                  'next_idx': next_idx,
-                 'next_val': next_row_val,
-                 'next_path': next_path
+                 'next_val': next_row,
+                 'composition_val': segment_row
              })
+             position = LowDegreeExtension.commitment_position(idx, self.trace.length, blowup_factor)
+             next_position = LowDegreeExtension.commitment_position(next_idx, self.trace.length, blowup_factor)
+             trace_opened.extend((position, next_position))
+             composition_opened.append(position)
+        
+        # One multi-proof per tree for all queried rows (shared upper path nodes are sent once)
+        trace_multiproof: List[bytes] = trace_tree.open_many(trace_opened)
+        composition_multiproof: List[bytes] = composition_tree.open_many(composition_opened)
 
         proof: Dict[str, Any] = {
+            'version': PROTOCOL_VERSION,
             'trace_root': trace_tree.root,
+            'composition_root': composition_tree.root,
             'fri_commitments': fri_commitments,
-            'fri_final': final_const,
+            'fri_remainder': fri_remainder,
             'fri_layer_proofs': fri_layer_proofs,
+            'fri_multiproofs': fri_multiproofs,
+            'pow_nonce': pow_nonce,
             'trace_queries': trace_queries,
+            'trace_multiproof': trace_multiproof,
+            'composition_multiproof': composition_multiproof,
+            'parameters': self.parameters,
             'public_inputs': self.air.get_public_inputs()
         }
         
         return proof
 
-    def generate_merkle_tree(self, rows: List[List[FieldElement]]) -> MerkleTree:
-        # Helper to commit to list of lists
-        data: List[bytes] = [str(r).encode() for r in rows]
-        return MerkleTree(data)
+    def generate_merkle_tree(self, columns: List[FieldVector]) -> MerkleTree:
+        # One leaf per row across all columns, hashed from the canonical row-major buffer
+        buffer = encode_columns(columns)
+        return MerkleTree.from_buffer(buffer, ELEMENT_SIZE * len(columns))
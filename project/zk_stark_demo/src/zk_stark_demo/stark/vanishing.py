@@ -0,0 +1,56 @@
+from __future__ import annotations
+from typing import List, Optional, Union
+import numpy as np
+from ..algebra.field import FieldElement
+from ..algebra.field_vector import FieldVector, as_field_vector, batch_inverse
+
+
+class TransitionVanishingPolynomial:
+    """
+    Z(x) = (x^N - 1) / (x - g^{N-1})
+
+    Vanishes on every step of the trace domain <g> except the last one,
+    which has no successor, so transition constraints are not enforced there.
+    The prover and verifier only ever need 1 / Z(x) = (x - g^{N-1}) / (x^N - 1).
+    """
+
+    def __init__(self, trace_length: int) -> None:
+        self.trace_length: int = trace_length
+        self.g: FieldElement = FieldElement.generator_of_order(trace_length)
+        self.last_step: FieldElement = self.g.inv()  # g^{N-1}
+
+    def evaluate(self, x: FieldElement) -> FieldElement:
+        return (x.pow(self.trace_length) - FieldElement(1)) / (x - self.last_step)
+
+    def inverse_at(self, xs: Union[List[FieldElement], FieldVector]) -> FieldVector:
+        """1 / Z(x) for a handful of points (verifier queries), with a single inversion."""
+        xs = as_field_vector(xs)
+        inverses = batch_inverse(xs.pow(self.trace_length) - FieldElement(1))
+        result = (xs - self.last_step) * inverses
+        # As in inverse_over_coset: 1/Z = 1 on the trace domain, where Z is undefined
+        result.data[inverses.data == 0] = 1
+        return result
+
+    def inverse_over_coset(
+        self, shift: FieldElement, lde_length: int, domain: Optional[FieldVector] = None
+    ) -> FieldVector:
+        """
+        1 / Z(x) for every x in the coset shift * <h>, |<h>| = lde_length.
+
+        x_i^N = shift^N * (h^N)^i and h^N has order blowup = lde_length / N,
+        so x^N only takes `blowup` distinct values (periodic in i). Those are
+        computed and inverted once, then tiled over the whole domain.
+        """
+        blowup = lde_length // self.trace_length
+        h = FieldElement.generator_of_order(lde_length)
+        if domain is None:
+            domain = FieldVector.powers(h, lde_length, start=shift)
+
+        power_table = FieldVector.powers(h.pow(self.trace_length), blowup, start=shift.pow(self.trace_length))
+        inv_table = batch_inverse(power_table - FieldElement(1))
+
+        periodic = FieldVector(np.tile(inv_table.data, self.trace_length))
+        result = (domain - self.last_step) * periodic
+        # If x^N = 1 the point lies on the trace domain; keep 1/Z = 1 there, as Z is undefined
+        result.data[np.tile(power_table.data == 1, self.trace_length)] = 1
+        return result
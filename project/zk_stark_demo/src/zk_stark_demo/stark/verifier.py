@@ -1,143 +1,234 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import numpy as np
 from ..algebra.field import FieldElement
+from ..algebra.field_vector import FieldVector
 from ..algebra.merkle import MerkleTree
-from .channel import Channel
-from .fri_verifier import FriVerifier, FriProof
+from ..algebra.encoding import encode_elements
+from .channel import Channel, new_channel
+from .fri_verifier import FriVerifier, FriProof, OpenedLayer
+from .lde import LowDegreeExtension
+from ..algebra.fft import reverse_bits_array
 from .air import AIR
+from .grinding import nonce_bytes, verify_nonce
+from .keys import VerifierKey
+from .parameters import StarkParameters, estimate
+from .protocol import PROTOCOL_VERSION, version_bytes
 
 class StarkVerifier:
-    def __init__(self, air: AIR) -> None:
+    def __init__(
+        self,
+        air: AIR,
+        parameters: Optional[StarkParameters] = None,
+        min_security_bits: Optional[float] = None,
+        key: Optional[VerifierKey] = None,
+        accept_proof_parameters: bool = False,
+    ) -> None:
+        """
+        parameters: The only parameters accepted (default: the key's, or StarkParameters()).
+        min_security_bits: The least conjectured soundness accepted (see parameters.estimate).
+            With accept_proof_parameters, it defaults to that of StarkParameters() for this AIR.
+        key: Precomputed data for the AIR's shape, shared by every verifier of that
+            shape; only proofs made with the key's parameters are accepted.
+            Without one, a key is built from the first proof's parameters.
+        accept_proof_parameters: Accept any parameters a proof declares instead,
+            as long as they reach min_security_bits.
+        """
+        if key is not None:
+            if parameters is not None and parameters != key.parameters:
+                raise ValueError(f"Parameters {parameters} differ from the key's {key.parameters}")
+            parameters = key.parameters
+        elif parameters is None and not accept_proof_parameters:
+            parameters = StarkParameters()
+        if min_security_bits is None:
+            min_security_bits = 0
+            if parameters is None:
+                # The prover picks the parameters: they must be at least as strong as the defaults
+                shape = (air.trace_width(), air.trace_length(), max(air.transition_constraint_degrees()))
+                min_security_bits = estimate(StarkParameters(), *shape).security_bits
         self.air: AIR = air
-        self.channel: Channel = Channel()
+        self.parameters: Optional[StarkParameters] = parameters
+        self.min_security_bits: float = min_security_bits
+        self.key: Optional[VerifierKey] = key
         
     def verify(self, proof: Dict[str, Any]) -> bool:
+        # 0. Protocol version (older proofs use another leaf encoding and layout)
+        if proof.get('version') != PROTOCOL_VERSION:
+            print(f"Unsupported proof version {proof.get('version')}, expected {PROTOCOL_VERSION}")
+            return False
+        
+        # Parameters the proof was made with: well formed, and strong enough for this verifier
+        N = self.air.trace_length()
+        parameters = proof.get('parameters')
+        if not isinstance(parameters, StarkParameters):
+            print("Proof has no parameters")
+            return False
+        try:
+            parameters.validate(N)
+        except ValueError as e:
+            print(f"Invalid proof parameters: {e}")
+            return False
+        if self.parameters is not None and parameters != self.parameters:
+            print(f"Proof parameters {parameters} differ from the expected {self.parameters}")
+            return False
+        key = self.key
+        if key is None or key.parameters != parameters:
+            key = self.key = VerifierKey(self.air, parameters)
+        try:
+            boundary = key.boundary_constraints(self.air)
+        except ValueError as e:
+            print(f"Verifier key does not match the AIR: {e}")
+            return False
+        security_bits = key.security_bits
+        if security_bits < self.min_security_bits:
+            print(f"Proof parameters give {security_bits:.1f} bits of security < {self.min_security_bits}")
+            return False
+        # A fresh transcript of the proof's kind for every proof
+        self.channel: Channel = new_channel(parameters.transcript)
+        self.channel.send(version_bytes())
+        self.channel.send(parameters.to_bytes())
+        
         # 1. Read Trace Root
         trace_root: bytes = proof['trace_root']
         self.channel.send(trace_root)
         
         # 2. Generate Alphas (Constraint Combination Coefficients)
-        dummy_step: List[FieldElement] = [FieldElement(0)] * self.air.trace_width()
-        constraints = self.air.evaluate_transition_constraints(dummy_step, dummy_step)
-        num_constraints = len(constraints)
+        # One (alpha_k, alpha_adj_k) pair per constraint, then the boundary betas, in one batch as in the prover
+        segments = key.segments
+        num_constraints = key.num_constraints
+        challenges = self.channel.receive_random_field_elements(2 * num_constraints + boundary.num_registers)
+        alphas: List[FieldElement] = challenges[0:2 * num_constraints:2]
+        alphas_adj: List[FieldElement] = challenges[1:2 * num_constraints:2]
+        betas: List[FieldElement] = challenges[2 * num_constraints:]
+        adjustments: List[int] = key.adjustments
         
-        alphas: List[FieldElement] = [self.channel.receive_random_field_element() for _ in range(num_constraints)]
-        
-        # Boundary coefficients
-        boundary_constraints = self.air.get_boundary_constraints()
-        betas: List[FieldElement] = [self.channel.receive_random_field_element() for _ in boundary_constraints]
+        # Composition segments Q_j and their FRI combination coefficients
+        composition_root: bytes = proof['composition_root']
+        self.channel.send(composition_root)
+        gammas: List[FieldElement] = self.channel.receive_random_field_elements(segments.count)
         
         # 3. Verify FRI
         fri_proof: FriProof = {
+            'arity': parameters.fri_arity,
             'commitments': proof['fri_commitments'],
-            'final_constant': proof['fri_final'],
-            'layer_proofs': proof['fri_layer_proofs']
+            'remainder': proof['fri_remainder'],
+            'layer_proofs': proof['fri_layer_proofs'],
+            'multiproofs': proof['fri_multiproofs']
         }
         
-        fri_verifier = FriVerifier(fri_proof, self.channel)
+        fri_verifier = FriVerifier(
+            fri_proof, self.channel, parameters.max_remainder_length, parameters.max_remainder_degree
+        )
         
         # Domain Params
-        N = self.air.trace_length()
+        blowup_factor = parameters.blowup_factor
+        lde_length = key.lde_length
+        shift = key.shift
         
-        # Calculate expected blowup
-        c_degree = self.air.constraint_degree()
-        min_blowup = c_degree + 1
-        blowup_factor = 4
-        while blowup_factor < min_blowup:
-            blowup_factor *= 2
-            
-        lde_length = N * blowup_factor
-        
-        if not fri_verifier.verify(domain_length=lde_length, domain_offset=FieldElement(3)):
+        if not fri_verifier.verify(domain_length=lde_length, domain_offset=shift, degree_bound=N):
             print("FRI Verification Failed")
             return False
             
-        # 4. Consistency Check
-        num_queries = 10
-        indices: List[int] = []
-        for _ in range(num_queries):
-            idx = self.channel.receive_random_int(0, lde_length)
-            indices.append(idx)
+        # 4. Proof of work, checked with a single hash before the queries are drawn
+        if not verify_nonce(self.channel.state, proof['pow_nonce'], parameters.grinding_bits):
+            print("Proof of work verification failed")
+            return False
+        self.channel.send(nonce_bytes(proof['pow_nonce']))
+            
+        # 5. Consistency Check
+        indices: List[int] = self.channel.receive_query_indices(parameters.num_queries, lde_length)
             
         trace_queries: List[Dict[str, Any]] = proof['trace_queries']
-        if len(trace_queries) != num_queries:
+        if len(trace_queries) != len(indices):
              print("Incorrect number of trace queries")
              return False
-             
-        # Re-derive domains
-        g = FieldElement.generator_of_order(N)
-        shift = FieldElement(3)
-        h = FieldElement.generator_of_order(lde_length)
         
-        # Check each query
+        # Verify Trace and Composition Merkle openings, one multi-proof per tree
+        trace_leaves: Dict[int, bytes] = {}
+        composition_leaves: Dict[int, bytes] = {}
         for i, q in enumerate(trace_queries):
             idx = indices[i] # Expected index
             if q['idx'] != idx:
                 print(f"Index mismatch: {q['idx']} != {idx}")
                 return False
-                
-            # Verify Trace Merkle Paths
-            row_val: List[FieldElement] = q['val']
-            # Reconstruct leaf
-            leaf_data = str(row_val).encode()
-            if not MerkleTree.verify_claim(trace_root, leaf_data, q['path'], idx):
-                 print(f"Trace Merkle verify failed at {idx}")
-                 return False
-                 
-            # Verify Next Step
-            next_idx: int = q['next_idx']
             expected_next = (idx + blowup_factor) % lde_length
-            if next_idx != expected_next:
+            if q['next_idx'] != expected_next:
                 return False
-            next_row_val: List[FieldElement] = q['next_val']
-            next_leaf = str(next_row_val).encode()
-            if not MerkleTree.verify_claim(trace_root, next_leaf, q['next_path'], next_idx):
-                 print(f"Trace Next Merkle verify failed at {next_idx}")
-                 return False
-                 
-            # Compute Q(x) from Trace Values
-            x = shift * h.pow(idx)
-            
-            # --- Transition Constraints ---
-            constraints_val = self.air.evaluate_transition_constraints(row_val, next_row_val)
-            numerator = FieldElement(0)
-            for k in range(num_constraints):
-                numerator = numerator + alphas[k] * constraints_val[k]
-                
-            # Z(x) = (x^N - 1) / (x - g^{N-1})
-            g_inv = g.inv()
-            numerator_z = x.pow(N) - FieldElement(1)
-            denominator_z = x - g_inv
-            z_x = numerator_z / denominator_z
-            
-            expected_q = numerator / z_x
-            
-            # --- Boundary Constraints ---
-            term_boundary = FieldElement(0)
-            for k, (step, reg, val) in enumerate(boundary_constraints):
-                 t_val = row_val[reg]
-                 x_k = g.pow(step)
-                 
-                 num_b = t_val - val
-                 den_b = x - x_k
-                 term_boundary = term_boundary + betas[k] * (num_b / den_b)
-            
-            expected_q = expected_q + term_boundary
-            
-            # Check against FRI value
-            layer_0_proofs = fri_proof['layer_proofs'][0]
-            found_fri_val: Optional[FieldElement] = None
-            for p in layer_0_proofs:
-                if p['idx'] == idx:
-                    found_fri_val = p['val']
-                    break
-            
-            if found_fri_val is None:
-                print("FRI proof missing index")
+            if len(q['composition_val']) != segments.count:
+                print("Incorrect number of composition segments")
                 return False
                 
-            if expected_q != found_fri_val:
-                print(f"Constraint consistency failed. Q(x) {expected_q} != FRI {found_fri_val}")
+            # Reconstruct leaves at their coset-major positions;
+            # a row opened twice must be opened with the same values
+            for point, row in ((idx, q['val']), (expected_next, q['next_val'])):
+                pos = LowDegreeExtension.commitment_position(point, N, blowup_factor)
+                leaf = encode_elements(row)
+                if trace_leaves.setdefault(pos, leaf) != leaf:
+                    print(f"Conflicting trace openings at {point}")
+                    return False
+            pos = LowDegreeExtension.commitment_position(idx, N, blowup_factor)
+            leaf = encode_elements(q['composition_val'])
+            if composition_leaves.setdefault(pos, leaf) != leaf:
+                print(f"Conflicting composition openings at {idx}")
                 return False
                 
+        if not MerkleTree.verify_many(trace_root, trace_leaves, proof['trace_multiproof'], lde_length):
+            print("Trace Merkle verify failed")
+            return False
+        if not MerkleTree.verify_many(composition_root, composition_leaves, proof['composition_multiproof'], lde_length):
+            print("Composition Merkle verify failed")
+            return False
+        
+        # From here on every query is checked at once: one column per register / segment,
+        # one entry per query, and the query points from a single power ladder
+        index_array = np.array(indices, dtype=np.int64)
+        xs = FieldVector.powers_at(key.h, index_array).scale(shift)
+        width = key.trace_width
+        current_cols = [FieldVector([q['val'][c] for q in trace_queries]) for c in range(width)]
+        next_cols = [FieldVector([q['next_val'][c] for q in trace_queries]) for c in range(width)]
+        segment_cols = [FieldVector([q['composition_val'][j] for q in trace_queries]) for j in range(segments.count)]
+        
+        # Compute Q(x) from Trace Values
+        # --- Transition Constraints ---
+        constraint_cols = self.air.evaluate_transition_constraints_batch(current_cols, next_cols)
+        if constraint_cols is None:
+            rows = [self.air.evaluate_transition_constraints(q['val'], q['next_val']) for q in trace_queries]
+            constraint_cols = [FieldVector([row[k] for row in rows]) for k in range(num_constraints)]
+        numerator = FieldVector.zeros(len(indices))
+        x_powers: Dict[int, FieldVector] = {e: xs.pow(e) for e in set(adjustments)}
+        for k in range(num_constraints):
+            multiplier = x_powers[adjustments[k]] * alphas_adj[k] + alphas[k]
+            numerator = numerator + multiplier * constraint_cols[k]
+            
+        # 1 / Z(x) for all queries with a single inversion
+        expected_q = numerator * key.vanishing.inverse_at(xs)
+        
+        # --- Boundary Constraints ---
+        expected_q = expected_q + boundary.evaluate_at([q['val'] for q in trace_queries], xs, betas)
+        
+        # --- Composition Segments ---
+        # The committed segments must recombine to Q(x) = sum_j x^{jN} Q_j(x)
+        mismatches = np.flatnonzero(segments.combine(segment_cols, xs).data != expected_q.data)
+        if len(mismatches):
+            print(f"Constraint consistency failed at {indices[mismatches[0]]}")
+            return False
+        
+        # FRI tests sum_j gamma_j * Q_j
+        fri_q = FieldVector.zeros(len(indices))
+        for j in range(segments.count):
+            fri_q = fri_q + segment_cols[j] * gammas[j]
+        
+        # Check against FRI value: layer 0 is bit-reversed, one coset per leaf
+        fri_arity = min(fri_proof['arity'], lde_length)
+        fri_layer_0 = OpenedLayer.parse(fri_proof['layer_proofs'][0], fri_arity)
+        found_fri_vals = None
+        if fri_layer_0 is not None:
+            found_fri_vals = fri_layer_0.lookup(reverse_bits_array(index_array, key.log_lde_length))
+        if found_fri_vals is None:
+            print("FRI proof missing index")
+            return False
+        if not np.array_equal(fri_q.data, found_fri_vals):
+            print("Segment combination does not match FRI layer 0")
+            return False
+                
         return True
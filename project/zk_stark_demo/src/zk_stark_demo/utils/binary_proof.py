@@ -0,0 +1,374 @@
+from __future__ import annotations
+import json
+import mmap
+import struct
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from ..algebra.encoding import ELEMENT_DTYPE, ELEMENT_SIZE
+from ..algebra.field import FieldElement
+from ..algebra.merkle import MerkleTree
+from ..stark.grinding import NONCE_SIZE
+from ..stark.parameters import MAX_PARAMETER, StarkParameters
+from ..stark.protocol import PROTOCOL_VERSION
+
+# Binary proof files:
+#
+#   magic "STKP" | format version (u8) | section count (u8)
+#   section table: count x (section id u8, offset u32, length u32), little-endian
+#   sections, each a self-contained byte range
+#
+# Inside a section, counts and indices are unsigned LEB128 varints, digests are
+# raw 32-byte strings and field elements use the commitment encoding
+# (4 bytes, little-endian, canonical). The fixed-size table lets a reader
+# jump to any section without parsing the ones before it.
+MAGIC = b"STKP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBB")
+SECTION_ENTRY = struct.Struct("<BII")
+HASH_SIZE = MerkleTree.HASH_SIZE
+
+SECTION_HEADER = 1  # protocol version, parameters, proof-of-work nonce
+SECTION_PUBLIC_INPUTS = 2  # UTF-8 JSON
+SECTION_COMMITMENTS = 3  # trace root, composition root, FRI layer roots
+SECTION_FRI_REMAINDER = 4
+SECTION_FRI_LAYERS = 5  # opened cosets and multi-proof of every FRI layer
+SECTION_TRACE_QUERIES = 6  # opened trace and composition rows
+SECTION_TRACE_MULTIPROOF = 7
+SECTION_COMPOSITION_MULTIPROOF = 8
+
+
+def encode_varint(value: int) -> bytes:
+    if value < 0:
+        raise ValueError(f"Varints are unsigned, got {value}")
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+class SectionWriter:
+    """Builds the bytes of one section."""
+
+    def __init__(self) -> None:
+        self.parts: List[bytes] = []
+
+    def varint(self, value: int) -> None:
+        self.parts.append(encode_varint(value))
+
+    def varints(self, values: List[int]) -> None:
+        self.parts.extend(encode_varint(v) for v in values)
+
+    def raw(self, data: bytes) -> None:
+        self.parts.append(bytes(data))
+
+    def hashes(self, digests: List[bytes]) -> None:
+        self.varint(len(digests))
+        for digest in digests:
+            if len(digest) != HASH_SIZE:
+                raise ValueError(f"Digest of {len(digest)} bytes, expected {HASH_SIZE}")
+            self.raw(digest)
+
+    def elements(self, values: List[Any]) -> None:
+        self.raw(np.fromiter(
+            (v.val if isinstance(v, FieldElement) else v for v in values), dtype=ELEMENT_DTYPE, count=len(values)
+        ).tobytes())
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.parts)
+
+
+class SectionReader:
+    """Reads one section from a memoryview, without copying digests or element blocks."""
+
+    def __init__(self, view: memoryview) -> None:
+        self.view: memoryview = view
+        self.pos: int = 0
+
+    def raw(self, size: int) -> memoryview:
+        if size < 0 or self.pos + size > len(self.view):
+            raise ValueError("Proof section is truncated")
+        chunk = self.view[self.pos:self.pos + size]
+        self.pos += size
+        return chunk
+
+    def varint(self) -> int:
+        view, pos = self.view, self.pos
+        value, shift = 0, 0
+        while True:
+            if pos >= len(view):
+                raise ValueError("Proof section is truncated")
+            byte = view[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                self.pos = pos
+                return value
+            shift += 7
+            if shift > 63:
+                raise ValueError("Varint is too long")
+
+    def varints(self, count: int) -> List[int]:
+        return [self.varint() for _ in range(count)]
+
+    def hashes(self) -> List[memoryview]:
+        """Digests as memoryview slices of the file (zero copy)."""
+        count = self.varint()
+        block = self.raw(count * HASH_SIZE)
+        return [block[i * HASH_SIZE:(i + 1) * HASH_SIZE] for i in range(count)]
+
+    def elements(self, count: int) -> np.ndarray:
+        """A read-only view of `count` field elements; non-canonical encodings are rejected."""
+        values = np.frombuffer(self.raw(count * ELEMENT_SIZE), dtype=ELEMENT_DTYPE)
+        if (values >= FieldElement.P).any():
+            raise ValueError("Proof holds a non-canonical field element")
+        return values
+
+    def done(self) -> None:
+        if self.pos != len(self.view):
+            raise ValueError("Proof section has trailing bytes")
+
+
+def _json_value(value: Any) -> Any:
+    """Public inputs are stored as JSON, field elements as their integer value."""
+    if isinstance(value, FieldElement):
+        return value.val
+    raise TypeError(f"Cannot store {type(value).__name__} in the public inputs")
+
+
+def _field_elements(values: np.ndarray) -> List[FieldElement]:
+    return [FieldElement(v) for v in values.tolist()]
+
+
+def encode_proof(proof: Mapping) -> bytes:
+    """The binary encoding of a proof (as produced by StarkProver.prove)."""
+    sections: Dict[int, SectionWriter] = {}
+
+    header = sections[SECTION_HEADER] = SectionWriter()
+    header.varint(proof['version'])
+    header.varints([getattr(proof['parameters'], name) for name in StarkParameters.FIELDS])
+    header.raw(proof['pow_nonce'].to_bytes(NONCE_SIZE, "little"))
+
+    public_inputs = sections[SECTION_PUBLIC_INPUTS] = SectionWriter()
+    public_inputs.raw(json.dumps(proof.get('public_inputs', {}), default=_json_value).encode())
+
+    commitments = sections[SECTION_COMMITMENTS] = SectionWriter()
+    commitments.hashes([proof['trace_root'], proof['composition_root']])
+    commitments.hashes(proof['fri_commitments'])
+
+    remainder = sections[SECTION_FRI_REMAINDER] = SectionWriter()
+    remainder.varint(len(proof['fri_remainder']))
+    remainder.elements(proof['fri_remainder'])
+
+    layers = sections[SECTION_FRI_LAYERS] = SectionWriter()
+    layers.varint(len(proof['fri_layer_proofs']))
+    if len(proof['fri_multiproofs']) != len(proof['fri_layer_proofs']):
+        raise ValueError("Every FRI layer needs one multi-proof")
+    for layer, multiproof in zip(proof['fri_layer_proofs'], proof['fri_multiproofs']):
+        arity = len(layer[0]['values']) if layer else 0
+        if any(len(q['values']) != arity for q in layer):
+            raise ValueError("FRI cosets of one layer must have the same size")
+        layers.varint(len(layer))
+        layers.varint(arity)
+        layers.varints([q['idx'] for q in layer])
+        layers.elements([v for q in layer for v in q['values']])
+        layers.hashes(multiproof)
+
+    queries = sections[SECTION_TRACE_QUERIES] = SectionWriter()
+    trace_queries = proof['trace_queries']
+    width = len(trace_queries[0]['val']) if trace_queries else 0
+    segments = len(trace_queries[0]['composition_val']) if trace_queries else 0
+    for q in trace_queries:
+        if len(q['val']) != width or len(q['next_val']) != width or len(q['composition_val']) != segments:
+            raise ValueError("Trace queries must all open rows of the same width")
+    queries.varint(len(trace_queries))
+    queries.varint(width)
+    queries.varint(segments)
+    for q in trace_queries:
+        queries.varints([q['idx'], q['next_idx']])
+    queries.elements([v for q in trace_queries for v in q['val'] + q['next_val'] + q['composition_val']])
+
+    sections[SECTION_TRACE_MULTIPROOF] = SectionWriter()
+    sections[SECTION_TRACE_MULTIPROOF].hashes(proof['trace_multiproof'])
+    sections[SECTION_COMPOSITION_MULTIPROOF] = SectionWriter()
+    sections[SECTION_COMPOSITION_MULTIPROOF].hashes(proof['composition_multiproof'])
+
+    bodies = {section_id: writer.getvalue() for section_id, writer in sections.items()}
+    offset = HEADER.size + SECTION_ENTRY.size * len(bodies)
+    table = []
+    for section_id, body in bodies.items():
+        table.append(SECTION_ENTRY.pack(section_id, offset, len(body)))
+        offset += len(body)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, len(bodies)) + b"".join(table) + b"".join(bodies.values())
+
+
+def _decode_header(reader: SectionReader) -> Dict[str, Any]:
+    version = reader.varint()
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported proof version {version}, expected {PROTOCOL_VERSION}")
+    values = reader.varints(len(StarkParameters.FIELDS))
+    if max(values) > MAX_PARAMETER:
+        raise ValueError(f"Proof parameters must be at most {MAX_PARAMETER}")
+    parameters = StarkParameters.from_dict(dict(zip(StarkParameters.FIELDS, values)))
+    nonce = int.from_bytes(reader.raw(NONCE_SIZE), "little")
+    return {'version': version, 'parameters': parameters, 'pow_nonce': nonce}
+
+
+def _decode_public_inputs(reader: SectionReader) -> Dict[str, Any]:
+    try:
+        public_inputs = json.loads(bytes(reader.raw(len(reader.view))).decode())
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Malformed public inputs: {e}")
+    return {'public_inputs': public_inputs}
+
+
+def _decode_commitments(reader: SectionReader) -> Dict[str, Any]:
+    roots = reader.hashes()
+    if len(roots) != 2:
+        raise ValueError("Proof needs a trace and a composition root")
+    return {
+        'trace_root': bytes(roots[0]),
+        'composition_root': bytes(roots[1]),
+        'fri_commitments': [bytes(root) for root in reader.hashes()],
+    }
+
+
+def _decode_fri_remainder(reader: SectionReader) -> Dict[str, Any]:
+    return {'fri_remainder': _field_elements(reader.elements(reader.varint()))}
+
+
+def _decode_fri_layers(reader: SectionReader) -> Dict[str, Any]:
+    layer_proofs: List[List[Dict[str, Any]]] = []
+    multiproofs: List[List[memoryview]] = []
+    for _ in range(reader.varint()):
+        count, arity = reader.varint(), reader.varint()
+        indices = reader.varints(count)
+        values = _field_elements(reader.elements(count * arity))
+        layer_proofs.append([
+            {'idx': idx, 'values': values[i * arity:(i + 1) * arity]} for i, idx in enumerate(indices)
+        ])
+        multiproofs.append(reader.hashes())
+    return {'fri_layer_proofs': layer_proofs, 'fri_multiproofs': multiproofs}
+
+
+def _decode_trace_queries(reader: SectionReader) -> Dict[str, Any]:
+    count, width, segments = reader.varint(), reader.varint(), reader.varint()
+    indices = reader.varints(2 * count)
+    row_size = 2 * width + segments
+    rows = reader.elements(count * row_size).reshape(count, row_size).tolist()
+    queries: List[Dict[str, Any]] = []
+    for i, row in enumerate(rows):
+        row = [FieldElement(v) for v in row]
+        queries.append({
+            'idx': indices[2 * i],
+            'val': row[:width],
+            'next_idx': indices[2 * i + 1],
+            'next_val': row[width:2 * width],
+            'composition_val': row[2 * width:],
+        })
+    return {'trace_queries': queries}
+
+
+def _decode_multiproof(key: str) -> Callable[[SectionReader], Dict[str, Any]]:
+    return lambda reader: {key: reader.hashes()}
+
+
+# Section -> decoder returning the proof fields it holds
+_DECODERS: Dict[int, Callable[[SectionReader], Dict[str, Any]]] = {
+    SECTION_HEADER: _decode_header,
+    SECTION_PUBLIC_INPUTS: _decode_public_inputs,
+    SECTION_COMMITMENTS: _decode_commitments,
+    SECTION_FRI_REMAINDER: _decode_fri_remainder,
+    SECTION_FRI_LAYERS: _decode_fri_layers,
+    SECTION_TRACE_QUERIES: _decode_trace_queries,
+    SECTION_TRACE_MULTIPROOF: _decode_multiproof('trace_multiproof'),
+    SECTION_COMPOSITION_MULTIPROOF: _decode_multiproof('composition_multiproof'),
+}
+
+# Proof field -> section holding it
+_FIELD_SECTIONS: Dict[str, int] = {
+    'version': SECTION_HEADER,
+    'parameters': SECTION_HEADER,
+    'pow_nonce': SECTION_HEADER,
+    'public_inputs': SECTION_PUBLIC_INPUTS,
+    'trace_root': SECTION_COMMITMENTS,
+    'composition_root': SECTION_COMMITMENTS,
+    'fri_commitments': SECTION_COMMITMENTS,
+    'fri_remainder': SECTION_FRI_REMAINDER,
+    'fri_layer_proofs': SECTION_FRI_LAYERS,
+    'fri_multiproofs': SECTION_FRI_LAYERS,
+    'trace_queries': SECTION_TRACE_QUERIES,
+    'trace_multiproof': SECTION_TRACE_MULTIPROOF,
+    'composition_multiproof': SECTION_COMPOSITION_MULTIPROOF,
+}
+
+
+class BinaryProof(Mapping):
+    """
+    A proof read from its binary encoding, used like the dictionary
+    StarkProver.prove returns. Opening it only checks the header and the
+    section table; each section is decoded the first time one of its fields
+    is read, and Merkle paths stay memoryview slices of the underlying buffer.
+    Raises ValueError on malformed input, when opened or when a section is decoded.
+    """
+
+    def __init__(self, buffer: Any) -> None:
+        self.view: memoryview = memoryview(buffer).cast("B")
+        if len(self.view) < HEADER.size:
+            raise ValueError("Proof file is too short")
+        magic, format_version, count = HEADER.unpack_from(self.view)
+        if magic != MAGIC:
+            raise ValueError("Not a binary proof file")
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported proof file format {format_version}, expected {FORMAT_VERSION}")
+        if len(self.view) < HEADER.size + count * SECTION_ENTRY.size:
+            raise ValueError("Proof section table is truncated")
+
+        self.sections: Dict[int, Tuple[int, int]] = {}
+        for i in range(count):
+            section_id, offset, length = SECTION_ENTRY.unpack_from(self.view, HEADER.size + i * SECTION_ENTRY.size)
+            if section_id in self.sections or offset + length > len(self.view):
+                raise ValueError(f"Malformed entry for proof section {section_id}")
+            self.sections[section_id] = (offset, length)
+        missing = set(_DECODERS) - set(self.sections)
+        if missing:
+            raise ValueError(f"Proof file lacks sections {sorted(missing)}")
+
+        self._fields: Dict[str, Any] = {}
+        # The header is tiny and rejects other protocol versions up front, like deserialize_proof
+        self._decode(SECTION_HEADER)
+
+    def _decode(self, section_id: int) -> None:
+        offset, length = self.sections[section_id]
+        reader = SectionReader(self.view[offset:offset + length])
+        self._fields.update(_DECODERS[section_id](reader))
+        reader.done()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._fields:
+            section_id: Optional[int] = _FIELD_SECTIONS.get(key)
+            if section_id is None:
+                raise KeyError(key)
+            self._decode(section_id)
+        return self._fields[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_FIELD_SECTIONS)
+
+    def __len__(self) -> int:
+        return len(_FIELD_SECTIONS)
+
+
+def load_binary_proof(filename: str) -> BinaryProof:
+    """Memory-maps a binary proof file; nothing beyond the header is read until it is used."""
+    with open(filename, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError("Proof file is empty")
+    return BinaryProof(mapped)
@@ -1,7 +1,14 @@
 from __future__ import annotations
 import json
-from typing import Any, Dict, List, Union
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Union
 from ..algebra.field import FieldElement
+from ..stark.parameters import StarkParameters
+from ..stark.protocol import PROTOCOL_VERSION
+from .binary_proof import MAGIC, encode_proof, load_binary_proof
+
+# Proof files are binary (see binary_proof.py); JSON is kept as a readable export
+PROOF_FORMATS = ("binary", "json")
 
 def serialize_proof(proof: Any) -> Any:
     """
@@ -11,11 +18,13 @@ def serialize_proof(proof: Any) -> Any:
     """
     if isinstance(proof, FieldElement):
         return proof.val
-    elif isinstance(proof, bytes):
+    elif isinstance(proof, (bytes, memoryview)):
         return proof.hex()
+    elif isinstance(proof, StarkParameters):
+        return proof.to_dict()
     elif isinstance(proof, list):
         return [serialize_proof(item) for item in proof]
-    elif isinstance(proof, dict):
+    elif isinstance(proof, Mapping):
         return {k: serialize_proof(v) for k, v in proof.items()}
     else:
         return proof
@@ -24,10 +33,18 @@ def deserialize_proof(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Converts back to internal types.
     """
+    # Older layouts are rejected up front rather than failing on a missing field
+    version = data.get('version')
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported proof version {version}, expected {PROTOCOL_VERSION}")
+
     new_proof: Dict[str, Any] = {}
+    new_proof['version'] = version
+    new_proof['parameters'] = StarkParameters.from_dict(data['parameters'])
     new_proof['trace_root'] = bytes.fromhex(data['trace_root'])
+    new_proof['composition_root'] = bytes.fromhex(data['composition_root'])
     new_proof['fri_commitments'] = [bytes.fromhex(x) for x in data['fri_commitments']]
-    new_proof['fri_final'] = FieldElement(data['fri_final'])
+    new_proof['fri_remainder'] = [FieldElement(x) for x in data['fri_remainder']]
     
     new_proof['fri_layer_proofs'] = []
     for layer in data['fri_layer_proofs']:
@@ -35,24 +52,23 @@ def deserialize_proof(data: Dict[str, Any]) -> Dict[str, Any]:
         for q in layer:
             item: Dict[str, Any] = {}
             item['idx'] = q['idx']
-            item['val'] = FieldElement(q['val'])
-            item['path'] = [bytes.fromhex(x) for x in q['path']]
-            item['partner_idx'] = q['partner_idx']
-            item['partner_val'] = FieldElement(q['partner_val'])
-            item['partner_path'] = [bytes.fromhex(x) for x in q['partner_path']]
+            item['values'] = [FieldElement(x) for x in q['values']]
             new_layer.append(item)
         new_proof['fri_layer_proofs'].append(new_layer)
+    new_proof['pow_nonce'] = int(data['pow_nonce'])
+    new_proof['fri_multiproofs'] = [[bytes.fromhex(x) for x in layer] for layer in data['fri_multiproofs']]
         
     new_proof['trace_queries'] = []
     for q in data['trace_queries']:
         item = {}
         item['idx'] = q['idx']
         item['val'] = [FieldElement(x) for x in q['val']]
-        item['path'] = [bytes.fromhex(x) for x in q['path']]
         item['next_idx'] = q['next_idx']
         item['next_val'] = [FieldElement(x) for x in q['next_val']]
-        item['next_path'] = [bytes.fromhex(x) for x in q['next_path']]
+        item['composition_val'] = [FieldElement(x) for x in q['composition_val']]
         new_proof['trace_queries'].append(item)
+    new_proof['trace_multiproof'] = [bytes.fromhex(x) for x in data['trace_multiproof']]
+    new_proof['composition_multiproof'] = [bytes.fromhex(x) for x in data['composition_multiproof']]
         
     if 'boundary_proofs' in data:
         new_proof['boundary_proofs'] = []
@@ -72,12 +88,35 @@ def deserialize_proof(data: Dict[str, Any]) -> Dict[str, Any]:
 
     return new_proof
 
-def save_proof(proofdict: Dict[str, Any], filename: str) -> None:
+def proof_format(filename: str) -> str:
+    """Format implied by a file name: JSON for .json files, binary otherwise."""
+    return "json" if filename.lower().endswith(".json") else "binary"
+
+def save_proof(proofdict: Mapping, filename: str, format: Optional[str] = None) -> None:
+    """
+    Writes a proof as binary or JSON (default: from the file name, see proof_format).
+    """
+    format = format or proof_format(filename)
+    if format not in PROOF_FORMATS:
+        raise ValueError(f"Unknown proof format {format}, expected one of {PROOF_FORMATS}")
+    if format == "binary":
+        with open(filename, 'wb') as f:
+            f.write(encode_proof(proofdict))
+        return
     json_ready = serialize_proof(proofdict)
     with open(filename, 'w') as f:
         json.dump(json_ready, f, indent=2)
         
-def load_proof(filename: str) -> Dict[str, Any]:
-    with open(filename, 'r') as f:
-        data = json.load(f)
-    return deserialize_proof(data)
+def load_proof(filename: str) -> Mapping:
+    """
+    Reads a binary proof, memory-mapped and decoded lazily (see binary_proof.BinaryProof).
+    JSON is an export format only: such files are refused (deserialize_proof still
+    converts an exported dictionary in memory).
+    """
+    with open(filename, 'rb') as f:
+        magic = f.read(len(MAGIC))
+    if magic != MAGIC:
+        if magic.lstrip()[:1] == b"{":
+            raise ValueError("JSON proofs are an export format; verify the binary proof file instead")
+        raise ValueError("Not a binary proof file")
+    return load_binary_proof(filename)
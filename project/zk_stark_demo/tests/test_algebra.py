@@ -8,6 +8,10 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'
 
 from zk_stark_demo.algebra.field import FieldElement
 from zk_stark_demo.algebra.polynomial import Polynomial
+from zk_stark_demo.algebra.merkle import MerkleTree
+from zk_stark_demo.algebra.encoding import encode_elements, encode_columns
+from zk_stark_demo.algebra.field_vector import FieldVector
+import hashlib
 
 class TestMath(unittest.TestCase):
     def test_field_arithmetic(self):
@@ -55,5 +59,78 @@ class TestMath(unittest.TestCase):
         self.assertEqual(poly.coefficients[1], FieldElement(1))
         self.assertEqual(poly.coefficients[2], FieldElement(1))
 
+    def test_merkle_tree(self):
+        # Reference root: hash layer by layer, duplicating the last node of odd layers
+        def reference_root(data):
+            layer = [hashlib.sha256(d).digest() for d in data]
+            while len(layer) > 1:
+                if len(layer) % 2 == 1:
+                    layer.append(layer[-1])
+                layer = [hashlib.sha256(layer[i] + layer[i + 1]).digest() for i in range(0, len(layer), 2)]
+            return layer[0]
+
+        for n in (1, 2, 3, 5, 8, 13):
+            data = [str(i).encode() for i in range(n)]
+            tree = MerkleTree(data)
+            self.assertEqual(tree.root, reference_root(data))
+            for i in range(n):
+                path = tree.get_authentication_path(i)
+                self.assertEqual(len(path), (n - 1).bit_length())
+                self.assertTrue(MerkleTree.verify_claim(tree.root, data[i], path, i))
+            self.assertFalse(MerkleTree.verify_claim(tree.root, b"x", tree.get_authentication_path(0), 0))
+
+    def test_multiproof(self):
+        for n in (1, 2, 5, 7, 8, 13):
+            data = [f"leaf{i}".encode() for i in range(n)]
+            tree = MerkleTree(data)
+            # Unsorted and repeated indices open each leaf once
+            indices = [n - 1, 0, n // 2, 0, n - 1]
+            proof = tree.open_many(indices)
+            self.assertEqual(proof, tree.open_many(sorted(set(indices))))
+            leaves = {i: data[i] for i in indices}
+            self.assertTrue(MerkleTree.verify_many(tree.root, leaves, proof, n))
+            # Shared path nodes are sent once
+            self.assertLessEqual(len(proof), len(set(indices)) * (n - 1).bit_length())
+
+            # Tampered leaves or proof nodes, and truncated or extra nodes, are refused
+            self.assertFalse(MerkleTree.verify_many(tree.root, {**leaves, 0: b"x"}, proof, n))
+            if proof:
+                tampered = [bytes([proof[0][0] ^ 1]) + proof[0][1:]] + proof[1:]
+                self.assertFalse(MerkleTree.verify_many(tree.root, leaves, tampered, n))
+                self.assertFalse(MerkleTree.verify_many(tree.root, leaves, proof[:-1], n))
+            self.assertFalse(MerkleTree.verify_many(tree.root, leaves, proof + [bytes(32)], n))
+
+            # Out-of-range indices (including the padding slot of odd trees), and no leaves at all
+            for index in (-1, n, tree.capacity):
+                self.assertFalse(MerkleTree.verify_many(tree.root, {**leaves, index: b"x"}, proof, n))
+            self.assertFalse(MerkleTree.verify_many(tree.root, {}, [], n))
+
+    def test_merkle_cap(self):
+        # The cap plus the subtrees under the opened leaves open them like the whole tree
+        data = [f"leaf{i}".encode() for i in range(16)]
+        tree = MerkleTree(data)
+        capped = MerkleTree.from_cap(tree.cap(4), 16, {s: MerkleTree(data[4 * s:4 * s + 4]) for s in (0, 2)})
+        for indices in ([1], [0, 3, 9], [8, 11]):
+            self.assertEqual(capped.open_many(indices), tree.open_many(indices))
+        self.assertEqual(capped.get_authentication_path(9), tree.get_authentication_path(9))
+        self.assertEqual(tree.cap(16), bytes(tree.nodes))
+        for size in (0, 3, 32):
+            with self.assertRaises(ValueError):
+                tree.cap(size)
+
+    def test_canonical_leaf_encoding(self):
+        # 4 bytes little-endian per element, rows concatenated
+        self.assertEqual(encode_elements([FieldElement(1), FieldElement(FieldElement.P - 1)]),
+                         b"\x01\x00\x00\x00" + (FieldElement.P - 1).to_bytes(4, "little"))
+
+        columns = [FieldVector([1, 2, 3]), FieldVector([4, 5, 6])]
+        rows = [[FieldElement(1), FieldElement(4)], [FieldElement(2), FieldElement(5)], [FieldElement(3), FieldElement(6)]]
+        # Hashing straight from the row-major buffer matches hashing each encoded row
+        tree = MerkleTree.from_buffer(encode_columns(columns), 8)
+        self.assertEqual(tree.root, MerkleTree([encode_elements(r) for r in rows]).root)
+        self.assertTrue(MerkleTree.verify_claim(tree.root, encode_elements(rows[2]), tree.get_authentication_path(2), 2))
+        with self.assertRaises(ValueError):
+            MerkleTree.from_buffer(encode_columns(columns), 5)
+
 if __name__ == '__main__':
     unittest.main()
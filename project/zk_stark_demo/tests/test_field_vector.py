@@ -0,0 +1,107 @@
+
+import unittest
+import sys
+import os
+import random
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from zk_stark_demo.algebra.field import FieldElement
+from zk_stark_demo.algebra.field_vector import FieldVector, batch_inverse
+from zk_stark_demo.algebra.fft import fft, ifft, fft_columns, ifft_columns, coset_fft, coset_ifft, bit_reverse, reverse_bits, reverse_bits_array, fft_blocks
+
+class TestFieldVector(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1234)
+        self.a = [FieldElement(rng.randrange(FieldElement.P)) for _ in range(64)]
+        self.b = [FieldElement(rng.randrange(FieldElement.P)) for _ in range(64)]
+        self.va = FieldVector(self.a)
+        self.vb = FieldVector(self.b)
+
+    def test_elementwise_matches_scalar(self):
+        self.assertEqual(self.va + self.vb, [x + y for x, y in zip(self.a, self.b)])
+        self.assertEqual(self.va - self.vb, [x - y for x, y in zip(self.a, self.b)])
+        self.assertEqual(self.va * self.vb, [x * y for x, y in zip(self.a, self.b)])
+        self.assertEqual(-self.va, [-x for x in self.a])
+        self.assertEqual(self.va.pow(5), [x.pow(5) for x in self.a])
+        self.assertEqual(self.va / self.vb, [x / y for x, y in zip(self.a, self.b)])
+
+    def test_scalar_operands(self):
+        c = FieldElement(FieldElement.P - 7)
+        self.assertEqual(self.va * c, [x * c for x in self.a])
+        self.assertEqual(c * self.va, [x * c for x in self.a])
+        self.assertEqual(1 - self.va, [1 - x for x in self.a])
+        self.assertEqual(self.va.scale(3), [x * 3 for x in self.a])
+
+    def test_batch_inverse(self):
+        values = self.a[:37] + [FieldElement(0)] + self.b[:5]
+        expected = [v.inv() for v in values]
+        # Scalar-list form and whole-vector form agree with one-by-one inversion
+        self.assertEqual(batch_inverse(values), expected)
+        self.assertEqual(batch_inverse(FieldVector(values)), expected)
+        self.assertEqual(batch_inverse([]), [])
+
+    def test_powers(self):
+        g = FieldElement.generator_of_order(32)
+        shift = FieldElement(3)
+        expected = [shift * g.pow(i) for i in range(32)]
+        self.assertEqual(FieldVector.powers(g, 32, start=shift), expected)
+        exponents = [0, 1, 5, 31, 1 << 29]
+        self.assertEqual(FieldVector.powers_at(g, exponents), [g.pow(e) for e in exponents])
+
+    def test_fft_roundtrip(self):
+        root = FieldElement.generator_of_order(64)
+        evals = fft(self.a, root)
+        # Spot-check against direct evaluation
+        for i in (0, 1, 17, 63):
+            x = root.pow(i)
+            direct = FieldElement(0)
+            for coef in reversed(self.a):
+                direct = direct * x + coef
+            self.assertEqual(evals[i], direct)
+        self.assertEqual(ifft(evals, root), self.a)
+
+    def test_fft_columns_matches_single(self):
+        root = FieldElement.generator_of_order(64)
+        columns = fft_columns([self.a, self.b], root)
+        self.assertEqual(columns[0], fft(self.a, root))
+        self.assertEqual(columns[1], fft(self.b, root))
+        self.assertEqual(ifft_columns(columns, root), [self.va, self.vb])
+
+    def test_coset_fft_roundtrip(self):
+        shift = FieldElement(3)
+        evals = coset_fft(self.a[:16], shift, 64)
+        w = FieldElement.generator_of_order(64)
+        x = shift * w.pow(5)
+        direct = FieldElement(0)
+        for coef in reversed(self.a[:16]):
+            direct = direct * x + coef
+        self.assertEqual(evals[5], direct)
+        self.assertEqual(coset_ifft(evals, shift), self.a[:16] + [FieldElement(0)] * 48)
+
+    def test_bit_reverse(self):
+        reordered = bit_reverse(self.va)
+        self.assertEqual(reverse_bits(1, 6), 32)
+        self.assertEqual(reverse_bits(0b000110, 6), 0b011000)
+        for p in (0, 1, 5, 63):
+            self.assertEqual(reordered[p], self.a[reverse_bits(p, 6)])
+        self.assertEqual(bit_reverse(reordered), self.va)
+        # x and -x (natural indices i, i + n/2) end up adjacent
+        self.assertEqual(reverse_bits(2 * 7 + 1, 6), reverse_bits(2 * 7, 6) + 32)
+        for log_size in (0, 6, 30):
+            indices = [random.randrange(1 << log_size) for _ in range(10)]
+            self.assertEqual(reverse_bits_array(indices, log_size).tolist(), [reverse_bits(i, log_size) for i in indices])
+
+    def test_fft_blocks_matches_single(self):
+        root = FieldElement.generator_of_order(8)
+        blocks = fft_blocks(self.va, 8, root)
+        for q in range(8):
+            self.assertEqual(blocks[8 * q:8 * q + 8], fft(self.a[8 * q:8 * q + 8], root))
+
+    def test_fft_rejects_non_power_of_two(self):
+        with self.assertRaises(ValueError):
+            fft(self.a[:48], FieldElement.generator_of_order(16))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,55 +3,128 @@ import unittest
 import sys
 import os
 import random
+import tracemalloc
 
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 from zk_stark_demo.algebra.field import FieldElement
 from zk_stark_demo.algebra.polynomial import Polynomial
-from zk_stark_demo.stark.fri import FriProver
+from zk_stark_demo.algebra.field_vector import FieldVector
+from zk_stark_demo.algebra.merkle import MerkleTree
+from zk_stark_demo.stark.fri import FriDomain, FriProver, MERKLE_CAP_SIZE, SUPPORTED_ARITIES
+from zk_stark_demo.algebra.fft import bit_reverse
 from zk_stark_demo.stark.fri_verifier import FriVerifier
 from zk_stark_demo.stark.channel import Channel
 
 class TestFRI(unittest.TestCase):
     def test_fri_integration(self):
-        # 1. Setup
-        # Create a polynomial of degree < N/2
-        degree = 15
-        N = 64 # Domain size (must be power of 2)
-        coeffs = [random.randint(0, 1000) for _ in range(degree)]
-        poly = Polynomial(coeffs)
-        
+        for arity in SUPPORTED_ARITIES:
+            # Default early termination, and folding all the way to a constant
+            for limits in ({}, {'max_remainder_length': 1, 'max_remainder_degree': 0}):
+                with self.subTest(arity=arity, **limits):
+                    self.check_fri(arity, limits)
+
+    def make_proof(self, poly, N, arity, limits, degree_bound=16):
         # Domain: roots of unity of order N
         g = FieldElement.generator_of_order(N)
         domain = [g.pow(i) for i in range(N)]
         
-        # 2. Prover
-        prover = FriProver(poly, domain)
-        
-        # Simulate interaction
-        prover_channel = Channel()
+        prover = FriProver(poly, domain, arity=arity, degree_bound=degree_bound, **limits)
         
         # Generate Proof (Commit Phase)
-        commitments, final_const = prover.generate_proof(prover_channel)
+        commitments, remainder = prover.generate_proof(Channel())
         
         # Query Phase
         # Verifier asks for some random indices
         indices = [random.randint(0, N-1) for _ in range(5)]
-        layer_proofs = prover.query_phase(indices)
+        layer_proofs, multiproofs = prover.query_phase(indices)
         
-        proof = {
+        return {
+            'arity': arity,
             'commitments': commitments,
-            'final_constant': final_const,
-            'layer_proofs': layer_proofs
+            'remainder': remainder,
+            'layer_proofs': layer_proofs,
+            'multiproofs': multiproofs
         }
+
+    def check_fri(self, arity, limits):
+        # Create a polynomial of degree < 16 = N/4
+        N = 64 # Domain size (must be power of 2)
+        poly = Polynomial([random.randint(0, 1000) for _ in range(15)])
+        proof = self.make_proof(poly, N, arity, limits)
         
-        # 3. Verifier
-        verifier_channel = Channel() # New channel, replay
-        verifier = FriVerifier(proof, verifier_channel)
-        
-        result = verifier.verify(domain_length=N)
+        # Verifier replays the channel
+        result = FriVerifier(proof, Channel(), **limits).verify(domain_length=N, degree_bound=16)
         self.assertTrue(result, "FRI Verification failed")
+        
+        # The arity fixes the layer layout: any other one is rejected
+        other = SUPPORTED_ARITIES[(SUPPORTED_ARITIES.index(arity) + 1) % len(SUPPORTED_ARITIES)]
+        self.assertFalse(FriVerifier(dict(proof, arity=other), Channel(), **limits).verify(domain_length=N, degree_bound=16))
+        self.assertFalse(FriVerifier(dict(proof, arity=3), Channel(), **limits).verify(domain_length=N, degree_bound=16))
+        
+        # A tampered remainder breaks the last fold check
+        remainder = list(proof['remainder'])
+        remainder[0] = remainder[0] + FieldElement(1)
+        self.assertFalse(FriVerifier(dict(proof, remainder=remainder), Channel(), **limits).verify(domain_length=N, degree_bound=16))
+        
+        # A tampered opening no longer matches the layer's multi-proof
+        layer_proofs = proof['layer_proofs']
+        layer_proofs[-1][0]['values'][0] = layer_proofs[-1][0]['values'][0] + FieldElement(1)
+        self.assertFalse(FriVerifier(proof, Channel(), **limits).verify(domain_length=N, degree_bound=16))
+
+    def test_low_memory_mode(self):
+        # Rebuilding the opened subtrees at query time must reproduce the stored layers exactly
+        N = 1 << 15
+        values = FieldVector([random.randrange(FieldElement.P) for _ in range(N)])
+        domain = FriDomain(FieldElement(3), FieldElement.generator_of_order(N), N)
+        indices = [random.randint(0, N-1) for _ in range(32)]
+        for arity in (2, 4):  # Layer 1 has more than MERKLE_CAP_SIZE leaves
+            with self.subTest(arity=arity):
+                provers, results, peaks = [], [], []
+                for low_memory in (False, True):
+                    prover = FriProver(None, domain, values, arity=arity, low_memory=low_memory)
+                    commitments = prover.generate_proof(Channel())
+                    tracemalloc.start()
+                    results.append((commitments, prover.query_phase(indices)))
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                    provers.append(prover)
+                self.assertEqual(results[0], results[1])
+
+                # Large layers are kept as their cap only, and the query phase
+                # never rebuilds one of them whole
+                full, low = provers
+                capped = full.layers[1:len(low.caps) + 1]
+                self.assertGreater(len(capped), 0)
+                self.assertEqual([l.root for l in low.layers[1:]], [l.root for l in full.layers[len(capped) + 1:]])
+                self.assertEqual([len(cap) for cap in low.caps], [2 * MERKLE_CAP_SIZE * MerkleTree.HASH_SIZE] * len(capped))
+                layer_size = capped[0].values.data.nbytes + len(capped[0].merkle_tree.nodes)
+                self.assertLess(sum(map(len, low.caps)), sum(l.values.data.nbytes + len(l.merkle_tree.nodes) for l in capped))
+                self.assertLess(peaks[1] - peaks[0], layer_size / 2)
+
+    def test_implicit_domain(self):
+        domain = FriDomain(FieldElement(3), FieldElement.generator_of_order(64), 64)
+        layer = bit_reverse(domain.points())
+        self.assertEqual([domain.point(p) for p in range(64)], layer.to_list())
+        self.assertEqual(domain.points_at([5, 0, 63, 5]), [layer[5], layer[0], layer[63], layer[5]])
+        self.assertEqual(domain.coset_offsets(8), layer[0::8])
+        self.assertEqual(domain.inverse().coset_offsets(8), layer[0::8].inv())
+        # Point q of the folded domain is x0_q^8
+        self.assertEqual(bit_reverse(domain.fold(8).points()), layer[0::8].pow(8))
+
+    def test_rejects_high_degree(self):
+        # deg 40 >= 16: the truncated remainder cannot match the folded values
+        N = 64
+        poly = Polynomial([random.randint(1, 1000) for _ in range(41)])
+        for arity in SUPPORTED_ARITIES:
+            with self.subTest(arity=arity):
+                proof = self.make_proof(poly, N, arity, {})
+                self.assertFalse(FriVerifier(proof, Channel()).verify(domain_length=N, degree_bound=16))
+                # Sending the whole remainder fails the degree check instead
+                proof = self.make_proof(poly, N, arity, {}, degree_bound=N)
+                self.assertTrue(FriVerifier(proof, Channel()).verify(domain_length=N))
+                self.assertFalse(FriVerifier(proof, Channel()).verify(domain_length=N, degree_bound=16))
 
 if __name__ == '__main__':
     unittest.main()
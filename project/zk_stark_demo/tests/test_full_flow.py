@@ -10,6 +10,7 @@ from zk_stark_demo.air_examples.fibonacci import FibonacciAIR
 from zk_stark_demo.stark.prover import StarkProver
 from zk_stark_demo.stark.verifier import StarkVerifier
 from zk_stark_demo.algebra.field import FieldElement
+from zk_stark_demo.utils.serialization import serialize_proof, deserialize_proof
 
 class TestFullFlow(unittest.TestCase):
     def test_fibonacci_proof(self):
@@ -44,5 +45,20 @@ class TestFullFlow(unittest.TestCase):
         
         self.assertTrue(result, "STARK Verification Failed")
 
+    def test_rejects_other_protocol_version(self):
+        length = 8
+        air = FibonacciAIR(length, FieldElement(34))
+        proof = StarkProver(air, air.generate_trace([1, 1])).prove()
+
+        # Serialized proofs round-trip, but unversioned (older) ones are refused
+        data = serialize_proof(proof)
+        self.assertTrue(StarkVerifier(air).verify(deserialize_proof(data)))
+        del data['version']
+        with self.assertRaises(ValueError):
+            deserialize_proof(data)
+
+        proof['version'] = 1
+        self.assertFalse(StarkVerifier(air).verify(proof))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from zk_stark_demo.air_examples.fibonacci import FibonacciAIR
+from zk_stark_demo.algebra.field import FieldElement
+from zk_stark_demo.stark.grinding import NONCE_RANGE, find_nonce, verify_nonce
+from zk_stark_demo.stark.parameters import StarkParameters
+from zk_stark_demo.stark.prover import StarkProver
+from zk_stark_demo.stark.verifier import StarkVerifier
+
+class TestGrinding(unittest.TestCase):
+    def test_find_and_verify_nonce(self):
+        seed = b"transcript state"
+        nonce = find_nonce(seed, 10, workers=1)
+        self.assertTrue(verify_nonce(seed, nonce, 10))
+        self.assertFalse(any(verify_nonce(seed, n, 10) for n in range(nonce)))
+        self.assertFalse(verify_nonce(seed, nonce, 65))
+        self.assertEqual(find_nonce(seed, 0), 0)
+
+    def test_process_pool_finds_smallest_nonce(self):
+        # 2^17 expected attempts: spread over ranges searched by two workers
+        seed = b"pool"
+        nonce = find_nonce(seed, 17, workers=2)
+        self.assertTrue(verify_nonce(seed, nonce, 17))
+        self.assertEqual(nonce, find_nonce(seed, 17, workers=1))
+        self.assertGreater(2 ** 17, NONCE_RANGE)
+
+    def test_grinding_proof(self):
+        air = FibonacciAIR(8, FieldElement(34))
+        trace = air.generate_trace([1, 1])
+        parameters = StarkParameters(num_queries=6, grinding_bits=8)
+        proof = StarkProver(air, trace, parameters, grinding_workers=1).prove()
+        self.assertEqual(len(proof['trace_queries']), 6)
+        self.assertTrue(StarkVerifier(air, parameters).verify(proof))
+
+        # Less work than the verifier asks for, or a wrong nonce, is refused
+        self.assertFalse(StarkVerifier(air, StarkParameters(num_queries=6, grinding_bits=12)).verify(proof))
+        # Every nonce below the one found fails (out of range if it is 0)
+        proof['pow_nonce'] = proof['pow_nonce'] - 1 if proof['pow_nonce'] else 2 ** 64
+        self.assertFalse(StarkVerifier(air, parameters).verify(proof))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from zk_stark_demo.air_examples.cubic import CubicAIR
+from zk_stark_demo.air_examples.fibonacci import FibonacciAIR
+from zk_stark_demo.algebra.field import FieldElement
+from zk_stark_demo.stark.keys import ProverKey, VerifierKey
+from zk_stark_demo.stark.parameters import StarkParameters
+from zk_stark_demo.stark.prover import StarkProver
+from zk_stark_demo.stark.verifier import StarkVerifier
+
+class TestKeys(unittest.TestCase):
+    def setUp(self):
+        self.air = FibonacciAIR(16, FieldElement(1597))
+        self.trace = self.air.generate_trace([1, 1])
+        # Keys only depend on the shape: the public result is not part of them
+        template = FibonacciAIR(16, FieldElement(0))
+        self.parameters = StarkParameters(num_queries=8, fri_arity=4)
+        self.prover_key = ProverKey(template, self.parameters)
+        self.verifier_key = VerifierKey(template, self.parameters)
+
+    def test_shared_keys(self):
+        proof = StarkProver(self.air, self.trace, key=self.prover_key).prove()
+        self.assertEqual(proof['parameters'], self.parameters)
+        # Same proof as without a key
+        self.assertEqual(proof['fri_commitments'], StarkProver(self.air, self.trace, self.parameters).prove()['fri_commitments'])
+
+        # One verifier instance checks any number of proofs
+        verifier = StarkVerifier(self.air, key=self.verifier_key)
+        self.assertTrue(verifier.verify(proof))
+        self.assertTrue(verifier.verify(proof))
+        self.assertFalse(StarkVerifier(FibonacciAIR(16, FieldElement(1598)), key=self.verifier_key).verify(proof))
+
+        # Proofs with other parameters than the key's are refused
+        other = StarkProver(self.air, self.trace).prove()
+        self.assertTrue(StarkVerifier(self.air).verify(other))
+        self.assertFalse(verifier.verify(other))
+
+    def test_rejects_other_shapes(self):
+        with self.assertRaises(ValueError):
+            StarkProver(self.air, self.trace, StarkParameters(), key=self.prover_key)
+        longer = FibonacciAIR(32, FieldElement(0))
+        with self.assertRaises(ValueError):
+            StarkProver(longer, longer.generate_trace([1, 1]), key=self.prover_key)
+        with self.assertRaises(ValueError):
+            StarkVerifier(self.air, StarkParameters(), key=self.verifier_key)
+
+        cubic = CubicAIR(16, FieldElement(0))
+        proof = StarkProver(self.air, self.trace, key=self.prover_key).prove()
+        self.assertFalse(StarkVerifier(cubic, key=VerifierKey(self.air, self.parameters)).verify(proof))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from zk_stark_demo.air_examples.fibonacci import FibonacciAIR
+from zk_stark_demo.gui.discovery import get_schema
+from zk_stark_demo.algebra.field import FieldElement
+from zk_stark_demo.stark.parameters import StarkParameters, choose_parameters, estimate
+from zk_stark_demo.stark.prover import StarkProver
+from zk_stark_demo.stark.verifier import StarkVerifier
+from zk_stark_demo.utils.serialization import serialize_proof, deserialize_proof
+
+class TestParameters(unittest.TestCase):
+    def setUp(self):
+        self.air = FibonacciAIR(16, FieldElement(1597))
+        self.trace = self.air.generate_trace([1, 1])
+
+    def test_custom_parameters_proof(self):
+        parameters = StarkParameters(blowup_factor=8, num_queries=7, fri_arity=4, max_remainder_length=4, grinding_bits=4)
+        proof = StarkProver(self.air, self.trace, parameters).prove()
+        data = serialize_proof(proof)
+        self.assertEqual(data['parameters'], parameters.to_dict())
+        self.assertTrue(StarkVerifier(self.air, parameters).verify(deserialize_proof(data)))
+
+        # Other expected parameters (by default StarkParameters()) are refused
+        self.assertFalse(StarkVerifier(self.air).verify(proof))
+        # Unless the proof's parameters are accepted, and secure enough
+        self.assertTrue(StarkVerifier(self.air, accept_proof_parameters=True).verify(proof))
+        self.assertFalse(StarkVerifier(self.air, min_security_bits=30, accept_proof_parameters=True).verify(proof))
+
+        # The parameters are bound to the transcript
+        proof['parameters'] = StarkParameters(blowup_factor=8, num_queries=7, fri_arity=4, max_remainder_length=4)
+        self.assertFalse(StarkVerifier(self.air, accept_proof_parameters=True).verify(proof))
+
+    def test_rejects_weak_proof_parameters(self):
+        # Parameters chosen by the prover must reach the security of the defaults
+        weak = StarkParameters(blowup_factor=2, num_queries=1)
+        proof = StarkProver(self.air, self.trace, weak).prove()
+        self.assertTrue(StarkVerifier(self.air, weak).verify(proof))
+        self.assertFalse(StarkVerifier(self.air).verify(proof))
+        self.assertFalse(StarkVerifier(self.air, accept_proof_parameters=True).verify(proof))
+
+    def test_rejects_malformed_parameters(self):
+        with self.assertRaises(ValueError):
+            StarkProver(self.air, self.trace, StarkParameters(blowup_factor=3))
+        defaults = StarkParameters().to_dict()
+        for data in (
+            {},
+            dict(defaults, fri_arity=5),
+            dict(defaults, extra=1),
+            dict(defaults, num_queries=1 << 40),
+            dict(defaults, max_remainder_length=1 << 40),
+            dict(defaults, max_remainder_degree=-1),
+        ):
+            with self.assertRaises(ValueError):
+                StarkParameters.from_dict(data)
+        # More queries than LDE points
+        with self.assertRaises(ValueError):
+            StarkParameters(num_queries=65).validate(16)
+
+        # The verifier refuses such parameters instead of failing to absorb them
+        proof = StarkProver(self.air, self.trace).prove()
+        for name in ("num_queries", "max_remainder_length"):
+            proof['parameters'] = StarkParameters(**dict(defaults, **{name: 1 << 40}))
+            self.assertFalse(StarkVerifier(self.air, accept_proof_parameters=True).verify(proof))
+
+    def test_estimate(self):
+        base = estimate(StarkParameters(), 2, 64, 2)
+        self.assertAlmostEqual(base.query_bits, 20)
+        self.assertLessEqual(base.security_bits, base.field_bits)
+        # More queries: more bits, bigger proofs, same prover work
+        more = estimate(StarkParameters(num_queries=11), 2, 64, 2)
+        self.assertGreater(more.security_bits, base.security_bits)
+        self.assertGreater(more.proof_size, base.proof_size)
+        self.assertGreater(more.verifier_cost, base.verifier_cost)
+        self.assertEqual(more.prover_cost, base.prover_cost)
+        # The field caps the security whatever the queries
+        self.assertEqual(estimate(StarkParameters(num_queries=40), 2, 64, 2).security_bits, base.field_bits)
+        # Grinding trades prover work for bits
+        ground = estimate(StarkParameters(grinding_bits=16), 2, 64, 2)
+        self.assertGreater(ground.prover_cost, base.prover_cost)
+        self.assertEqual(ground.proof_size, base.proof_size)
+
+    def test_choose_parameters(self):
+        for objective in ("proof_size", "prover", "verifier"):
+            parameters, result = choose_parameters(2, 1024, 2, 18, objective)
+            self.assertGreaterEqual(result.security_bits, 18)
+            self.assertGreaterEqual(estimate(parameters, 2, 1024, 2).security_bits, 18)
+            self.assertLessEqual(parameters.grinding_bits, 9)
+        # A 31-bit field cannot give 40 bits however many queries are made
+        with self.assertRaises(ValueError):
+            choose_parameters(2, 1024, 2, 40)
+
+    def test_gui_schema(self):
+        # The GUI offers the same shared flags as the command line
+        parameter_flags = {
+            "--blowup", "--queries", "--fri-arity", "--remainder-length", "--remainder-degree",
+            "--grinding-bits", "--transcript", "--security-bits", "--optimize",
+        }
+        for cli_type, base_flags in (
+            ("prover", {"--output", "--format"}),
+            ("verifier", {"--proof", "--accept-proof-parameters", "--min-security-bits"}),
+        ):
+            schema = get_schema("fibonacci", cli_type)
+            flags = {flag for arg in schema["arguments"] for flag in arg["flags"]}
+            self.assertTrue(parameter_flags | base_flags <= flags, cli_type)
+
+if __name__ == '__main__':
+    unittest.main()
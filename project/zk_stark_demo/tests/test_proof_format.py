@@ -0,0 +1,94 @@
+import unittest
+import json
+import sys
+import os
+import struct
+import tempfile
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from zk_stark_demo.air_examples.fibonacci import FibonacciAIR
+from zk_stark_demo.algebra.field import FieldElement
+from zk_stark_demo.stark.parameters import StarkParameters
+from zk_stark_demo.stark.prover import StarkProver
+from zk_stark_demo.stark.verifier import StarkVerifier
+from zk_stark_demo.utils.binary_proof import (
+    HEADER,
+    SECTION_ENTRY,
+    SECTION_FRI_REMAINDER,
+    BinaryProof,
+    encode_proof,
+    encode_varint,
+)
+from zk_stark_demo.utils.serialization import deserialize_proof, load_proof, save_proof, serialize_proof
+
+class TestProofFormat(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.air = FibonacciAIR(64, FieldElement(0))
+        trace = cls.air.generate_trace([1, 1])
+        cls.air = FibonacciAIR(64, trace[-1][1])
+        cls.proof = StarkProver(cls.air, trace).prove()
+        cls.encoded = encode_proof(cls.proof)
+
+    def section_offset(self, section_id):
+        count = HEADER.unpack_from(self.encoded)[2]
+        for i in range(count):
+            entry_id, offset, _ = SECTION_ENTRY.unpack_from(self.encoded, HEADER.size + i * SECTION_ENTRY.size)
+            if entry_id == section_id:
+                return offset
+
+    def test_varint(self):
+        self.assertEqual(encode_varint(0), b"\x00")
+        self.assertEqual(encode_varint(127), b"\x7f")
+        self.assertEqual(encode_varint(300), b"\xac\x02")
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            binary, exported = os.path.join(directory, "proof.bin"), os.path.join(directory, "proof.json")
+            save_proof(self.proof, binary)
+            save_proof(self.proof, exported)
+            self.assertLess(2 * os.path.getsize(binary), os.path.getsize(exported))
+
+            loaded = load_proof(binary)
+            self.assertIsInstance(loaded, BinaryProof)
+            # Only the header is decoded up front
+            self.assertEqual(set(loaded._fields), {'version', 'parameters', 'pow_nonce'})
+            self.assertEqual(serialize_proof(loaded), serialize_proof(self.proof))
+            self.assertTrue(StarkVerifier(self.air).verify(loaded))
+            # JSON is an export: its content round-trips, but it is not loaded as a proof file
+            with open(exported) as f:
+                self.assertTrue(StarkVerifier(self.air).verify(deserialize_proof(json.load(f))))
+            with self.assertRaises(ValueError):
+                load_proof(exported)
+            del loaded
+
+    def test_rejects_malformed(self):
+        # Parameters beyond 32 bits, which the transcript could not absorb
+        oversized = encode_proof(dict(self.proof, parameters=StarkParameters(num_queries=1 << 40)))
+        for data in (b"", b"STKP", b"XXXX" + self.encoded[4:], self.encoded[:HEADER.size + 3], self.encoded[:-1], oversized):
+            with self.assertRaises(ValueError):
+                BinaryProof(data)
+        # Sections only fail once they are read: claim one more remainder coefficient than stored
+        data = bytearray(self.encoded)
+        data[self.section_offset(SECTION_FRI_REMAINDER)] += 1
+        proof = BinaryProof(data)
+        self.assertEqual(proof['pow_nonce'], self.proof['pow_nonce'])
+        with self.assertRaises(ValueError):
+            proof['fri_remainder']
+
+        # A non-canonical remainder coefficient (P instead of 0) is refused
+        data = bytearray(self.encoded)
+        offset = self.section_offset(SECTION_FRI_REMAINDER) + 1
+        data[offset:offset + 4] = struct.pack("<I", FieldElement.P)
+        with self.assertRaises(ValueError):
+            BinaryProof(data)['fri_remainder']
+
+        # Any other change makes verification fail
+        data = bytearray(self.encoded)
+        data[-1] ^= 1
+        self.assertFalse(StarkVerifier(self.air).verify(BinaryProof(data)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,16 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'
 from zk_stark_demo.algebra.field import FieldElement
 from zk_stark_demo.stark.trace import Trace
 from zk_stark_demo.stark.lde import LowDegreeExtension
+from zk_stark_demo.stark.vanishing import TransitionVanishingPolynomial
+from zk_stark_demo.stark.boundary import BoundaryConstraints
+from zk_stark_demo.stark.composition import CompositionSegments
+from zk_stark_demo.algebra.polynomial import Polynomial
+from zk_stark_demo.algebra.field_vector import FieldVector
+from zk_stark_demo.stark.expressions import ConstraintSystem, col, next_col
+from zk_stark_demo.air_examples.fibonacci import FibonacciAIR
+from zk_stark_demo.air_examples.cubic import CubicAIR
+from zk_stark_demo.air_examples.rollup import RollupAIR
+from zk_stark_demo.air_examples.rollup_onehot import OneHotRollupAIR
 
 class TestStarkMechanics(unittest.TestCase):
     
@@ -45,8 +55,115 @@ class TestStarkMechanics(unittest.TestCase):
         for i in range(trace.length):
             x = lde.domain_d[i]
             # Evaluate using the polynomial derived
-            val = lde.trace_polynomials[0].eval(x)
+            val = Polynomial(lde.trace_coefficients[0].to_list()).eval(x)
             self.assertEqual(val, data[i][0])
 
+    def test_lde_commitment_order(self):
+        """
+        Coset-major commitment order: row idx and its next step idx + blowup are adjacent leaves.
+        """
+        data = [[FieldElement(i), FieldElement(i * i)] for i in range(8)]
+        lde = LowDegreeExtension(Trace(data, width=2), blowup_factor=4)
+        committed = lde.to_commitment_order(lde.lde_evaluations)
+        for idx in range(lde.lde_length):
+            pos = LowDegreeExtension.commitment_position(idx, 8, 4)
+            self.assertEqual(lde.get_evaluation(idx), [col[pos] for col in committed])
+            if idx // 4 < 7:
+                self.assertEqual(LowDegreeExtension.commitment_position(idx + 4, 8, 4), pos + 1)
+
+    def test_vanishing_inverse_over_coset(self):
+        """
+        The periodic x^N table must give the same 1/Z(x) as evaluating Z directly.
+        """
+        vanishing = TransitionVanishingPolynomial(8)
+        shift = FieldElement(3)
+        h = FieldElement.generator_of_order(32)
+        inverses = vanishing.inverse_over_coset(shift, 32)
+        xs = [shift * h.pow(i) for i in range(32)]
+        for i, x in enumerate(xs):
+            self.assertEqual(inverses[i] * vanishing.evaluate(x), FieldElement(1))
+        self.assertEqual(vanishing.inverse_at(xs[:5]), inverses[:5])
+
+    def test_boundary_grouping(self):
+        """
+        Registers pinned at the same steps share one group; the vectorized and
+        per-point evaluations agree, and the quotient vanishes for a matching trace.
+        """
+        constraints = [(0, 0, FieldElement(1)), (0, 1, FieldElement(2)), (3, 0, FieldElement(4)),
+                       (3, 1, FieldElement(8)), (0, 2, FieldElement(5))]
+        boundary = BoundaryConstraints(constraints, 4)
+        self.assertEqual(len(boundary.groups), 2)
+        self.assertEqual(boundary.num_registers, 3)
+
+        data = [[FieldElement(1), FieldElement(2), FieldElement(5)],
+                [FieldElement(2), FieldElement(4), FieldElement(6)],
+                [FieldElement(3), FieldElement(6), FieldElement(7)],
+                [FieldElement(4), FieldElement(8), FieldElement(8)]]
+        lde = LowDegreeExtension(Trace(data, width=3), blowup_factor=4)
+        betas = [FieldElement(11), FieldElement(13), FieldElement(17)]
+        over_domain = boundary.evaluate_over_domain(lde.lde_evaluations, lde.domain_lde, betas)
+        at_points = boundary.evaluate_at([lde.get_evaluation(i) for i in range(5)], lde.domain_lde[:5].to_list(), betas)
+        self.assertEqual(over_domain[:5], at_points)
+
+        # Each interpolant hits the pinned value at its pinned steps
+        for point, step in ((lde.domain_d[0], 0), (lde.domain_d[3], 3)):
+            for group in boundary.groups:
+                for reg, interpolant in zip(group.registers, group.interpolants):
+                    if step in group.steps:
+                        self.assertEqual(interpolant.eval(point), data[step][reg])
+
+    def test_batch_constraints_match_rowwise(self):
+        """
+        The vectorized constraint evaluators agree with the row-wise ones on arbitrary rows.
+        """
+        airs = [
+            FibonacciAIR(8, FieldElement(34)),
+            CubicAIR(8, FieldElement(0)),
+            RollupAIR(8, 4, [10, 20, 30, 40], [10, 20, 30, 40]),
+            OneHotRollupAIR(8, 4, [10, 20, 30, 40], [10, 20, 30, 40]),
+        ]
+        for air in airs:
+            width = air.trace_width()
+            current = [FieldVector([(7 * i + 3 * c) % 5 for i in range(16)]) for c in range(width)]
+            nxt = [col.roll(-4) for col in current]
+            batch = air.evaluate_transition_constraints_batch(current, nxt)
+            for i in range(16):
+                row = air.evaluate_transition_constraints([col[i] for col in current], [col[i] for col in nxt])
+                self.assertEqual([col[i] for col in batch], row)
+
+    def test_composition_segments(self):
+        """
+        Q(x) = sum_j x^{jN} Q_j(x) for the segments of a degree (d-1)N - 1 polynomial.
+        """
+        segments = CompositionSegments(8, 5)
+        self.assertEqual(segments.count, 4)
+        self.assertEqual(segments.evaluation_length(32), 32)
+        self.assertEqual(CompositionSegments(8, 10).evaluation_length(32), 128)
+
+        coeffs = FieldVector([(i * i + 1) % 97 for i in range(30)])
+        parts = segments.split(coeffs)
+        self.assertEqual([len(p) for p in parts], [8, 8, 8, 8])
+        x = FieldElement(123456)
+        values = [Polynomial(p.to_list()).eval(x) for p in parts]
+        self.assertEqual(segments.combine(values, x), Polynomial(coeffs.to_list()).eval(x))
+
+    def test_constraint_expressions(self):
+        """
+        Degrees are derived from the expressions, and shared subterms are compiled once.
+        """
+        square = col(0) * col(0)
+        system = ConstraintSystem([next_col(0) - square * col(1), next_col(1) - (square + 3) - 2, col(1) * 1])
+        self.assertEqual(system.degrees, [3, 2, 1])
+        self.assertEqual(system.max_degree, 3)
+        # col(0) * col(0) appears in two constraints but is multiplied once; `* 1` is folded away
+        self.assertEqual(system.source.count(" * "), 2)
+
+        cur = [FieldElement(5), FieldElement(7)]
+        nxt = [FieldElement(175), FieldElement(30)]
+        self.assertEqual(system.evaluate(cur, nxt), [FieldElement(0), FieldElement(0), FieldElement(7)])
+
+        self.assertEqual(CubicAIR(8, FieldElement(0)).constraint_degree(), 3)
+        self.assertEqual(RollupAIR(8, 4, [0] * 4, [0] * 4).constraint_degree(), 4)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from zk_stark_demo.air_examples.fibonacci import FibonacciAIR
+from zk_stark_demo.algebra.field import FieldElement
+from zk_stark_demo.stark.channel import TRANSCRIPT_SHA256, Channel, Transcript, new_channel
+from zk_stark_demo.stark.parameters import StarkParameters
+from zk_stark_demo.stark.prover import StarkProver
+from zk_stark_demo.stark.verifier import StarkVerifier
+
+class TestTranscript(unittest.TestCase):
+    def transcript(self, message=b"root"):
+        transcript = Transcript()
+        transcript.send(message)
+        return transcript
+
+    def test_batched_challenges(self):
+        elements = self.transcript().receive_random_field_elements(500)
+        self.assertEqual(elements, self.transcript().receive_random_field_elements(500))
+        self.assertNotEqual(elements, self.transcript(b"other").receive_random_field_elements(500))
+        self.assertTrue(all(0 <= e.val < FieldElement.P for e in elements))
+        self.assertEqual(len(set(e.val for e in elements)), 500)
+
+        # Messages are length-prefixed: splitting them differently changes the state
+        split = Transcript()
+        split.send(b"ro")
+        split.send(b"ot")
+        self.assertNotEqual(split.state, self.transcript().state)
+
+        # Each squeeze moves the state on
+        transcript = self.transcript()
+        first = transcript.receive_random_field_elements(3)
+        self.assertNotEqual(first, transcript.receive_random_field_elements(3))
+
+    def test_query_indices(self):
+        indices = self.transcript().receive_query_indices(40, 64)
+        self.assertEqual(indices, sorted(set(indices)))
+        self.assertEqual(len(indices), 40)
+        self.assertTrue(all(0 <= i < 64 for i in indices))
+        # Not a power of two: rejection sampling keeps every index in range
+        self.assertTrue(all(0 <= i < 48 for i in self.transcript().receive_query_indices(40, 48)))
+        # More queries than points: the whole domain
+        self.assertEqual(self.transcript().receive_query_indices(20, 16), list(range(16)))
+
+    def test_channel_compatibility(self):
+        # The batch methods of the SHA-256 Channel draw the same values as single calls
+        batched, single = Channel(), Channel()
+        self.assertEqual(
+            batched.receive_random_field_elements(4), [single.receive_random_field_element() for _ in range(4)]
+        )
+        self.assertEqual(batched.receive_query_indices(4, 64), [single.receive_random_int(0, 64) for _ in range(4)])
+        with self.assertRaises(ValueError):
+            new_channel(7)
+
+    def test_proofs(self):
+        air = FibonacciAIR(16, FieldElement(1597))
+        trace = air.generate_trace([1, 1])
+        parameters = StarkParameters(num_queries=30)
+        proof = StarkProver(air, trace, parameters).prove()
+        indices = [q['idx'] for q in proof['trace_queries']]
+        self.assertEqual(indices, sorted(set(indices)))
+        self.assertTrue(StarkVerifier(air, parameters).verify(proof))
+
+        compatible = StarkParameters(transcript=TRANSCRIPT_SHA256)
+        proof = StarkProver(air, trace, compatible).prove()
+        self.assertTrue(StarkVerifier(air, compatible).verify(proof))
+        # The transcript kind is bound to the proof
+        proof['parameters'] = StarkParameters()
+        self.assertFalse(StarkVerifier(air, accept_proof_parameters=True).verify(proof))
+
+if __name__ == '__main__':
+    unittest.main()